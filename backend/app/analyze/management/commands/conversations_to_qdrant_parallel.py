@@ -1,13 +1,18 @@
-from multiprocessing.dummy import Pool
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from common.base.base_command import CustomBaseCommand
 from analyze.utils.embedding_service import EmbeddingService
 from analyze.utils.qdrant_service import QDrantService
-from chat.models import ChatMessage
+from analyze.utils.qdrant_pipeline import (
+    iter_unembedded_message_chunks,
+    ensure_collection,
+    embed_message_chunk,
+    mark_messages_embedded,
+)
 
-from django.db.models import F
+from django.conf import settings
 
-# from multiprocessing import Pool
 from datetime import datetime
+import os
 import traceback
 
 
@@ -17,43 +22,27 @@ def messages_to_collection(
     embedding_service: EmbeddingService,
     messages: list[dict],
     logger,
+    batch_size=None,
 ):
     if messages is None or len(messages) == 0:
         logger.warning(f"No messages to process for agent_id {agent_id}.")
         return None
 
     try:
-        exists = qdrant_service.check_collection_exists(agent_id, logging=False)
-        if not exists:
-            response = qdrant_service.create_collection(agent_id, logging=False)
-            if not response:
-                logger.error(
-                    f"Failed to create collection for agent_id {agent_id}: {response}"
-                )
-                return None
-
-        embedding_response = embedding_service.generate_embedding(
+        ids = embed_message_chunk(
+            agent_id,
             messages,
+            qdrant_service,
+            embedding_service,
+            logger,
+            batch_size=batch_size,
             logging=False,
         )
-        if embedding_response:
-            qdrant_response = qdrant_service.add_messages_to_collection(
-                agent_id,
-                embedding_response,
-                logging=False,
+        if ids:
+            logger.info(
+                f"Found to be update {len(ids)} messages as embedded in Qdrant collection {agent_id}."
             )
-            if qdrant_response:
-                ids = [message["embedding_id"] for message in messages]
-                logger.info(
-                    f"Found to be update {len(ids)} messages as embedded in Qdrant collection {agent_id}."
-                )
-                return ids
-            else:
-                logger.error(
-                    f"Failed to add messages to Qdrant collection {agent_id}: {qdrant_response}"
-                )
-        else:
-            logger.error(f"Embedding Service returned an error: {embedding_response}")
+        return ids
     except Exception as e:
         logger.error(traceback.format_exc())
         logger.error(
@@ -68,6 +57,32 @@ class Command(CustomBaseCommand):
 
     def add_arguments(self, parser):
         super().add_arguments(parser)
+        parser.add_argument(
+            "--batch_size",
+            type=int,
+            default=settings.EMBEDDING_BATCH_SIZE,
+            help="Number of messages sent per embeddings request.",
+        )
+        parser.add_argument(
+            "--chunk_size",
+            type=int,
+            default=settings.QDRANT_PIPELINE_CHUNK_SIZE,
+            help="Number of messages read, embedded and marked per step.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 4,
+            help="Number of chunks processed concurrently.",
+        )
+
+    def mark_done(self, future):
+        ids = future.result()
+        if not ids:
+            return 0
+        updated_count = mark_messages_embedded(ids)
+        self.logger.info(f"Updated {updated_count} messages as embedded in Qdrant.")
+        return updated_count
 
     def process(self, *args, **options):
         now = datetime.now()
@@ -76,51 +91,53 @@ class Command(CustomBaseCommand):
         )
         embedding_service = EmbeddingService()
         qdrant_service = QDrantService()
-        messages = (
-            ChatMessage.objects.filter(embedded_in_qdrant=False)
-            .values(
-                "embedding_id",
-                "sender_type",
-                "content",
-                "conversation_id",
-                "id",
-            )
-            .annotate(agent_id=F("conversation__agent_id"))
-            .order_by("-created_at")
-        )
-
-        agent_messages = {}
-        for message in messages:
-            agent_messages.setdefault(message["agent_id"], []).append(message)
-
-        if not agent_messages:
-            self.logger.warning("No messages found for embedding.")
-            return
+        known_collections = set()
+        workers = max(options["workers"], 1)
+        # At most this many chunks are held in memory at any time.
+        max_pending = workers * 2
 
+        chunk_count = 0
+        total_updated = 0
         try:
-            result_ids = []
-            with Pool() as pool:
-                result_ids = pool.starmap(
-                    messages_to_collection,
-                    [
-                        (
+            pending = set()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for agent_id, messages in iter_unembedded_message_chunks(
+                    options["chunk_size"]
+                ):
+                    chunk_count += 1
+                    if not ensure_collection(
+                        qdrant_service, agent_id, known_collections, logging=False
+                    ):
+                        self.logger.error(
+                            f"Failed to create collection for agent_id {agent_id}."
+                        )
+                        continue
+
+                    pending.add(
+                        executor.submit(
+                            messages_to_collection,
                             agent_id,
                             qdrant_service,
                             embedding_service,
                             messages,
                             self.logger,
+                            options["batch_size"],
                         )
-                        for agent_id, messages in agent_messages.items()
-                    ],
-                )
-            ids = [id for sublist in result_ids for id in sublist if id]
-            if ids:
-                updated_count = ChatMessage.objects.filter(embedding_id__in=ids).update(
-                    embedded_in_qdrant=True
-                )
-                self.logger.info(
-                    f"Updated {updated_count} messages as embedded in Qdrant."
-                )
+                    )
+                    if len(pending) >= max_pending:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            total_updated += self.mark_done(future)
+
+                for future in pending:
+                    total_updated += self.mark_done(future)
+
+            if not chunk_count:
+                self.logger.warning("No messages found for embedding.")
+                return
+            self.logger.info(
+                f"Updated {total_updated} messages as embedded in Qdrant."
+            )
         except Exception as e:
             self.logger.error(f"An error occurred: {str(e)}")
         else:
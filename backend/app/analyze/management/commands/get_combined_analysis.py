@@ -0,0 +1,250 @@
+from analyze.utils.engine_types import EngineType
+from analyze.utils.openai_service import OpenAIService
+from analyze.utils.claude_service import ClaudeService
+from analyze.utils.ai_service import COMBINED_ANALYSIS_FACETS
+from analyze.utils.ai_runner import ConcurrentAIRunner
+from analyze.utils.ai_response_cache import AIResponseCache
+from analyze.models.statistics import ContextChange
+from common.utils.response_cache import invalidate_conversations
+from chat.models.conversation import Conversation
+from chat.utils.transcript import iter_conversation_transcripts
+from common.base.base_command import CustomBaseCommand
+from common.utils.bulk_update_buffer import BulkUpdateBuffer
+from chat.utils.conversation_updates import conversations_analyzed
+from common.models.connection import Agent
+
+from django.conf import settings
+from django.db.models import Q
+
+
+class Command(CustomBaseCommand):
+    command_name = "get_combined_analysis"
+    help = "Get title, sentiment, label and context change analysis with a single AI request per conversation."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--engine",
+            type=str,
+            default=EngineType.OPENAI.value,
+            help="The AI service engine to use (default: openai).",
+        )
+        parser.add_argument(
+            "--no_cache",
+            action="store_true",
+            default=False,
+            help="Send every request to the AI service instead of using cached responses.",
+        )
+        parser.add_argument(
+            "--save_batch_size",
+            type=int,
+            default=settings.ANALYSIS_SAVE_BATCH_SIZE,
+            help="Number of analyzed conversations saved per bulk update.",
+        )
+        parser.add_argument(
+            "--facets",
+            type=str,
+            default=",".join(COMBINED_ANALYSIS_FACETS),
+            help="Comma separated facets to analyze (default: title,sentiment,label,context).",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=None,
+            help="Number of concurrent AI requests (default: AI_SERVICE_CONCURRENCY).",
+        )
+
+    def missing_facets(self, conversation, facets, label_choices):
+        """
+        Facets of the conversation that are requested and not analyzed yet.
+        """
+        missing = []
+        if "title" in facets and not conversation.title:
+            missing.append("title")
+        if "sentiment" in facets and not conversation.analysis_result:
+            missing.append("sentiment")
+        if "label" in facets and not conversation.label and label_choices:
+            missing.append("label")
+        if "context" in facets and not conversation.context_analysis_done:
+            missing.append("context")
+        return missing
+
+    def process(self, *args, **options):
+        engine = options["engine"].lower()
+        if engine == EngineType.OPENAI.value:
+            service = OpenAIService()
+            self.logger.info("Using OpenAI Service...")
+        elif engine == EngineType.ANTHROPIC_CLAUDE.value:
+            service = ClaudeService()
+            self.logger.info("Using Claude Service...")
+        else:
+            self.logger.error(
+                f"Unsupported engine: {engine}. Supported engines are: openai, claude."
+            )
+            return
+
+        if options["no_cache"]:
+            service.use_cache = False
+            self.logger.info("AI response cache is disabled.")
+
+        facets = [
+            facet.strip().lower()
+            for facet in options["facets"].split(",")
+            if facet.strip()
+        ]
+        unknown = set(facets) - set(COMBINED_ANALYSIS_FACETS)
+        if unknown or not facets:
+            self.logger.error(
+                f"Unsupported facets: {', '.join(unknown) or '-'}. "
+                f"Supported facets are: {', '.join(COMBINED_ANALYSIS_FACETS)}."
+            )
+            return
+
+        # Only agents with label choices have conversations to label.
+        label_choices = {
+            agent.id: agent.label_choices
+            for agent in Agent.objects.filter(label_choices__isnull=False)
+            if agent.label_choices
+        }
+
+        pending = Q()
+        if "title" in facets:
+            pending |= Q(title__isnull=True)
+        if "sentiment" in facets:
+            pending |= Q(analysis_result__isnull=True)
+        if "label" in facets:
+            pending |= Q(label__isnull=True, agent_id__in=list(label_choices))
+        if "context" in facets:
+            pending |= Q(context_analysis_done=False)
+
+        conversations = Conversation.objects.filter(
+            pending,
+            messages__isnull=False,
+        ).distinct()
+        if not conversations.exists():
+            self.logger.info("No conversations found for analysis.")
+            return
+        self.logger.info(f"Found {conversations.count()} conversations for analysis.")
+
+        def conversation_texts():
+            for conversation, text in iter_conversation_transcripts(conversations):
+                choices = label_choices.get(conversation.agent_id)
+                conversation_facets = self.missing_facets(
+                    conversation, facets, choices
+                )
+                if conversation_facets:
+                    yield conversation, text, choices, conversation_facets
+
+        counts = {facet: 0 for facet in facets}
+        context_change_analyses = {}
+        saved_context_changes = 0
+
+        def save_context_changes():
+            """
+            Saves the pending context change analyses, skipping conversations
+            that already have one, found with a single query per batch.
+            """
+            nonlocal saved_context_changes
+            if not context_change_analyses:
+                return
+            analyzed_ids = set(
+                ContextChange.objects.filter(
+                    conversation_id__in=list(context_change_analyses),
+                ).values_list("conversation_id", flat=True)
+            )
+            new_analyses = [
+                analysis
+                for conversation_id, analysis in context_change_analyses.items()
+                if conversation_id not in analyzed_ids
+            ]
+            context_change_analyses.clear()
+            if new_analyses:
+                ContextChange.objects.bulk_create(new_analyses)
+                invalidate_conversations(
+                    analysis.conversation_id for analysis in new_analyses
+                )
+                saved_context_changes += len(new_analyses)
+        runner = ConcurrentAIRunner(service, concurrency=options["concurrency"])
+        with BulkUpdateBuffer(
+            Conversation,
+            batch_size=options["save_batch_size"],
+            logger=self.logger,
+            on_flush=conversations_analyzed,
+        ) as buffer:
+            try:
+                for item, result, error in runner.map(
+                    lambda item: service.combined_analysis(*item[1:]),
+                    conversation_texts(),
+                ):
+                    conversation, _, choices, conversation_facets = item
+                    self.logger.info(f"Analyzing conversation ID: {conversation.id}")
+                    if error:
+                        self.logger.error(f"An error occurred: {str(error)}")
+                        continue
+                    try:
+                        self.logger.info(f"Result: {result}")
+                        update_fields = []
+
+                        if "title" in conversation_facets and result["title"]:
+                            conversation.title = result["title"]
+                            update_fields.append("title")
+                            counts["title"] += 1
+
+                        if "sentiment" in conversation_facets and result["sentiment"]:
+                            conversation.analysis_result = result["sentiment"].upper()
+                            conversation.analysis_details = (
+                                f"{engine}: {result['sentiment_details']}"
+                            )
+                            update_fields += ["analysis_result", "analysis_details"]
+                            counts["sentiment"] += 1
+
+                        if "label" in conversation_facets and result["label"]:
+                            label = result["label"]
+                            if label not in choices:
+                                label = "Other"
+                            conversation.label = label
+                            update_fields.append("label")
+                            counts["label"] += 1
+
+                        if "context" in conversation_facets and (
+                            result["overall_context"] or result["topics"]
+                        ):
+                            if result["context_changes"]:
+                                context_change_analyses[conversation.id] = (
+                                    ContextChange(
+                                        conversation_id=conversation.id,
+                                        overall_context=result["overall_context"],
+                                        topics=result["topics"],
+                                        context_changes=result["context_changes"],
+                                    )
+                                )
+                                if (
+                                    len(context_change_analyses)
+                                    >= options["save_batch_size"]
+                                ):
+                                    save_context_changes()
+                            conversation.context_analysis_done = True
+                            update_fields.append("context_analysis_done")
+                            counts["context"] += 1
+
+                        if update_fields:
+                            buffer.add(conversation, update_fields)
+                            self.logger.info(
+                                f"Conversation ID {conversation.id} analyzed successfully."
+                            )
+                        else:
+                            self.logger.error(
+                                f"AI Service return format is wrong: {result}"
+                            )
+                    except Exception as e:
+                        self.logger.error(f"An error occurred: {str(e)}")
+            finally:
+                # Saved with the buffered conversations, also when the loop fails.
+                save_context_changes()
+                if saved_context_changes:
+                    self.logger.info(
+                        f"Saved {saved_context_changes} context change analyses."
+                    )
+
+        self.logger.info(f"Combined analysis completed. Counts: {counts}")
+        self.logger.info(f"AI response cache: {AIResponseCache.stats()}")
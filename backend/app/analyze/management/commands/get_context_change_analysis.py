@@ -2,10 +2,13 @@ from analyze.utils.engine_types import EngineType
 from analyze.utils.openai_service import OpenAIService
 from analyze.utils.replicate_service import ReplicateService
 from analyze.utils.claude_service import ClaudeService
-from chat.models.conversation import Conversation, ChatMessage
-from chat.serializers.conversation import ChatMessageSerializer
+from analyze.utils.ai_runner import ConcurrentAIRunner
+from analyze.utils.ai_response_cache import AIResponseCache
+from chat.models.conversation import Conversation
+from chat.utils.transcript import iter_conversation_transcripts
 from common.base.base_command import CustomBaseCommand
 from analyze.models.statistics import ContextChange
+from common.utils.response_cache import invalidate_conversations
 import traceback
 
 
@@ -21,6 +24,18 @@ class Command(CustomBaseCommand):
             default=EngineType.OPENAI.value,
             help="The AI service engine to test (default: openai).",
         )
+        parser.add_argument(
+            "--no_cache",
+            action="store_true",
+            default=False,
+            help="Send every request to the AI service instead of using cached responses.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=None,
+            help="Number of concurrent AI requests (default: AI_SERVICE_CONCURRENCY).",
+        )
 
     def process(self, *args, **options):
         engine = options["engine"].lower()
@@ -39,11 +54,24 @@ class Command(CustomBaseCommand):
             )
             return
 
+        if options["no_cache"]:
+            service.use_cache = False
+            self.logger.info("AI response cache is disabled.")
+
         conversations = Conversation.objects.filter(
             context_analysis_done=False,
             messages__isnull=False,
         ).distinct()
 
+        analyzed_ids = ContextChange.objects.values("conversation_id")
+        for conversation_id in conversations.filter(id__in=analyzed_ids).values_list(
+            "id", flat=True
+        ):
+            self.logger.info(
+                f"Context change analysis already exists for conversation ID: {conversation_id}, skipping."
+            )
+        conversations = conversations.exclude(id__in=analyzed_ids)
+
         if not conversations.exists():
             self.logger.info("No conversations found for analysis.")
             return
@@ -51,34 +79,18 @@ class Command(CustomBaseCommand):
 
         context_change_analyses = []
         context_analyzed_conversation_ids = set()
-        for conversation in conversations:
-            if ContextChange.objects.filter(conversation_id=conversation.id).exists():
-                self.logger.info(
-                    f"Context change analysis already exists for conversation ID: {conversation.id}, skipping."
-                )
-                continue
 
+        runner = ConcurrentAIRunner(service, concurrency=options["concurrency"])
+        for (conversation, _), results, error in runner.map(
+            lambda item: service.context_change_analysis(item[1]),
+            iter_conversation_transcripts(conversations),
+        ):
             self.logger.info(f"Analyzing conversation ID: {conversation.id}")
-
-            messages = ChatMessage.objects.filter(
-                conversation_id=conversation.id,
-            ).order_by("created_at")
-
-            if not messages:
-                self.logger.info(
-                    f"No messages found for conversation ID: {conversation.id}. Skipping."
-                )
+            if error:
+                self.logger.error(f"An error occurred: {str(error)}")
                 continue
 
-            text = "\n".join(
-                [
-                    f"{ChatMessageSerializer(message).data['sender_type']}: {ChatMessageSerializer(message).data['content']}"
-                    for message in messages
-                ]
-            )
-
             try:
-                results = service.context_change_analysis(text)
                 overall_context, topics, context_changes = results
 
                 if overall_context or topics:
@@ -120,5 +132,9 @@ class Command(CustomBaseCommand):
             self.logger.info(
                 f"Updated {len(context_analyzed_conversation_ids)} conversations as context analyzed."
             )
+        invalidate_conversations(
+            analysis.conversation_id for analysis in context_change_analyses
+        )
 
         self.logger.info("Context change analysis completed.")
+        self.logger.info(f"AI response cache: {AIResponseCache.stats()}")
@@ -2,9 +2,15 @@ from analyze.utils.engine_types import EngineType
 from analyze.utils.openai_service import OpenAIService
 from analyze.utils.replicate_service import ReplicateService
 from analyze.utils.claude_service import ClaudeService
-from chat.models.conversation import Conversation, ChatMessage
-from chat.serializers.conversation import ChatMessageSerializer
+from analyze.utils.ai_runner import ConcurrentAIRunner
+from analyze.utils.ai_response_cache import AIResponseCache
+from chat.models.conversation import Conversation
+from chat.utils.transcript import iter_conversation_transcripts
 from common.base.base_command import CustomBaseCommand
+from common.utils.bulk_update_buffer import BulkUpdateBuffer
+from chat.utils.conversation_updates import conversations_analyzed
+
+from django.conf import settings
 
 
 class Command(CustomBaseCommand):
@@ -19,6 +25,24 @@ class Command(CustomBaseCommand):
             default=EngineType.ANTHROPIC_CLAUDE.value,
             help="The AI service engine to test (default: claude).",
         )
+        parser.add_argument(
+            "--no_cache",
+            action="store_true",
+            default=False,
+            help="Send every request to the AI service instead of using cached responses.",
+        )
+        parser.add_argument(
+            "--save_batch_size",
+            type=int,
+            default=settings.ANALYSIS_SAVE_BATCH_SIZE,
+            help="Number of analyzed conversations saved per bulk update.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=None,
+            help="Number of concurrent AI requests (default: AI_SERVICE_CONCURRENCY).",
+        )
 
     def process(self, *args, **options):
         engine = options["engine"].lower()
@@ -37,6 +61,10 @@ class Command(CustomBaseCommand):
             )
             return
 
+        if options["no_cache"]:
+            service.use_cache = False
+            self.logger.info("AI response cache is disabled.")
+
         conversations = Conversation.objects.filter(
             title__isnull=True,
             messages__isnull=False,
@@ -46,37 +74,37 @@ class Command(CustomBaseCommand):
             return
         self.logger.info(f"Found {conversations.count()} conversations for analysis.")
 
-        for conversation in conversations:
-            self.logger.info(f"Analyzing conversation ID: {conversation.id}")
-            try:
-                messages = ChatMessage.objects.filter(
-                    conversation_id=conversation.id,
-                ).order_by("created_at")
-                if not messages:
-                    self.logger.error(
-                        f"No messages found for conversation ID: {conversation.id}"
-                    )
+        runner = ConcurrentAIRunner(service, concurrency=options["concurrency"])
+        with BulkUpdateBuffer(
+            Conversation,
+            batch_size=options["save_batch_size"],
+            logger=self.logger,
+            on_flush=conversations_analyzed,
+        ) as buffer:
+            for (conversation, _), result, error in runner.map(
+                lambda item: service.get_conversation_title(item[1]),
+                iter_conversation_transcripts(conversations),
+            ):
+                self.logger.info(f"Analyzing conversation ID: {conversation.id}")
+                if error:
+                    self.logger.error(f"An error occurred: {str(error)}")
                     continue
-                text = "\n".join(
-                    [
-                        f"{ChatMessageSerializer(message).data['sender_type']}: {ChatMessageSerializer(message).data['content']}"
-                        for message in messages
-                    ]
-                )
-                title, details = service.get_conversation_title(text)
-                if title and details:
-                    self.logger.info(f"Title: {title}")
-                    self.logger.info(f"Details: {details}")
-                    conversation.title = title
-                    conversation.save()
-                    self.logger.info(
-                        f"Conversation ID {conversation.id} analyzed successfully."
-                    )
-                else:
-                    self.logger.error(
-                        f"AI Service return format is wrong: {title} - {details}"
-                    )
-            except Exception as e:
-                self.logger.error(f"An error occurred: {str(e)}")
+                try:
+                    title, details = result
+                    if title and details:
+                        self.logger.info(f"Title: {title}")
+                        self.logger.info(f"Details: {details}")
+                        conversation.title = title
+                        buffer.add(conversation, ["title"])
+                        self.logger.info(
+                            f"Conversation ID {conversation.id} analyzed successfully."
+                        )
+                    else:
+                        self.logger.error(
+                            f"AI Service return format is wrong: {title} - {details}"
+                        )
+                except Exception as e:
+                    self.logger.error(f"An error occurred: {str(e)}")
 
         self.logger.info("Title extraction completed.")
+        self.logger.info(f"AI response cache: {AIResponseCache.stats()}")
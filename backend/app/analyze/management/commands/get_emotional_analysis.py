@@ -2,8 +2,9 @@ from analyze.utils.engine_types import EngineType
 from analyze.utils.openai_service import OpenAIService
 from analyze.utils.replicate_service import ReplicateService
 from analyze.utils.claude_service import ClaudeService
-from chat.models.conversation import Conversation, ChatMessage
-from chat.serializers.conversation import ChatMessageSerializer
+from analyze.utils.ai_response_cache import AIResponseCache
+from chat.models.conversation import Conversation
+from chat.utils.transcript import iter_conversation_transcripts
 from common.base.base_command import CustomBaseCommand
 
 
@@ -19,6 +20,12 @@ class Command(CustomBaseCommand):
             default=EngineType.OPENAI.value,
             help="The AI service engine to test (default: openai).",
         )
+        parser.add_argument(
+            "--no_cache",
+            action="store_true",
+            default=False,
+            help="Send every request to the AI service instead of using cached responses.",
+        )
 
     def process(self, *args, **options):
         engine = options["engine"].lower()
@@ -37,6 +44,10 @@ class Command(CustomBaseCommand):
             )
             return
 
+        if options["no_cache"]:
+            service.use_cache = False
+            self.logger.info("AI response cache is disabled.")
+
         conversations = Conversation.objects.filter(
             # analysis_result__isnull=True,
             messages__isnull=False,
@@ -54,23 +65,9 @@ class Command(CustomBaseCommand):
             "neutral": 0,
         }
 
-        for conversation in conversations:
+        for conversation, text in iter_conversation_transcripts(conversations):
             self.logger.info(f"Analyzing conversation ID: {conversation.id}")
             try:
-                messages = ChatMessage.objects.filter(
-                    conversation_id=conversation.id,
-                ).order_by("created_at")
-                if not messages:
-                    self.logger.error(
-                        f"No messages found for conversation ID: {conversation.id}"
-                    )
-                    continue
-                text = "\n".join(
-                    [
-                        f"{ChatMessageSerializer(message).data['sender_type']}: {ChatMessageSerializer(message).data['content']}"
-                        for message in messages
-                    ]
-                )
                 emotion, details = service.label_analysis(text, emotional_counts.keys())
                 if emotion and details:
                     self.logger.info(f"Emotion: {emotion}")
@@ -90,3 +87,4 @@ class Command(CustomBaseCommand):
                 self.logger.error(f"An error occurred: {str(e)}")
 
         self.logger.info(f"Emotional analysis completed. Counts: {emotional_counts}")
+        self.logger.info(f"AI response cache: {AIResponseCache.stats()}")
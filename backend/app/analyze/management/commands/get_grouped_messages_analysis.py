@@ -2,7 +2,9 @@ from analyze.utils.engine_types import EngineType
 from analyze.utils.openai_service import OpenAIService
 from analyze.utils.replicate_service import ReplicateService
 from analyze.utils.claude_service import ClaudeService
+from analyze.utils.ai_response_cache import AIResponseCache
 from analyze.models.statistics import GroupedMessages
+from common.utils.response_cache import invalidate_agents
 from common.base.base_command import CustomBaseCommand
 
 
@@ -18,6 +20,12 @@ class Command(CustomBaseCommand):
             default=EngineType.OPENAI.value,
             help="The AI service engine to test (default: openai).",
         )
+        parser.add_argument(
+            "--no_cache",
+            action="store_true",
+            default=False,
+            help="Send every request to the AI service instead of using cached responses.",
+        )
         parser.add_argument(
             "--ids",
             nargs="+",
@@ -42,6 +50,10 @@ class Command(CustomBaseCommand):
             )
             return
 
+        if options["no_cache"]:
+            service.use_cache = False
+            self.logger.info("AI response cache is disabled.")
+
         grouped_messages = GroupedMessages.objects.all()
         if options.get("ids"):
             grouped_messages = grouped_messages.filter(id__in=options["ids"])
@@ -106,6 +118,7 @@ class Command(CustomBaseCommand):
 
                 grouped_message.messages = messages
                 grouped_message.save()
+                invalidate_agents([grouped_message.agent_id])
                 self.logger.info(
                     f"Grouped Message ID {grouped_message.id} analyzed successfully."
                 )
@@ -113,3 +126,4 @@ class Command(CustomBaseCommand):
                 self.logger.error(f"An error occurred: {str(e)}")
 
         self.logger.info(f"Grouped message analysis completed. Counts: {topic_counts}")
+        self.logger.info(f"AI response cache: {AIResponseCache.stats()}")
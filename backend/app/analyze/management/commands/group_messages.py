@@ -1,7 +1,9 @@
 from common.base.base_command import CustomBaseCommand
 from analyze.utils.search_helper import get_grouped_messages
+from analyze.utils.qdrant_service import QDrantService
 from analyze.models.statistics import GroupedMessages
 from common.models.connection import Agent
+from common.utils.response_cache import invalidate_agents
 from chat.models.conversation import ChatMessage
 import traceback
 
@@ -66,6 +68,7 @@ class Command(CustomBaseCommand):
                         agent_id=agent_id,
                         messages=data,
                     )
+                    invalidate_agents([agent_id])
                     self.logger.info(
                         f"Agent: {agent_id} - Grouped messages created successfully."
                     )
@@ -87,4 +90,5 @@ class Command(CustomBaseCommand):
         # if grouped_messages:
         #     GroupedMessages.objects.bulk_create(grouped_messages)
         #     self.logger.info(f"Created {len(grouped_messages)} grouped messages.")
+        self.logger.info(f"QDrant connection pool: {QDrantService.pool_stats()}")
         self.logger.info("Command finished.")
@@ -2,10 +2,15 @@ from analyze.utils.engine_types import EngineType
 from analyze.utils.openai_service import OpenAIService
 from analyze.utils.replicate_service import ReplicateService
 from analyze.utils.claude_service import ClaudeService
-from chat.models.conversation import Conversation, ChatMessage
-from chat.serializers.conversation import ChatMessageSerializer
+from analyze.utils.ai_response_cache import AIResponseCache
+from chat.models.conversation import Conversation
+from chat.utils.transcript import iter_conversation_transcripts
 from common.models.connection import Agent
 from common.base.base_command import CustomBaseCommand
+from common.utils.bulk_update_buffer import BulkUpdateBuffer
+from chat.utils.conversation_updates import conversations_analyzed
+
+from django.conf import settings
 
 
 class Command(CustomBaseCommand):
@@ -20,6 +25,18 @@ class Command(CustomBaseCommand):
             default=EngineType.OPENAI.value,
             help="The AI service engine to test (default: openai).",
         )
+        parser.add_argument(
+            "--no_cache",
+            action="store_true",
+            default=False,
+            help="Send every request to the AI service instead of using cached responses.",
+        )
+        parser.add_argument(
+            "--save_batch_size",
+            type=int,
+            default=settings.ANALYSIS_SAVE_BATCH_SIZE,
+            help="Number of analyzed conversations saved per bulk update.",
+        )
         parser.add_argument(
             "--agent_id",
             type=str,
@@ -51,6 +68,10 @@ class Command(CustomBaseCommand):
             )
             return
 
+        if options["no_cache"]:
+            service.use_cache = False
+            self.logger.info("AI response cache is disabled.")
+
         agent_id = options["agent_id"]
         if not agent_id:
             self.logger.error("Agent ID is required.")
@@ -85,44 +106,39 @@ class Command(CustomBaseCommand):
 
         label_counts = {label.lower(): 0 for label in agent.label_choices}
 
-        for conversation in conversations:
-            self.logger.info(f"Analyzing conversation ID: {conversation.id}")
-            try:
-                messages = ChatMessage.objects.filter(
-                    conversation_id=conversation.id,
-                ).order_by("created_at")
-                if not messages:
-                    self.logger.error(
-                        f"No messages found for conversation ID: {conversation.id}"
-                    )
-                    continue
-                text = "\n".join(
-                    [
-                        f"{ChatMessageSerializer(message).data['sender_type']}: {ChatMessageSerializer(message).data['content']}"
-                        for message in messages
-                    ]
-                )
-                labels = "/".join(agent.label_choices)
-                labels_str = f"<{labels}>"
-                label, details = service.label_analysis(text, labels_str)
-                if label and details:
-                    if label not in agent.label_choices:
-                        label = "Other"
-                    self.logger.info("AI Service is reachable and working correctly.")
-                    self.logger.info(f"Label: {label}")
-                    self.logger.info(f"Details: {details}")
-                    conversation.label = label
-                    # conversation.label_details = f"{engine}: {details}"
-                    conversation.save()
-                    self.logger.info(
-                        f"Conversation ID {conversation.id} analyzed successfully."
-                    )
-                    label_counts[label.lower()] += 1
-                else:
-                    self.logger.error(
-                        f"AI Service return format is wrong: {label} - {details}"
-                    )
-            except Exception as e:
-                self.logger.error(f"An error occurred: {str(e)}")
+        with BulkUpdateBuffer(
+            Conversation,
+            batch_size=options["save_batch_size"],
+            logger=self.logger,
+            on_flush=conversations_analyzed,
+        ) as buffer:
+            for conversation, text in iter_conversation_transcripts(conversations):
+                self.logger.info(f"Analyzing conversation ID: {conversation.id}")
+                try:
+                    labels = "/".join(agent.label_choices)
+                    labels_str = f"<{labels}>"
+                    label, details = service.label_analysis(text, labels_str)
+                    if label and details:
+                        if label not in agent.label_choices:
+                            label = "Other"
+                        self.logger.info(
+                            "AI Service is reachable and working correctly."
+                        )
+                        self.logger.info(f"Label: {label}")
+                        self.logger.info(f"Details: {details}")
+                        conversation.label = label
+                        # conversation.label_details = f"{engine}: {details}"
+                        buffer.add(conversation, ["label"])
+                        self.logger.info(
+                            f"Conversation ID {conversation.id} analyzed successfully."
+                        )
+                        label_counts[label.lower()] += 1
+                    else:
+                        self.logger.error(
+                            f"AI Service return format is wrong: {label} - {details}"
+                        )
+                except Exception as e:
+                    self.logger.error(f"An error occurred: {str(e)}")
 
         self.logger.info(f"Label analysis completed. Counts: {label_counts}")
+        self.logger.info(f"AI response cache: {AIResponseCache.stats()}")
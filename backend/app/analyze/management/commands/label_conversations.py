@@ -2,10 +2,16 @@ from analyze.utils.engine_types import EngineType
 from analyze.utils.openai_service import OpenAIService
 from analyze.utils.replicate_service import ReplicateService
 from analyze.utils.claude_service import ClaudeService
-from chat.models.conversation import Conversation, ChatMessage
-from chat.serializers.conversation import ChatMessageSerializer
+from analyze.utils.ai_runner import ConcurrentAIRunner
+from analyze.utils.ai_response_cache import AIResponseCache
+from chat.models.conversation import Conversation
+from chat.utils.transcript import iter_conversation_transcripts
 from common.models.connection import Agent
 from common.base.base_command import CustomBaseCommand
+from common.utils.bulk_update_buffer import BulkUpdateBuffer
+from chat.utils.conversation_updates import conversations_analyzed
+
+from django.conf import settings
 
 
 class Command(CustomBaseCommand):
@@ -20,6 +26,18 @@ class Command(CustomBaseCommand):
             default=EngineType.OPENAI.value,
             help="The AI service engine to test (default: openai).",
         )
+        parser.add_argument(
+            "--no_cache",
+            action="store_true",
+            default=False,
+            help="Send every request to the AI service instead of using cached responses.",
+        )
+        parser.add_argument(
+            "--save_batch_size",
+            type=int,
+            default=settings.ANALYSIS_SAVE_BATCH_SIZE,
+            help="Number of analyzed conversations saved per bulk update.",
+        )
 
         parser.add_argument(
             "--all",
@@ -27,6 +45,12 @@ class Command(CustomBaseCommand):
             default=False,
             help="Whether to label all conversations (default: False).",
         )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=None,
+            help="Number of concurrent AI requests (default: AI_SERVICE_CONCURRENCY).",
+        )
 
     def process(self, *args, **options):
         engine = options["engine"].lower()
@@ -45,6 +69,10 @@ class Command(CustomBaseCommand):
             )
             return
 
+        if options["no_cache"]:
+            service.use_cache = False
+            self.logger.info("AI response cache is disabled.")
+
         agents = Agent.objects.filter(label_choices__isnull=False).distinct()
         agents = [agent for agent in agents if agent.label_choices]
 
@@ -52,6 +80,7 @@ class Command(CustomBaseCommand):
             self.logger.error("No agents found with label choices.")
             return
 
+        runner = ConcurrentAIRunner(service, concurrency=options["concurrency"])
         results = {}
         for agent in agents:
             self.logger.info(f"Found agent with ID: {agent.id}")
@@ -76,50 +105,50 @@ class Command(CustomBaseCommand):
 
             label_counts = {label.lower(): 0 for label in agent.label_choices}
 
-            for conversation in conversations:
-                self.logger.info(f"Analyzing conversation ID: {conversation.id}")
-                try:
-                    messages = ChatMessage.objects.filter(
-                        conversation_id=conversation.id,
-                    ).order_by("created_at")
-                    if not messages:
-                        self.logger.error(
-                            f"No messages found for conversation ID: {conversation.id}"
-                        )
+            labels = "/".join(agent.label_choices)
+            self.logger.info(f"Labels: {labels}")
+            labels_str = f"<{labels}>"
+
+            with BulkUpdateBuffer(
+                Conversation,
+                batch_size=options["save_batch_size"],
+                logger=self.logger,
+                on_flush=conversations_analyzed,
+            ) as buffer:
+                for (conversation, _), result, error in runner.map(
+                    lambda item: service.label_analysis(item[1], labels_str),
+                    iter_conversation_transcripts(conversations),
+                ):
+                    self.logger.info(f"Analyzing conversation ID: {conversation.id}")
+                    if error:
+                        self.logger.error(f"An error occurred: {str(error)}")
                         continue
-                    text = "\n".join(
-                        [
-                            f"{ChatMessageSerializer(message).data['sender_type']}: {ChatMessageSerializer(message).data['content']}"
-                            for message in messages
-                        ]
-                    )
-                    labels = "/".join(agent.label_choices)
-                    self.logger.info(f"Labels: {labels}")
-                    labels_str = f"<{labels}>"
-                    label, details = service.label_analysis(text, labels_str)
-                    if label and details:
-                        self.logger.info(
-                            "AI Service is reachable and working correctly."
-                        )
-                        self.logger.info(f"Label: {label}")
-                        self.logger.info(f"Details: {details}")
-                        if label not in agent.label_choices:
-                            label = "Other"
-                        conversation.label = label
-                        # conversation.label_details = f"{engine}: {details}"
-                        conversation.save()
-                        self.logger.info(
-                            f"Conversation ID {conversation.id} analyzed successfully."
-                        )
-                        label_counts[label.lower()] += 1
-                    else:
-                        self.logger.error(
-                            f"AI Service return format is wrong: {label} - {details}"
-                        )
-                except Exception as e:
-                    self.logger.error(f"An error occurred: {str(e)}")
+                    try:
+                        label, details = result
+                        if label and details:
+                            self.logger.info(
+                                "AI Service is reachable and working correctly."
+                            )
+                            self.logger.info(f"Label: {label}")
+                            self.logger.info(f"Details: {details}")
+                            if label not in agent.label_choices:
+                                label = "Other"
+                            conversation.label = label
+                            # conversation.label_details = f"{engine}: {details}"
+                            buffer.add(conversation, ["label"])
+                            self.logger.info(
+                                f"Conversation ID {conversation.id} analyzed successfully."
+                            )
+                            label_counts[label.lower()] += 1
+                        else:
+                            self.logger.error(
+                                f"AI Service return format is wrong: {label} - {details}"
+                            )
+                    except Exception as e:
+                        self.logger.error(f"An error occurred: {str(e)}")
 
             self.logger.info(f"Label analysis completed. Counts: {label_counts}")
             results[agent.id] = label_counts
 
         self.logger.info(f"All agents processed. Results: {results}")
+        self.logger.info(f"AI response cache: {AIResponseCache.stats()}")
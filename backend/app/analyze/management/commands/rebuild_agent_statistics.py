@@ -0,0 +1,41 @@
+from common.base.base_command import CustomBaseCommand
+from common.models.connection import Agent
+from analyze.utils.agent_statistics import rebuild_agent_statistics
+
+
+class Command(CustomBaseCommand):
+    help = "Recompute the daily statistics rollups of agents"
+    command_name = "rebuild_agent_statistics"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--agent_ids",
+            nargs="+",
+            type=str,
+            default=None,
+            help="Agents to rebuild (default: all).",
+        )
+        parser.add_argument(
+            "--missing",
+            action="store_true",
+            default=False,
+            help="Only rebuild agents whose rollups were never built.",
+        )
+
+    def process(self, *args, **options):
+        agents = Agent.objects.all()
+        if options["agent_ids"]:
+            agents = agents.filter(id__in=options["agent_ids"])
+        if options["missing"]:
+            agents = agents.filter(statistics_built_at__isnull=True)
+        agent_ids = list(agents.values_list("id", flat=True))
+
+        for agent_id in agent_ids:
+            try:
+                row_count = rebuild_agent_statistics(agent_id)
+                self.logger.info(f"Agent {agent_id}: {row_count} daily rows written.")
+            except Exception as e:
+                self.logger.error(
+                    f"An error occurred while rebuilding agent {agent_id}: {str(e)}"
+                )
+        self.logger.info(f"Rebuilt statistics of {len(agent_ids)} agents.")
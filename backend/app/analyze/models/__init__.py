@@ -1,2 +1,3 @@
 from .log import *  # noqa: F401, F403
 from .statistics import *  # noqa: F401, F403
+from .cache import *  # noqa: F401, F403
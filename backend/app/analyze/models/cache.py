@@ -0,0 +1,38 @@
+from django.db import models
+from analyze.utils.engine_types import EngineType
+
+
+class AIResponseCacheEntry(models.Model):
+    """
+    Cached successful AI service response, keyed by the hash of the request.
+    """
+
+    key = models.CharField(max_length=64, unique=True)
+    service_engine = models.CharField(
+        max_length=50,
+        choices=EngineType.choices(),
+        default=EngineType.OPENAI,
+    )
+    response_payload = models.JSONField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.service_engine} - {self.key} - {self.created_at}"
+
+
+class EmbeddingCacheEntry(models.Model):
+    """
+    Cached embedding vector stored as float32 bytes, keyed by the hash of the
+    model, dimensions and normalized text.
+    """
+
+    key = models.CharField(max_length=64, unique=True)
+    model = models.CharField(max_length=100)
+    dimensions = models.PositiveIntegerField()
+    vector = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.model} - {self.key}"
@@ -18,3 +18,34 @@ class ContextChange(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+
+class AgentDailyStatistics(models.Model):
+    """
+    Per agent, per day (UTC) rollup of the agent dashboard statistics.
+    Conversations and sentiment/label counts are bucketed by the conversation
+    created_at, messages by the message created_at (saved_at when missing).
+    Maintained by analyze.utils.agent_statistics.
+    """
+
+    agent_id = models.CharField(max_length=255)
+    date = models.DateField()
+
+    conversation_count = models.PositiveIntegerField(default=0)
+    message_count = models.PositiveIntegerField(default=0)
+    super_positive_count = models.PositiveIntegerField(default=0)
+    positive_count = models.PositiveIntegerField(default=0)
+    neutral_count = models.PositiveIntegerField(default=0)
+    negative_count = models.PositiveIntegerField(default=0)
+    super_negative_count = models.PositiveIntegerField(default=0)
+    label_counts = models.JSONField(default=dict, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["agent_id", "date"],
+                name="agent_daily_statistics_unique",
+            ),
+        ]
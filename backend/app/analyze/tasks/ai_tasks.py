@@ -118,3 +118,25 @@ def get_context_change_analysis_task():
         )
     )
     return True
+
+
+@shared_task
+def rebuild_missing_agent_statistics_task():
+    """
+    Task to build the daily statistics rollups of agents that have none yet,
+    their detail statistics are aggregated live until then.
+    """
+
+    log = Log(task_name="Rebuild Agent Statistics", category=Log.Category.ANALYTICS)
+    log.save()
+    try:
+        management.call_command("rebuild_agent_statistics", missing=True)
+    except Exception as e:
+        log.complete_task_error(
+            "Error during agent statistics rebuild: {}".format(str(e))
+        )
+    now = datetime.now()
+    log.complete_task(
+        "Rebuilt agent statistics {}".format(now.strftime("%m/%d/%Y, %H:%M"))
+    )
+    return True
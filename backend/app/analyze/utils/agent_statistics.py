@@ -0,0 +1,328 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone as django_timezone
+from django.db.models.functions import Coalesce, TruncDate
+
+from analyze.models.statistics import AgentDailyStatistics
+from chat.models.conversation import ChatMessage, Conversation
+from common.models.connection import Agent
+
+# Conversation.analysis_result value -> statistics field
+SENTIMENT_FIELDS = {
+    "SUPER_POSITIVE": "super_positive_count",
+    "POSITIVE": "positive_count",
+    "NEUTRAL": "neutral_count",
+    "NEGATIVE": "negative_count",
+    "SUPER_NEGATIVE": "super_negative_count",
+}
+SENTIMENT_WEIGHTS = {
+    "super_positive_count": 5,
+    "positive_count": 4,
+    "neutral_count": 3,
+    "negative_count": 2,
+    "super_negative_count": 1,
+}
+COUNT_FIELDS = ["conversation_count", "message_count", *SENTIMENT_WEIGHTS]
+
+
+def bucket_day():
+    # Rows without created_at (e.g. file imports) count on the day they were saved.
+    return TruncDate(Coalesce("created_at", "saved_at"), tzinfo=timezone.utc)
+
+
+def sentiment_aggregates():
+    return {
+        field: Count("id", filter=Q(analysis_result=sentiment))
+        for sentiment, field in SENTIMENT_FIELDS.items()
+    }
+
+
+def conversation_days(conversation_ids, include_messages=True, batch_size=1000):
+    """
+    Find the agent days whose rollups depend on the given conversations,
+    through the conversations themselves or their messages.
+    :param include_messages: Also collect the days of the messages, not
+        needed when only conversation fields changed.
+    :return: Set of (agent_id, date) tuples
+    """
+    conversation_ids = list(dict.fromkeys(conversation_ids))
+    days = set()
+    for start in range(0, len(conversation_ids), batch_size):
+        batch = conversation_ids[start : start + batch_size]
+        days.update(
+            Conversation.objects.filter(id__in=batch, agent_id__isnull=False)
+            .annotate(day=bucket_day())
+            .values_list("agent_id", "day")
+            .distinct()
+        )
+        if include_messages:
+            days.update(
+                ChatMessage.objects.filter(
+                    conversation_id__in=batch,
+                    conversation__agent_id__isnull=False,
+                )
+                .annotate(day=bucket_day())
+                .values_list("conversation__agent_id", "day")
+                .distinct()
+            )
+    return days
+
+
+def day_ranges(dates):
+    """
+    Merge dates into contiguous [start, end) UTC datetime ranges.
+    """
+    ranges = []
+    for day in sorted(dates):
+        start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = start + timedelta(days=1)
+        else:
+            ranges.append([start, start + timedelta(days=1)])
+    return ranges
+
+
+def bucket_filter(dates):
+    """
+    Rows bucketed on one of dates, as created_at and saved_at ranges the
+    indexes can serve instead of a filter on bucket_day().
+    """
+    query = Q(pk__in=[])
+    for start, end in day_ranges(dates):
+        query |= Q(created_at__gte=start, created_at__lt=end)
+        query |= Q(created_at__isnull=True, saved_at__gte=start, saved_at__lt=end)
+    return query
+
+
+def empty_day():
+    return {**dict.fromkeys(COUNT_FIELDS, 0), "label_counts": {}}
+
+
+def conversation_statistics(agent_id, dates=None):
+    """
+    Conversation, sentiment and label counts of an agent per day.
+    :param dates: Days to compute, None for all
+    :return: Dict of date -> dict of statistics fields
+    """
+    conversations = Conversation.objects.filter(agent_id=agent_id)
+    if dates is not None:
+        conversations = conversations.filter(bucket_filter(dates))
+    conversations = conversations.annotate(day=bucket_day()).values("day")
+
+    days = defaultdict(empty_day)
+    for row in conversations.annotate(
+        conversation_count=Count("id"),
+        **sentiment_aggregates(),
+    ):
+        days[row.pop("day")].update(row)
+    for row in (
+        conversations.filter(label__isnull=False)
+        .values("day", "label")
+        .annotate(count=Count("id"))
+    ):
+        days[row["day"]]["label_counts"][row["label"]] = row["count"]
+    return days
+
+
+def message_counts(agent_id, dates=None):
+    """
+    Message counts of an agent per day.
+    :param dates: Days to compute, None for all
+    :return: Dict of date -> count
+    """
+    messages = ChatMessage.objects.filter(conversation__agent_id=agent_id)
+    if dates is not None:
+        messages = messages.filter(bucket_filter(dates))
+    return dict(
+        messages.annotate(day=bucket_day())
+        .values("day")
+        .annotate(count=Count("id"))
+        .values_list("day", "count")
+    )
+
+
+def compute_agent_days(agent_id, dates=None):
+    """
+    Compute the rollup rows of an agent from the source tables.
+    :param dates: Days to compute, None for all
+    :return: Dict of date -> dict of statistics fields
+    """
+    days = conversation_statistics(agent_id, dates)
+    for day, count in message_counts(agent_id, dates).items():
+        days[day]["message_count"] = count
+    return days
+
+
+def refresh_agent_statistics(agent_days, include_messages=True):
+    """
+    Recompute the rollup rows of the given agent days. Only those days are
+    aggregated, days left without conversations and messages lose their row.
+    :param agent_days: Iterable of (agent_id, date) tuples
+    :param include_messages: Recount messages as well. Without it only the
+        conversation fields are rewritten (e.g. after analysis), messages
+        are only counted for days that have no row yet.
+    :return: Number of written rows
+    """
+    dates_by_agent = defaultdict(set)
+    for agent_id, day in agent_days:
+        dates_by_agent[agent_id].add(day)
+
+    update_fields = [*COUNT_FIELDS, "label_counts", "updated_at"]
+    if not include_messages:
+        update_fields.remove("message_count")
+
+    written = 0
+    for agent_id, dates in dates_by_agent.items():
+        if include_messages:
+            computed = compute_agent_days(agent_id, dates)
+        else:
+            computed = conversation_statistics(agent_id, dates)
+            new_dates = dates - set(
+                AgentDailyStatistics.objects.filter(
+                    agent_id=agent_id,
+                    date__in=dates,
+                ).values_list("date", flat=True)
+            )
+            if new_dates:
+                for day, count in message_counts(agent_id, new_dates).items():
+                    computed[day]["message_count"] = count
+        rows = [
+            AgentDailyStatistics(agent_id=agent_id, date=day, **computed[day])
+            for day in dates
+            if day in computed
+        ]
+        if include_messages:
+            AgentDailyStatistics.objects.filter(
+                agent_id=agent_id,
+                date__in=dates,
+            ).exclude(date__in=[row.date for row in rows]).delete()
+        if rows:
+            AgentDailyStatistics.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=["agent_id", "date"],
+                update_fields=update_fields,
+            )
+        written += len(rows)
+    return written
+
+
+def refresh_conversation_statistics(conversation_ids, include_messages=True):
+    """
+    Refresh the rollups affected by ingested or analyzed conversations.
+    :param include_messages: False when only conversation fields changed.
+    """
+    return refresh_agent_statistics(
+        conversation_days(conversation_ids, include_messages),
+        include_messages=include_messages,
+    )
+
+
+def rebuild_agent_statistics(agent_id):
+    """
+    Replace every rollup row of an agent with freshly computed ones and
+    mark the agent, its statistics are read from the rollups from then on.
+    :return: Number of written rows
+    """
+    computed = compute_agent_days(agent_id)
+    with transaction.atomic():
+        AgentDailyStatistics.objects.filter(agent_id=agent_id).delete()
+        AgentDailyStatistics.objects.bulk_create(
+            [
+                AgentDailyStatistics(agent_id=agent_id, date=day, **values)
+                for day, values in computed.items()
+            ],
+            batch_size=1000,
+        )
+        Agent.objects.filter(id=agent_id).update(
+            statistics_built_at=django_timezone.now()
+        )
+    return len(computed)
+
+
+def statistics_date_range(filter_queries):
+    """
+    Map AgentDetailView filters to a day range the rollups can answer.
+    Only created_at__gte and created_at__lt bounds at UTC midnight are
+    supported, other filters need the source tables.
+    :return: (start, end) dates, either may be None, or None if unsupported
+    """
+    bounds = {"created_at__gte": None, "created_at__lt": None}
+    for key, value in filter_queries.items():
+        if key not in bounds:
+            return None
+        value = value.astimezone(timezone.utc)
+        if value.time() != time.min:
+            return None
+        bounds[key] = value.date()
+    return bounds["created_at__gte"], bounds["created_at__lt"]
+
+
+def with_sentiment_score(statistics):
+    total = sum(statistics[field] for field in SENTIMENT_WEIGHTS)
+    statistics["total_sentiment_count"] = total
+    statistics["sentiment_score"] = (
+        sum(statistics[field] * weight for field, weight in SENTIMENT_WEIGHTS.items())
+        / total
+        if total > 0
+        else 0.0
+    )
+    return statistics
+
+
+def sum_agent_statistics(agent_id, start=None, end=None):
+    """
+    Agent dashboard statistics summed from the rollup rows of a day range.
+    :param start: First day (inclusive), None for the beginning
+    :param end: Last day (exclusive), None for no limit
+    """
+    rows = AgentDailyStatistics.objects.filter(agent_id=agent_id)
+    if start:
+        rows = rows.filter(date__gte=start)
+    if end:
+        rows = rows.filter(date__lt=end)
+
+    totals = rows.aggregate(**{field: Sum(field) for field in COUNT_FIELDS})
+    label_counts = defaultdict(int)
+    for counts in rows.values_list("label_counts", flat=True):
+        for label, count in counts.items():
+            label_counts[label] += count
+
+    statistics = {
+        "total_conversations": totals.pop("conversation_count") or 0,
+        "total_messages": totals.pop("message_count") or 0,
+        **{field: value or 0 for field, value in totals.items()},
+        "label_counts": dict(label_counts),
+    }
+    return with_sentiment_score(statistics)
+
+
+def live_agent_statistics(agent_id, filter_queries):
+    """
+    Agent dashboard statistics aggregated from the source tables, used for
+    filters the rollups cannot answer.
+    """
+    conversations = Conversation.objects.filter(agent_id=agent_id, **filter_queries)
+    chat_messages = ChatMessage.objects.filter(
+        conversation__in=conversations,
+        **filter_queries,
+    )
+    counts = conversations.aggregate(
+        total_conversations=Count("id"),
+        **sentiment_aggregates(),
+    )
+    label_counts = dict(
+        conversations.filter(label__isnull=False)
+        .values("label")
+        .annotate(count=Count("id"))
+        .values_list("label", "count")
+    )
+    statistics = {
+        "total_messages": chat_messages.count(),
+        **counts,
+        "label_counts": label_counts,
+    }
+    return with_sentiment_score(statistics)
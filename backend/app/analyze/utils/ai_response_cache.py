@@ -0,0 +1,112 @@
+import hashlib
+import json
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+from analyze.models.cache import AIResponseCacheEntry
+
+# Expired and surplus entries are removed once every CULL_INTERVAL writes.
+CULL_INTERVAL = 100
+
+
+class AIResponseCache:
+    """
+    Persistent cache of successful AI service responses.
+    Entries are keyed by the hash of the engine, endpoint and request payload
+    (model, prompt and parameters), expire after AI_RESPONSE_CACHE_TTL seconds
+    and the oldest entries are evicted above AI_RESPONSE_CACHE_MAX_ENTRIES.
+    Hit and miss counters are kept per process.
+    """
+
+    hits = 0
+    misses = 0
+    writes = 0
+    lock = threading.Lock()
+
+    @staticmethod
+    def make_key(engine, endpoint, data):
+        raw = json.dumps(
+            {"engine": engine, "endpoint": endpoint, "data": data},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def get(cls, key):
+        """
+        :return: The cached response payload, or None on a miss.
+        """
+        entry = (
+            AIResponseCacheEntry.objects.filter(
+                key=key,
+                expires_at__gt=timezone.now(),
+            )
+            .values_list("id", "response_payload")
+            .first()
+        )
+        with cls.lock:
+            if entry is None:
+                cls.misses += 1
+                return None
+            cls.hits += 1
+        AIResponseCacheEntry.objects.filter(id=entry[0]).update(hits=F("hits") + 1)
+        return entry[1]
+
+    @classmethod
+    def set(cls, key, engine, response_payload):
+        expires_at = timezone.now() + timedelta(seconds=settings.AI_RESPONSE_CACHE_TTL)
+        try:
+            AIResponseCacheEntry.objects.update_or_create(
+                key=key,
+                defaults={
+                    "service_engine": engine,
+                    "response_payload": response_payload,
+                    "expires_at": expires_at,
+                },
+            )
+        except IntegrityError:
+            # Another worker stored the same request concurrently.
+            pass
+
+        with cls.lock:
+            cls.writes += 1
+            cull = cls.writes % CULL_INTERVAL == 1
+        if cull:
+            cls.cull()
+
+    @staticmethod
+    def delete(key):
+        AIResponseCacheEntry.objects.filter(key=key).delete()
+
+    @classmethod
+    def cull(cls):
+        """
+        Deletes expired entries and the oldest entries above the size limit.
+        """
+        AIResponseCacheEntry.objects.filter(expires_at__lte=timezone.now()).delete()
+        surplus = (
+            AIResponseCacheEntry.objects.count() - settings.AI_RESPONSE_CACHE_MAX_ENTRIES
+        )
+        if surplus > 0:
+            oldest_ids = list(
+                AIResponseCacheEntry.objects.order_by("created_at").values_list(
+                    "id", flat=True
+                )[:surplus]
+            )
+            AIResponseCacheEntry.objects.filter(id__in=oldest_ids).delete()
+
+    @classmethod
+    def stats(cls):
+        with cls.lock:
+            total = cls.hits + cls.misses
+            return {
+                "hits": cls.hits,
+                "misses": cls.misses,
+                "hit_rate": round(cls.hits / total, 3) if total else 0.0,
+            }
@@ -0,0 +1,63 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+from common.utils.rate_limiter import get_rate_limiter
+from .ai_service import AIService
+
+
+class ConcurrentAIRunner:
+    """
+    Runs AI service calls in a bounded thread pool.
+    Requests sent by the service share the per engine rate limit configured
+    in AI_SERVICE_RATE_LIMITS, cache hits are not throttled, and results are
+    returned in input order.
+    """
+
+    def __init__(self, service: AIService, concurrency: int = None):
+        self.service = service
+        self.concurrency = max(concurrency or settings.AI_SERVICE_CONCURRENCY, 1)
+        engine = service.engine.value
+        limits = settings.AI_SERVICE_RATE_LIMITS.get(engine, {})
+        service.rate_limiter = get_rate_limiter(
+            f"ai_service:{engine}",
+            requests_per_minute=limits.get("requests_per_minute"),
+            tokens_per_minute=limits.get("tokens_per_minute"),
+        )
+
+    def call(self, func, item):
+        try:
+            return func(item)
+        finally:
+            # Worker threads open their own DB connection for service logs.
+            connections.close_all()
+
+    def map(self, func, items):
+        """
+        Applies func to every item concurrently.
+        Items are consumed lazily and at most 2 * concurrency calls are in
+        flight, so building an item (e.g. loading a transcript) stays in the
+        calling thread and memory stays bounded.
+        :param func: Callable doing the AI request for one item.
+        :param items: Iterable of items.
+        :return: Generator of (item, result, error) tuples in input order;
+            error is the raised exception or None.
+        """
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for item in items:
+                pending.append((item, executor.submit(self.call, func, item)))
+                if len(pending) >= self.concurrency * 2:
+                    yield self.collect(*pending.popleft())
+
+            while pending:
+                yield self.collect(*pending.popleft())
+
+    @staticmethod
+    def collect(item, future):
+        try:
+            return item, future.result(), None
+        except Exception as e:
+            return item, None, e
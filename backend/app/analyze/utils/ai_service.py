@@ -1,10 +1,56 @@
+import functools
+import json
+import threading
 import requests
 
 from django.conf import settings
 from analyze.models.log import AIServiceLog
+from common.utils.service_log_sink import service_log_sink
+from .ai_response_cache import AIResponseCache
 from .engine_types import EngineType
 
 
+COMBINED_ANALYSIS_FACETS = ("title", "sentiment", "label", "context")
+
+
+def estimate_tokens(text: str):
+    """
+    Rough token estimate (~4 characters per token) used for rate limiting.
+    """
+    return len(text) // 4 + 1
+
+
+def cache_on_success(method):
+    """
+    Defers the AIResponseCache writes of an analysis method until it returns.
+    Answers failing the parse or format check of the method are not cached,
+    and cached answers failing it are evicted, so a retry asks the model
+    again.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        pending = self.pending_cache
+        if getattr(pending, "writes", None) is not None:
+            # Nested analysis call, the outer one decides.
+            return method(self, *args, **kwargs)
+        pending.writes, pending.hits = [], []
+        try:
+            result = method(self, *args, **kwargs)
+        except Exception:
+            for key in pending.hits:
+                AIResponseCache.delete(key)
+            raise
+        else:
+            for key, payload in pending.writes:
+                AIResponseCache.set(key, self.engine.value, payload)
+            return result
+        finally:
+            pending.writes = pending.hits = None
+
+    return wrapper
+
+
 class AIService:
     """
     Base class for AI services.
@@ -14,17 +60,29 @@ class AIService:
     bearer_token = None
     base_url = None
     headers = {}
+    log_policy = "ai"
+    # Cache writes and hits of the analysis running in each thread.
+    pending_cache = threading.local()
+    # Set by ConcurrentAIRunner, acquired only for requests missing the cache.
+    rate_limiter = None
 
     def __init__(self, engine: EngineType, endpoint: str):
+        self.engine = engine
         self.base_url = f"{settings.AI_SERVICE_URL}{engine.value}/{endpoint}"
         self.bearer_token = settings.AI_SERVICE_TOKEN
         self.headers = {
             "Authorization": f"Bearer {self.bearer_token}",
             "Content-Type": "application/json",
         }
+        self.use_cache = settings.AI_RESPONSE_CACHE_ENABLED
+
+    def post(self, data):
+        if self.rate_limiter:
+            self.rate_limiter.acquire(estimate_tokens(json.dumps(data)))
+        return requests.post(self.base_url, headers=self.headers, json=data)
 
-    def send_request_with_logging(self, data):
-        response = requests.post(self.base_url, headers=self.headers, json=data)
+    def send_request_with_logging(self, data, raw=False, cache_key=None):
+        response = self.post(data)
 
         if response.status_code not in [200, 201]:
             try:
@@ -32,36 +90,74 @@ class AIService:
             except ValueError:
                 return response.text
 
-        return self.parse_response(response.json())
+        payload = response.json()
+        if cache_key:
+            self.cache_response(cache_key, payload)
+        if raw:
+            return payload
+        return self.parse_response(payload)
+
+    def cache_response(self, cache_key, payload):
+        """
+        Stores a successful response, inside a cache_on_success method only
+        once the method returned.
+        """
+        writes = getattr(self.pending_cache, "writes", None)
+        if writes is None:
+            AIResponseCache.set(cache_key, self.engine.value, payload)
+        else:
+            writes.append((cache_key, payload))
+
+    def send_request(self, data, logging=True, raw=False):
+        """
+        Sends a request to the AI service.
+        Successful responses are cached by request hash unless use_cache is
+        False, see cache_on_success for analysis methods.
+        :param data: The JSON payload.
+        :param logging: Whether to store an AIServiceLog for the call.
+        :param raw: Return the JSON body without passing it through parse_response.
+        """
+        cache_key = None
+        if self.use_cache:
+            cache_key = AIResponseCache.make_key(self.engine.value, self.base_url, data)
+            cached = AIResponseCache.get(cache_key)
+            if cached is not None:
+                hits = getattr(self.pending_cache, "hits", None)
+                if hits is not None:
+                    hits.append(cache_key)
+                return cached if raw else self.parse_response(cached)
 
-    def send_request(self, data, logging=True):
         if not logging:
-            return self.send_request_with_logging(data)
+            return self.send_request_with_logging(data, raw=raw, cache_key=cache_key)
 
-        log = AIServiceLog.objects.create(
+        response = self.post(data)
+        log = AIServiceLog(
             service_engine=self.engine,
             request_payload=data,
             endpoint=self.base_url,
             http_method="POST",
-            status=AIServiceLog.PENDING,
+            status_code=response.status_code,
         )
-        response = requests.post(self.base_url, headers=self.headers, json=data)
 
         if response.status_code not in [200, 201]:
             log.status = AIServiceLog.ERROR
-            log.status_code = response.status_code
             try:
                 log.response_payload = response.json()
             except ValueError:
                 log.response_payload = response.text
-            log.save()
+            service_log_sink.submit(log, policy=self.log_policy)
             return response
 
         log.status = AIServiceLog.SUCCESS
-        log.status_code = response.status_code
-        log.response_payload = response.json()
-        log.save()
-        return self.parse_response(response.json())
+        payload = response.json()
+        log.response_payload = payload
+        # The log policy replaces log.response_payload with a summary.
+        service_log_sink.submit(log, policy=self.log_policy)
+        if cache_key:
+            self.cache_response(cache_key, payload)
+        if raw:
+            return payload
+        return self.parse_response(payload)
 
     def parse_response(self, response):
         """
@@ -104,3 +200,120 @@ class AIService:
         This method should be implemented by subclasses.
         """
         raise NotImplementedError("Subclasses must implement this method.")
+
+    def combined_analysis(
+        self,
+        conversation_messages: str,
+        labels: list = None,
+        facets=COMBINED_ANALYSIS_FACETS,
+    ):
+        """
+        Performs title, sentiment, label and context change analysis in a single request.
+        This method should be implemented by subclasses.
+        """
+        raise NotImplementedError("Subclasses must implement this method.")
+
+    def build_combined_analysis_prompt(
+        self,
+        conversation_messages: str,
+        labels: list = None,
+        facets=COMBINED_ANALYSIS_FACETS,
+    ):
+        """
+        Builds one prompt asking for all requested facets, so the transcript is
+        sent once instead of once per analysis.
+        :param conversation_messages: The conversation transcript.
+        :param labels: Label choices of the agent, required for the label facet.
+        :param facets: Facets to request, a subset of COMBINED_ANALYSIS_FACETS.
+        :return: The prompt string.
+        """
+        if not conversation_messages:
+            raise ValueError("No conversation messages provided for combined analysis.")
+        if "label" in facets and not labels:
+            facets = [facet for facet in facets if facet != "label"]
+        if not facets:
+            raise ValueError("No facets requested for combined analysis.")
+
+        tasks = []
+        fields = []
+        if "title" in facets:
+            tasks.append(
+                "Create a concise, descriptive title that summarizes the main topic or purpose of the conversation, "
+                "in the language of the user's messages."
+            )
+            fields += [
+                '  "title": "<concise and descriptive title in the language of the messages up to 25 characters>"',
+                '  "title_details": "<brief explanation of the title>"',
+            ]
+        if "sentiment" in facets:
+            tasks.append(
+                "Analyze the sentiment of the user's messages and summarize their emotional state."
+            )
+            fields += [
+                '  "sentiment": "<SUPER_POSITIVE/POSITIVE/NEUTRAL/NEGATIVE/SUPER_NEGATIVE>"',
+                '  "sentiment_details": "<brief explanation of the sentiment>"',
+            ]
+        if "label" in facets:
+            tasks.append(
+                "Assign the most appropriate label from the following options: "
+                f"<{'/'.join(labels)}>"
+            )
+            fields += [
+                '  "label": "<assigned_label>"',
+                '  "label_details": "<brief explanation of the label>"',
+            ]
+        if "context" in facets:
+            tasks.append(
+                "Determine the overall context, the main topics discussed and where the context changed (if any)."
+            )
+            fields += [
+                '  "overall_context": "<brief summary of the overall context>"',
+                '  "topics": [{"topic": "<name of the topic>", "details": "<brief explanation of the topic>", '
+                '"start_message": "<index or content of the message where the topic starts>", '
+                '"end_message": "<index or content of the message where the topic ends>"}]',
+                '  "context_changes": [{"from_topic": "<name of the previous topic>", '
+                '"to_topic": "<name of the new topic>", '
+                '"change_message": "<index or content of the message where the context changed>", '
+                '"details": "<brief explanation of the context change>"}]',
+            ]
+
+        task_lines = "\n".join(
+            f"{index}. {task}" for index, task in enumerate(tasks, start=1)
+        )
+        return (
+            "Here is a conversation between an AI assistant and a user. "
+            "Focus on the user's messages and perform the following tasks:\n"
+            f"{task_lines}\n\n"
+            f"Conversation:\n{conversation_messages}\n\n"
+            "Respond only with JSON in the following format:\n"
+            "{\n" + ",\n".join(fields) + "\n}"
+        )
+
+    def parse_combined_analysis(self, response, facets=COMBINED_ANALYSIS_FACETS):
+        """
+        Parses the combined analysis response.
+        :return: A dict with the keys of the requested facets, missing keys are None.
+        """
+        if not isinstance(response, str):
+            raise ValueError(
+                f"Unexpected response from AI service for combined analysis: {response}"
+            )
+        if "json" in response:
+            response = response.replace("json", "").replace("```", "").strip()
+        parsed_response = json.loads(response)
+        if not isinstance(parsed_response, dict):
+            raise ValueError(
+                "Unexpected response format from AI service for combined analysis."
+            )
+
+        keys = {
+            "title": ("title", "title_details"),
+            "sentiment": ("sentiment", "sentiment_details"),
+            "label": ("label", "label_details"),
+            "context": ("overall_context", "topics", "context_changes"),
+        }
+        return {
+            key: parsed_response.get(key)
+            for facet in facets
+            for key in keys[facet]
+        }
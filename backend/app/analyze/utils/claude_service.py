@@ -1,5 +1,10 @@
 import json
-from .ai_service import AIService, EngineType
+from .ai_service import (
+    AIService,
+    EngineType,
+    COMBINED_ANALYSIS_FACETS,
+    cache_on_success,
+)
 
 
 class ClaudeService(AIService):
@@ -11,10 +16,10 @@ class ClaudeService(AIService):
         self.model = model
         self.max_tokens = max_tokens
 
-    def send_request(self, content):
+    def send_request(self, content, max_tokens=None):
         data = {
             "model": self.model,
-            "max_tokens": self.max_tokens,
+            "max_tokens": max_tokens or self.max_tokens,
             "messages": [
                 {
                     "role": "user",
@@ -42,6 +47,7 @@ class ClaudeService(AIService):
             print(f"Error parsing response: {e}")
         return response
 
+    @cache_on_success
     def sentimental_analysis(self, conversation_messages):
         """
         Performs sentiment analysis on the provided conversation messages using OpenAI's API.
@@ -75,6 +81,7 @@ class ClaudeService(AIService):
             "Unexpected response format from OpenAI API for sentiment analysis."
         )
 
+    @cache_on_success
     def label_analysis(self, conversation_messages: str, labels: str):
         """
         Performs label analysis on the provided conversation messages.
@@ -107,6 +114,7 @@ class ClaudeService(AIService):
             "Unexpected response format from OpenAI API for label analysis."
         )
 
+    @cache_on_success
     def get_conversation_title(self, conversation_messages):
         if not conversation_messages:
             raise ValueError("No conversation messages provided for title extraction.")
@@ -132,3 +140,24 @@ class ClaudeService(AIService):
         raise ValueError(
             "Unexpected response format from OpenAI API for title extraction."
         )
+
+    @cache_on_success
+    def combined_analysis(
+        self,
+        conversation_messages: str,
+        labels: list = None,
+        facets=COMBINED_ANALYSIS_FACETS,
+    ):
+        """
+        Performs the requested analyses with a single Claude request.
+        :param conversation_messages: The conversation messages to analyze.
+        :param labels: Label choices of the agent, the label facet is skipped without them.
+        :param facets: Facets to request, a subset of COMBINED_ANALYSIS_FACETS.
+        :return: A dict with the result of each facet.
+        """
+        prompt = self.build_combined_analysis_prompt(
+            conversation_messages, labels, facets
+        )
+        # Topics and context changes need more room than a single facet answer.
+        response = self.send_request(prompt, max_tokens=max(self.max_tokens, 4096))
+        return self.parse_combined_analysis(response, facets)
@@ -0,0 +1,109 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+
+from analyze.models.cache import EmbeddingCacheEntry
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+class EmbeddingCache:
+    """
+    Two tier cache of embedding vectors.
+    An in-process LRU holds the most recently used vectors as float32
+    arrays and the EmbeddingCacheEntry table keeps every vector as float32
+    bytes. Callers always get a fresh list of their own.
+    Keys are the hash of the model, dimensions and whitespace normalized text.
+    """
+
+    memory = OrderedDict()
+    lock = threading.Lock()
+    hits = 0
+    misses = 0
+
+    @staticmethod
+    def make_key(model, dimensions, text):
+        normalized = WHITESPACE_RE.sub(" ", text).strip()
+        raw = f"{model}:{dimensions}:{normalized}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def to_bytes(vector):
+        return np.asarray(vector, dtype=np.float32).tobytes()
+
+    @staticmethod
+    def from_bytes(data):
+        return np.frombuffer(bytes(data), dtype=np.float32)
+
+    @classmethod
+    def remember(cls, key, vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        with cls.lock:
+            cls.memory[key] = vector
+            cls.memory.move_to_end(key)
+            while len(cls.memory) > settings.EMBEDDING_CACHE_MEMORY_SIZE:
+                cls.memory.popitem(last=False)
+
+    @classmethod
+    def get_many(cls, keys):
+        """
+        :param keys: Cache keys.
+        :return: Dict of key to vector for the keys found in either tier.
+        """
+        found = {}
+        missing = []
+        with cls.lock:
+            for key in dict.fromkeys(keys):
+                if key in cls.memory:
+                    cls.memory.move_to_end(key)
+                    found[key] = cls.memory[key].tolist()
+                else:
+                    missing.append(key)
+
+        if missing:
+            for key, data in EmbeddingCacheEntry.objects.filter(
+                key__in=missing
+            ).values_list("key", "vector"):
+                vector = cls.from_bytes(data)
+                cls.remember(key, vector)
+                found[key] = vector.tolist()
+
+        with cls.lock:
+            cls.hits += len(found)
+            cls.misses += len(set(keys)) - len(found)
+        return found
+
+    @classmethod
+    def set_many(cls, model, dimensions, vectors):
+        """
+        :param vectors: Dict of key to vector.
+        """
+        if not vectors:
+            return
+        for key, vector in vectors.items():
+            cls.remember(key, vector)
+        EmbeddingCacheEntry.objects.bulk_create(
+            [
+                EmbeddingCacheEntry(
+                    key=key,
+                    model=model,
+                    dimensions=dimensions,
+                    vector=cls.to_bytes(vector),
+                )
+                for key, vector in vectors.items()
+            ],
+            ignore_conflicts=True,
+        )
+
+    @classmethod
+    def stats(cls):
+        with cls.lock:
+            return {
+                "hits": cls.hits,
+                "misses": cls.misses,
+                "memory_size": len(cls.memory),
+            }
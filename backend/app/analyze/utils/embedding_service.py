@@ -1,19 +1,31 @@
+from django.conf import settings
+
 from .ai_service import AIService, EngineType
+from .embedding_cache import EmbeddingCache
+
+# OpenAI rejects requests with more inputs than this, whatever the token count.
+MAX_INPUTS_PER_REQUEST = 2048
 
 
 class EmbeddingService(AIService):
     model = None
+    dimensions = 3072
+    log_policy = "embedding"
 
     def __init__(self, model: str = "text-embedding-3-large"):
         super().__init__(engine=EngineType.OPENAI, endpoint="v1/embeddings")
         self.model = model
+        # Vectors are large, they are stored in the EmbeddingCache instead of
+        # the AI response cache.
+        self.use_cache = False
+        self.use_embedding_cache = settings.EMBEDDING_CACHE_ENABLED
 
     def send_request(self, content, logging=True):
         data = {
             "model": self.model,
             "input": content,
             "endcoding_format": "float",
-            "dimensions": 3072,
+            "dimensions": self.dimensions,
         }
 
         return super().send_request(data, logging=logging)
@@ -25,30 +37,163 @@ class EmbeddingService(AIService):
             return None
         return response["data"][0]["embedding"]
 
-    def generate_embedding(self, messages, logging=True):
+    def send_batch_request(self, contents: list, logging=True):
+        """
+        Sends a single embeddings request for a list of inputs.
+        :param contents: The texts to embed.
+        :return: A list of vectors in the same order as contents, or None.
+        """
+        data = {
+            "model": self.model,
+            "input": contents,
+            "endcoding_format": "float",
+            "dimensions": self.dimensions,
+        }
+        response = self.parse_batch_response(
+            super().send_request(data, logging=logging, raw=True)
+        )
+        if not response or len(response) != len(contents):
+            return None
+        return response
+
+    def parse_batch_response(self, response):
+        """
+        Orders the vectors of a batch response by their input index.
+        :return: A list of vectors, or None when an item has no embedding or
+            the indexes are out of range, duplicated or missing.
+        """
+        if not isinstance(response, dict) or "data" not in response:
+            return None
+        vectors = [None] * len(response["data"])
+        for position, item in enumerate(response["data"]):
+            if "embedding" not in item:
+                return None
+            index = item.get("index", position)
+            if not isinstance(index, int) or not 0 <= index < len(vectors):
+                return None
+            if vectors[index] is not None:
+                return None
+            vectors[index] = item["embedding"]
+        if any(vector is None for vector in vectors):
+            return None
+        return vectors
+
+    @staticmethod
+    def estimate_tokens(content: str):
+        """
+        Rough token estimate (~4 characters per token) used to bound batch sizes.
+        """
+        return len(content) // 4 + 1
+
+    def iter_batches(self, messages, batch_size=None, max_tokens=None):
+        """
+        Splits messages into chunks bounded by both item count and estimated tokens.
+        """
+        batch_size = min(
+            batch_size or settings.EMBEDDING_BATCH_SIZE, MAX_INPUTS_PER_REQUEST
+        )
+        max_tokens = max_tokens or settings.EMBEDDING_BATCH_MAX_TOKENS
+
+        batch = []
+        batch_tokens = 0
+        for message in messages:
+            tokens = self.estimate_tokens(message["content"])
+            if batch and (
+                len(batch) >= batch_size or batch_tokens + tokens > max_tokens
+            ):
+                yield batch
+                batch = []
+                batch_tokens = 0
+            batch.append(message)
+            batch_tokens += tokens
+
+        if batch:
+            yield batch
+
+    def to_point(self, message, vector):
+        return {
+            "id": message["embedding_id"],
+            "payload": {
+                "content": message["content"],
+                "sender_type": message["sender_type"],
+                "conversation_id": message["conversation_id"],
+                "message_id": message["id"],
+            },
+            "vector": vector,
+        }
+
+    def cache_key(self, content: str):
+        return EmbeddingCache.make_key(self.model, self.dimensions, content)
+
+    def get_cached_vectors(self, keys):
+        if not self.use_embedding_cache:
+            return {}
+        return EmbeddingCache.get_many(keys)
+
+    def cache_vectors(self, vectors):
+        if self.use_embedding_cache:
+            EmbeddingCache.set_many(self.model, self.dimensions, vectors)
+
+    def generate_embedding(self, messages, logging=True, batch_size=None):
+        """
+        Generates Qdrant points for the given messages.
+        Cached vectors are reused and every distinct remaining text is embedded
+        once. Messages are embedded in batches, one request per batch; pass
+        batch_size=1 to fall back to one request per message.
+        :param messages: Dicts with embedding_id, content, sender_type, conversation_id and id.
+        :param batch_size: Maximum number of messages per embeddings request.
+        :return: A list of points, one per successfully embedded message.
+        """
         if not messages:
             raise ValueError("No messages provided for embedding generation.")
 
-        points = []
-        for message in messages:
-            response = self.send_request(message["content"], logging=logging)
-            if response:
-                points.append(
-                    {
-                        "id": message["embedding_id"],
-                        "payload": {
-                            "content": message["content"],
-                            "sender_type": message["sender_type"],
-                            "conversation_id": message["conversation_id"],
-                            "message_id": message["id"],
-                        },
-                        "vector": response,
-                    }
+        keys = [self.cache_key(message["content"]) for message in messages]
+        vectors = self.get_cached_vectors(keys)
+
+        pending = {}
+        for message, key in zip(messages, keys):
+            if key not in vectors and key not in pending:
+                pending[key] = message
+
+        if batch_size == 1:
+            for key, message in pending.items():
+                response = self.send_request(message["content"], logging=logging)
+                if isinstance(response, list):
+                    vectors[key] = response
+                    self.cache_vectors({key: response})
+        else:
+            for batch in self.iter_batches(
+                list(pending.values()), batch_size=batch_size
+            ):
+                response = self.send_batch_request(
+                    [message["content"] for message in batch],
+                    logging=logging,
                 )
-        return points
+                if not response:
+                    continue
+                embedded = {
+                    self.cache_key(message["content"]): vector
+                    for message, vector in zip(batch, response)
+                    if vector
+                }
+                vectors.update(embedded)
+                self.cache_vectors(embedded)
+
+        return [
+            self.to_point(message, vectors[key])
+            for message, key in zip(messages, keys)
+            if vectors.get(key)
+        ]
 
     def generate_query_vector(self, query: str):
+        key = self.cache_key(query)
+        cached = self.get_cached_vectors([key]).get(key)
+        if cached:
+            return cached
+
         response = self.send_request(query)
+        if isinstance(response, list):
+            self.cache_vectors({key: response})
         if response:
             return response
         return None
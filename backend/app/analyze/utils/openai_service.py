@@ -1,5 +1,10 @@
 import json
-from .ai_service import AIService, EngineType
+from .ai_service import (
+    AIService,
+    EngineType,
+    COMBINED_ANALYSIS_FACETS,
+    cache_on_success,
+)
 
 
 class OpenAIService(AIService):
@@ -48,6 +53,7 @@ class OpenAIService(AIService):
             print(f"Error parsing response: {e}")
         return response
 
+    @cache_on_success
     def sentimental_analysis(self, conversation_messages):
         """
         Performs sentiment analysis on the provided conversation messages using OpenAI's API.
@@ -82,6 +88,7 @@ class OpenAIService(AIService):
             "Unexpected response format from OpenAI API for sentiment analysis."
         )
 
+    @cache_on_success
     def label_analysis(self, conversation_messages: str, labels: str):
         """
         Performs label analysis on the provided conversation messages.
@@ -115,6 +122,7 @@ class OpenAIService(AIService):
             "Unexpected response format from OpenAI API for label analysis."
         )
 
+    @cache_on_success
     def context_change_analysis(self, conversation_messages):
         if not conversation_messages:
             raise ValueError(
@@ -174,6 +182,7 @@ class OpenAIService(AIService):
             "Unexpected response format from OpenAI API for label analysis."
         )
 
+    @cache_on_success
     def get_conversation_title(self, conversation_messages):
         if not conversation_messages:
             raise ValueError("No conversation messages provided for title extraction.")
@@ -200,6 +209,7 @@ class OpenAIService(AIService):
             "Unexpected response format from OpenAI API for title extraction."
         )
 
+    @cache_on_success
     def get_grouped_messages_analysis(self, messages):
         if not messages:
             raise ValueError("No messages provided for grouped analysis.")
@@ -233,3 +243,23 @@ class OpenAIService(AIService):
         raise ValueError(
             "Unexpected response format from OpenAI API for title extraction."
         )
+
+    @cache_on_success
+    def combined_analysis(
+        self,
+        conversation_messages: str,
+        labels: list = None,
+        facets=COMBINED_ANALYSIS_FACETS,
+    ):
+        """
+        Performs the requested analyses with a single OpenAI request.
+        :param conversation_messages: The conversation messages to analyze.
+        :param labels: Label choices of the agent, the label facet is skipped without them.
+        :param facets: Facets to request, a subset of COMBINED_ANALYSIS_FACETS.
+        :return: A dict with the result of each facet.
+        """
+        prompt = self.build_combined_analysis_prompt(
+            conversation_messages, labels, facets
+        )
+        response = self.send_request(prompt)
+        return self.parse_combined_analysis(response, facets)
@@ -0,0 +1,110 @@
+from django.db.models import F
+
+from analyze.utils.embedding_service import EmbeddingService
+from analyze.utils.qdrant_service import QDrantService
+from chat.models.conversation import ChatMessage
+
+
+def iter_unembedded_message_chunks(chunk_size: int):
+    """
+    Stream messages that are not yet embedded in Qdrant as bounded chunks.
+    Messages are read with a server side cursor, ordered by agent, so each chunk
+    belongs to a single agent and holds at most chunk_size messages.
+    :param chunk_size: Maximum number of messages per chunk.
+    :return: Generator of (agent_id, messages) tuples.
+    """
+    messages = (
+        ChatMessage.objects.filter(embedded_in_qdrant=False)
+        .values(
+            "embedding_id",
+            "sender_type",
+            "content",
+            "conversation_id",
+            "id",
+        )
+        .annotate(agent_id=F("conversation__agent_id"))
+        .order_by("conversation__agent_id", "-created_at")
+    )
+
+    chunk = []
+    agent_id = None
+    for message in messages.iterator(chunk_size=chunk_size):
+        if chunk and (message["agent_id"] != agent_id or len(chunk) >= chunk_size):
+            yield agent_id, chunk
+            chunk = []
+        agent_id = message["agent_id"]
+        chunk.append(message)
+
+    if chunk:
+        yield agent_id, chunk
+
+
+def ensure_collection(
+    qdrant_service: QDrantService,
+    agent_id: str,
+    known_collections: set,
+    logging=True,
+):
+    """
+    Create the agent collection if needed. Checked collections are remembered
+    in known_collections so every chunk does not pay for the existence check.
+    :return: True if the collection exists.
+    """
+    if agent_id in known_collections:
+        return True
+
+    if not qdrant_service.check_collection_exists(agent_id, logging=logging):
+        response = qdrant_service.create_collection(agent_id, logging=logging)
+        if not response:
+            return False
+
+    known_collections.add(agent_id)
+    return True
+
+
+def embed_message_chunk(
+    agent_id: str,
+    messages: list[dict],
+    qdrant_service: QDrantService,
+    embedding_service: EmbeddingService,
+    logger,
+    batch_size=None,
+    logging=True,
+):
+    """
+    Embed one chunk of messages and upsert the points into the agent collection.
+    :return: The embedding ids that were stored in Qdrant, or None on failure.
+    """
+    embedding_response = embedding_service.generate_embedding(
+        messages,
+        logging=logging,
+        batch_size=batch_size,
+    )
+    if not embedding_response:
+        logger.error(f"Embedding Service returned an error: {embedding_response}")
+        return None
+
+    qdrant_response = qdrant_service.add_messages_to_collection(
+        agent_id,
+        embedding_response,
+        logging=logging,
+    )
+    if not qdrant_response:
+        logger.error(
+            f"Failed to add messages to Qdrant collection {agent_id}: {qdrant_response}"
+        )
+        return None
+
+    return [point["id"] for point in embedding_response]
+
+
+def mark_messages_embedded(embedding_ids: list):
+    """
+    Persist the progress of a chunk.
+    :return: Number of updated messages.
+    """
+    if not embedding_ids:
+        return 0
+    return ChatMessage.objects.filter(embedding_id__in=embedding_ids).update(
+        embedded_in_qdrant=True
+    )
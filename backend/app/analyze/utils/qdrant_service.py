@@ -1,17 +1,25 @@
-import requests
+from collections import deque
 
 from django.conf import settings
 from analyze.models.log import QDrantServiceLog
+from common.utils.http_session import SharedSession
+from common.utils.service_log_sink import service_log_sink
 
 
 class QDrantService:
     """
     Base class for QDrant services.
+    All instances in a process share one keep-alive connection pool.
     """
 
     base_url = None
     headers = {}
     prefix = ""
+    shared_session = SharedSession(
+        pool_size=settings.QDRANT_POOL_SIZE,
+        max_retries=settings.QDRANT_MAX_RETRIES,
+        backoff_factor=settings.QDRANT_BACKOFF_FACTOR,
+    )
 
     def __init__(self):
         self.base_url = settings.QDRANT_SERVICE_URL
@@ -19,6 +27,14 @@ class QDrantService:
             "Content-Type": "application/json",
         }
         self.prefix = "chat_analyzer"
+        self.timeout = (settings.QDRANT_CONNECT_TIMEOUT, settings.QDRANT_READ_TIMEOUT)
+
+    @classmethod
+    def pool_stats(cls):
+        """
+        Statistics of the shared connection pool, used to size QDRANT_POOL_SIZE.
+        """
+        return cls.shared_session.stats()
 
     def parse_response(self, response):
         if "status" in response and response["status"] != "ok":
@@ -27,18 +43,20 @@ class QDrantService:
             return response["result"]
         return response
 
+    def http_request(self, endpoint, data, method):
+        return self.shared_session.get().request(
+            method,
+            endpoint,
+            headers=self.headers,
+            json=data if method in ["POST", "PUT"] else None,
+            timeout=self.timeout,
+        )
+
     def send_request_without_log(self, endpoint, data, method):
         if method not in ["GET", "PUT", "POST", "DELETE"]:
             return None
 
-        if method == "GET":
-            response = requests.get(endpoint, headers=self.headers)
-        elif method == "POST":
-            response = requests.post(endpoint, headers=self.headers, json=data)
-        elif method == "PUT":
-            response = requests.put(endpoint, headers=self.headers, json=data)
-        elif method == "DELETE":
-            response = requests.delete(endpoint, headers=self.headers)
+        response = self.http_request(endpoint, data, method)
 
         if response.status_code not in [200, 201]:
             try:
@@ -52,35 +70,26 @@ class QDrantService:
         if method not in ["GET", "PUT", "POST", "DELETE"]:
             return None
 
-        log = QDrantServiceLog.objects.create(
+        response = self.http_request(endpoint, data, method)
+        log = QDrantServiceLog(
             request_payload=data,
             endpoint=endpoint,
             http_method=method,
-            status=QDrantServiceLog.PENDING,
+            status_code=response.status_code,
         )
-        if method == "GET":
-            response = requests.get(endpoint, headers=self.headers)
-        elif method == "POST":
-            response = requests.post(endpoint, headers=self.headers, json=data)
-        elif method == "PUT":
-            response = requests.put(endpoint, headers=self.headers, json=data)
-        elif method == "DELETE":
-            response = requests.delete(endpoint, headers=self.headers)
 
         if response.status_code not in [200, 201]:
             log.status = QDrantServiceLog.ERROR
-            log.status_code = response.status_code
             try:
                 log.response_payload = response.json()
             except ValueError:
                 log.response_payload = response.text
-            log.save()
+            service_log_sink.submit(log, policy="qdrant")
             return response
 
         log.status = QDrantServiceLog.SUCCESS
-        log.status_code = response.status_code
         log.response_payload = response.json()
-        log.save()
+        service_log_sink.submit(log, policy="qdrant")
         return self.parse_response(response.json())
 
     def send_get_request(self, endpoint, logging=True):
@@ -200,50 +209,141 @@ class QDrantService:
             return response["points"]
         return response
 
-    def get_messages(self, collection_name, limit=1000, sender_type=None):
+    def scroll_messages(
+        self,
+        collection_name,
+        sender_type=None,
+        page_size=1000,
+        with_vector=True,
+        with_payload=True,
+        logging=True,
+    ):
+        """
+        Scrolls a whole collection, following next_page_offset.
+        :param collection_name: The agent collection (without prefix).
+        :param sender_type: Optional sender type filter.
+        :param page_size: Number of points per scroll request.
+        :param with_vector: True, False or a list of vector names to return.
+        :param with_payload: True, False or a list of payload keys to return.
+        :param logging: Whether to store a QDrantServiceLog per page.
+        :return: Generator of point lists, one per page.
+        """
         payload = {
-            "limit": limit,
-            "with_payload": True,
-            "with_vector": True,
+            "limit": page_size,
+            "with_payload": with_payload,
+            "with_vector": with_vector,
         }
 
         if sender_type:
-            payload = {
-                "filter": {
-                    "must": {"key": "sender_type", "match": {"value": sender_type}}
-                }
+            payload["filter"] = {
+                "must": [
+                    {"key": "sender_type", "match": {"value": sender_type}},
+                ],
             }
 
-        response = self.send_post_request(
-            f"{self.base_url}/collections/{self.prefix}_{collection_name}/points/scroll",
-            payload,
-        )
-        if "points" in response:
-            return response["points"]
+        offset = None
+        while True:
+            if offset is not None:
+                payload["offset"] = offset
+            response = self.send_post_request(
+                f"{self.base_url}/collections/{self.prefix}_{collection_name}/points/scroll",
+                payload,
+                logging=logging,
+            )
+            if not isinstance(response, dict) or "points" not in response:
+                raise ValueError(f"QDrant scroll failed: {response}")
 
-        return response
+            if response["points"]:
+                yield response["points"]
+
+            offset = response.get("next_page_offset")
+            if offset is None:
+                return
+
+    def get_messages(
+        self,
+        collection_name,
+        limit=1000,
+        sender_type=None,
+        with_vector=True,
+        with_payload=True,
+    ):
+        """
+        Returns every point of a collection, scrolled in pages of `limit` points.
+        Prefer scroll_messages to keep memory bounded on large collections.
+        """
+        try:
+            return [
+                point
+                for page in self.scroll_messages(
+                    collection_name,
+                    sender_type=sender_type,
+                    page_size=limit,
+                    with_vector=with_vector,
+                    with_payload=with_payload,
+                )
+                for point in page
+            ]
+        except ValueError as e:
+            return str(e)
 
     def get_message(self, collection_name, message_id):
         return self.send_get_request(
             f"{self.base_url}/collections/{self.prefix}_{collection_name}/points/{message_id}"
         )
 
-    def get_messages_in_batch(self, collection_name, message_id):
-        response = self.send_post_request(
-            f"{self.base_url}/collections/{self.prefix}_{collection_name}/points/query/batch",
-            {
-                "searches": [
-                    {"query": {"nearest": "05e5b568-8ff4-419a-b943-09361c35c13f"}},
-                    {
-                        "filter": {
-                            "must": {"key": "sender_type", "match": {"value": "user"}}
-                        },
-                        # "score_threshold": 0.5,
-                    },
-                ]
-            },
-        )
-        return response
+    def get_messages_in_batch(
+        self,
+        collection_name,
+        queries,
+        limit=10,
+        sender_type=None,
+        with_payload=True,
+        score_threshold=0.5,
+        batch_size=None,
+    ):
+        """
+        Runs one nearest neighbour search per query, sending batch_size searches
+        per /points/query/batch call instead of one request per query.
+        :param collection_name: The agent collection (without prefix).
+        :param queries: Point ids or vectors to search with.
+        :param limit: Maximum number of points per search.
+        :param sender_type: Optional sender type filter.
+        :param with_payload: Whether to return point payloads.
+        :param score_threshold: Minimum similarity score.
+        :param batch_size: Number of searches per request.
+        :return: A list of point lists, in the same order as queries.
+        """
+        batch_size = batch_size or settings.QDRANT_QUERY_BATCH_SIZE
+        queries = list(queries)
+
+        search = {
+            "with_payload": with_payload,
+            "limit": limit,
+            "score_threshold": score_threshold,
+        }
+        if sender_type:
+            search["filter"] = {
+                "must": [
+                    {"key": "sender_type", "match": {"value": sender_type}},
+                ],
+            }
+
+        results = []
+        for start in range(0, len(queries), batch_size):
+            searches = [
+                {**search, "query": query}
+                for query in queries[start : start + batch_size]
+            ]
+            response = self.send_post_request(
+                f"{self.base_url}/collections/{self.prefix}_{collection_name}/points/query/batch",
+                {"searches": searches},
+            )
+            if not isinstance(response, list):
+                raise ValueError(f"QDrant batch query failed: {response}")
+            results.extend(item.get("points", []) for item in response)
+
+        return results
 
     def get_messages_with_similarity(
         self,
@@ -252,16 +352,16 @@ class QDrantService:
         sender_type=None,
         with_payload=True,
     ):
+        message_ids = list(message_ids)
         message_details = {}
-        for message_id in message_ids:
-            points = self.get_messages_with_query(
-                collection_name,
-                message_id,
-                limit=10,
-                sender_type=sender_type,
-                with_payload=with_payload,
-            )
-
+        batch_points = self.get_messages_in_batch(
+            collection_name,
+            message_ids,
+            limit=10,
+            sender_type=sender_type,
+            with_payload=with_payload,
+        )
+        for message_id, points in zip(message_ids, batch_points):
             for point in points:
                 message_details.setdefault(
                     message_id,
@@ -294,20 +394,20 @@ class QDrantService:
         message_ids,
         sender_type=None,
     ):
+        message_ids = list(message_ids)
         message_details = {}
         visited = set()
         clusters = []
 
-        for message_id in message_ids:
-            points = self.get_messages_with_query(
-                collection_name,
-                query=message_id,
-                limit=10,
-                sender_type=sender_type,
-                with_payload=False,
-                score_threshold=0.65,
-            )
-
+        batch_points = self.get_messages_in_batch(
+            collection_name,
+            message_ids,
+            limit=10,
+            sender_type=sender_type,
+            with_payload=False,
+            score_threshold=0.65,
+        )
+        for message_id, points in zip(message_ids, batch_points):
             for point in points:
                 message_details.setdefault(
                     message_id,
@@ -326,10 +426,10 @@ class QDrantService:
 
             # Create a new cluster
             cluster = {"ids": set(), "total_score": 0}
-            queue = [current_id]
+            queue = deque([current_id])
 
             while queue:
-                point_id = queue.pop(0)
+                point_id = queue.popleft()
                 if point_id in visited:
                     continue
 
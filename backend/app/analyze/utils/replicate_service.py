@@ -1,4 +1,4 @@
-from .ai_service import AIService, EngineType
+from .ai_service import AIService, EngineType, cache_on_success
 
 
 class ReplicateService(AIService):
@@ -36,6 +36,7 @@ class ReplicateService(AIService):
             return {"error": response.get("error")}
         return response
 
+    @cache_on_success
     def sentimental_analysis(self, chat_messages: str):
         """
         Performs sentiment analysis on the provided text using the Replicate service.
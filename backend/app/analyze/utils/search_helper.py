@@ -1,6 +1,7 @@
 from analyze.utils.qdrant_service import QDrantService
 from analyze.utils.embedding_service import EmbeddingService
 from analyze.utils.openai_service import OpenAIService
+from analyze.utils import vector_clustering
 from chat.models.conversation import ChatMessage
 
 
@@ -49,17 +50,20 @@ def get_grouped_messages(
     if not service.check_collection_exists(agent_id):
         return False, "QDrant collection does not exist"
 
+    # Only embedded messages can be used as queries, an unknown point id fails the batch.
     messages = ChatMessage.objects.filter(
         conversation__agent_id=agent_id,
         sender_type=sender_type,
+        embedded_in_qdrant=True,
     )
     embed_id_to_messages = {msg.embedding_id: msg for msg in messages}
-    message_ids = messages.values_list("embedding_id", flat=True)
+    message_ids = list(embed_id_to_messages.keys())
 
     if len(message_ids) < 2:
         return False, "Not enough messages found"
 
-    response = service.get_grouped_messages(
+    response = vector_clustering.get_grouped_messages(
+        service,
         agent_id,
         message_ids,
         sender_type,
@@ -0,0 +1,175 @@
+import numpy as np
+
+from django.conf import settings
+
+from analyze.utils.qdrant_service import QDrantService
+
+
+def load_collection_vectors(
+    service: QDrantService,
+    collection_name: str,
+    sender_type: str = None,
+    page_size: int = 1000,
+):
+    """
+    Scroll an agent collection once and load its vectors into a matrix.
+    Pages are converted to float32 as they arrive, so the raw JSON of only one
+    page is held in memory at a time.
+    :param service: QDrantService instance.
+    :param collection_name: The agent collection (without prefix).
+    :param sender_type: Optional sender type filter.
+    :param page_size: Number of points per scroll request.
+    :return: A tuple of (point ids, float32 matrix with one row per point).
+    """
+    ids = []
+    pages = []
+    # Scroll responses carry full vectors, they are not stored in the service log.
+    for points in service.scroll_messages(
+        collection_name,
+        sender_type=sender_type,
+        page_size=page_size,
+        with_vector=True,
+        with_payload=False,
+        logging=False,
+    ):
+        ids.extend(point["id"] for point in points)
+        pages.append(
+            np.asarray([point["vector"] for point in points], dtype=np.float32)
+        )
+
+    if not pages:
+        return ids, np.empty((0, 0), dtype=np.float32)
+    return ids, np.vstack(pages)
+
+
+class UnionFind:
+    """
+    Disjoint set with path halving and union by size.
+    """
+
+    def __init__(self, size):
+        self.parent = np.arange(size)
+        self.size = np.ones(size, dtype=np.int64)
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, first, second):
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return
+        if self.size[first] < self.size[second]:
+            first, second = second, first
+        self.parent[second] = first
+        self.size[first] += self.size[second]
+
+
+def cluster_vectors(
+    ids,
+    matrix,
+    query_ids=None,
+    limit=10,
+    score_threshold=0.65,
+    block_size=None,
+):
+    """
+    Group similar points without any per point network call.
+    For every query point the top `limit` neighbours (itself excluded) with a
+    cosine similarity of at least score_threshold are linked, the same edges
+    the per message Qdrant search produced. Clusters are the connected
+    components of that graph.
+    :param ids: Point ids, one per matrix row.
+    :param matrix: Vectors, one row per point.
+    :param query_ids: Ids whose neighbours are searched (default: all points).
+    :param limit: Number of neighbours per point.
+    :param score_threshold: Minimum cosine similarity for an edge.
+    :param block_size: Number of rows multiplied at once, bounds memory to
+        block_size * len(ids) floats.
+    :return: Clusters with more than one point, as dicts with "ids" (set) and
+        "total_score" (sum of the neighbour scores of its query points), sorted
+        by total_score descending.
+    """
+    block_size = block_size or settings.QDRANT_CLUSTER_BLOCK_SIZE
+    count = len(ids)
+    if count < 2:
+        return []
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    normalized = matrix / norms
+
+    if query_ids is None:
+        rows = np.arange(count)
+    else:
+        index_of = {point_id: index for index, point_id in enumerate(ids)}
+        rows = np.array(
+            [index_of[point_id] for point_id in query_ids if point_id in index_of],
+            dtype=np.int64,
+        )
+
+    k = min(limit, count - 1)
+    union_find = UnionFind(count)
+    total_scores = np.zeros(count, dtype=np.float64)
+    linked = np.zeros(count, dtype=bool)
+
+    for start in range(0, len(rows), block_size):
+        block_rows = rows[start : start + block_size]
+        similarities = normalized[block_rows] @ normalized.T
+        similarities[np.arange(len(block_rows)), block_rows] = -np.inf
+
+        neighbours = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(similarities, neighbours, axis=1)
+
+        for row, row_neighbours, row_scores in zip(block_rows, neighbours, scores):
+            mask = row_scores >= score_threshold
+            if not mask.any():
+                continue
+            total_scores[row] = float(row_scores[mask].sum())
+            linked[row] = True
+            for neighbour in row_neighbours[mask]:
+                linked[neighbour] = True
+                union_find.union(row, neighbour)
+
+    clusters = {}
+    for index in np.flatnonzero(linked):
+        root = union_find.find(index)
+        cluster = clusters.setdefault(root, {"ids": set(), "total_score": 0.0})
+        cluster["ids"].add(ids[index])
+        cluster["total_score"] += float(total_scores[index])
+
+    return sorted(
+        (cluster for cluster in clusters.values() if len(cluster["ids"]) > 1),
+        key=lambda cluster: cluster["total_score"],
+        reverse=True,
+    )
+
+
+def get_grouped_messages(
+    service: QDrantService,
+    collection_name: str,
+    message_ids=None,
+    sender_type: str = None,
+    limit=10,
+    score_threshold=0.65,
+):
+    """
+    Local replacement for QDrantService.get_grouped_messages: one scroll of
+    the collection, then clustering in memory.
+    :return: Clusters in the QDrantService.get_grouped_messages format.
+    """
+    ids, matrix = load_collection_vectors(
+        service,
+        collection_name,
+        sender_type=sender_type,
+    )
+    return cluster_vectors(
+        ids,
+        matrix,
+        query_ids=message_ids,
+        limit=limit,
+        score_threshold=score_threshold,
+    )
@@ -1,10 +1,15 @@
-from common.base.base_api_view import BaseListAPIView, BaseAPIView, ResponseStatus
+from common.base.base_api_view import (
+    BaseListAPIView,
+    BaseAPIView,
+    CachedResponseMixin,
+    ResponseStatus,
+)
 from analyze.models.statistics import ContextChange
 from analyze.serializers.ai import ContextChangeSerializer
 from chat.models.conversation import Conversation
 
 
-class ContextChangeListView(BaseListAPIView):
+class ContextChangeListView(CachedResponseMixin, BaseListAPIView):
     serializer_class = ContextChangeSerializer
 
     def get_queryset(self):
@@ -20,7 +25,7 @@ class ContextChangeListView(BaseListAPIView):
         return queryset.order_by("-created_at")
 
 
-class ContextChangeDetailView(BaseAPIView):
+class ContextChangeDetailView(CachedResponseMixin, BaseAPIView):
     def get_request(self, request, *args, **kwargs):
         conversation_id = kwargs.get("conversation_id")
         if not conversation_id:
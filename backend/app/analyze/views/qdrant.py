@@ -1,4 +1,5 @@
-from common.base.base_api_view import BaseAPIView, ResponseStatus
+from common.base.base_api_view import BaseAPIView, CachedResponseMixin, ResponseStatus
+from common.utils.response_cache import agent_scope
 from analyze.utils.search_helper import search_agent_with_qdrant, get_grouped_messages
 from analyze.models.statistics import GroupedMessages
 from common.models.connection import Agent
@@ -42,7 +43,10 @@ class QDrantSearchView(BaseAPIView):
         return ResponseStatus.SUCCESS, data
 
 
-class QDrantGroupedView(BaseAPIView):
+class QDrantGroupedView(CachedResponseMixin, BaseAPIView):
+    def get_cache_scopes(self, request, *args, **kwargs):
+        return [agent_scope(kwargs.get("agent_id"))]
+
     def get_request(self, request, *args, **kwargs):
         agent_id = kwargs.get("agent_id")
         if not agent_id:
@@ -0,0 +1,43 @@
+from common.base.base_command import CustomBaseCommand
+from chat.models.conversation import Conversation
+from chat.utils.last_message import refresh_last_messages
+
+
+class Command(CustomBaseCommand):
+    help = "Fill the denormalized last_message fields of conversations"
+    command_name = "backfill_last_messages"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch_size",
+            type=int,
+            default=500,
+            help="Number of conversations updated per statement.",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            default=False,
+            help="Refresh every conversation, not only those without last_message_at.",
+        )
+
+    def process(self, *args, **options):
+        queryset = Conversation.objects.all()
+        if not options["all"]:
+            queryset = queryset.filter(last_message_at__isnull=True)
+
+        batch_size = max(options["batch_size"], 1)
+        conversation_ids = []
+        updated_count = 0
+        for conversation_id in queryset.values_list("id", flat=True).iterator(
+            chunk_size=batch_size
+        ):
+            conversation_ids.append(conversation_id)
+            if len(conversation_ids) >= batch_size:
+                updated_count += refresh_last_messages(conversation_ids, batch_size)
+                conversation_ids = []
+                self.logger.info(f"{updated_count} conversations updated so far.")
+
+        if conversation_ids:
+            updated_count += refresh_last_messages(conversation_ids, batch_size)
+        self.logger.info(f"Backfilled last message of {updated_count} conversations.")
@@ -0,0 +1,172 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import F
+
+from common.base.base_command import CustomBaseCommand
+from common.constants.sources import SOURCE_FILE
+from common.models.connection import Agent
+from chat.models.conversation import ChatMessage, Conversation
+
+EXECUTION_TIME = re.compile(r"Execution Time: ([\d.]+) ms")
+
+
+class Command(CustomBaseCommand):
+    help = (
+        "Print the query plans of the hot Conversation and ChatMessage queries. "
+        "With --compare the plans are also taken without the model indexes, "
+        "inside a rolled back transaction that locks the tables meanwhile."
+    )
+    command_name = "explain_hot_queries"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            default=False,
+            help="Run the queries (EXPLAIN ANALYZE) to get actual timings.",
+        )
+        parser.add_argument(
+            "--compare",
+            action="store_true",
+            default=False,
+            help="Also explain every query with the model indexes dropped.",
+        )
+        parser.add_argument(
+            "--agent_id",
+            type=str,
+            default=None,
+            help="Agent used by the per agent queries (default: the first agent).",
+        )
+
+    def hot_queries(self, agent_id, user_id, conversation_id, embedding_id):
+        """
+        The querysets of the analysis backlogs, the Qdrant pipeline, grouping
+        and the conversation endpoints.
+        :return: List of (name, queryset) tuples.
+        """
+        with_messages = Conversation.objects.filter(messages__isnull=False)
+        return [
+            (
+                "sentiment_backlog",
+                with_messages.filter(analysis_result__isnull=True).distinct(),
+            ),
+            ("title_backlog", with_messages.filter(title__isnull=True).distinct()),
+            (
+                "label_backlog",
+                with_messages.filter(agent_id=agent_id, label__isnull=True).distinct(),
+            ),
+            (
+                "context_backlog",
+                with_messages.filter(context_analysis_done=False).distinct(),
+            ),
+            (
+                "agent_conversations",
+                Conversation.objects.filter(agent_id=agent_id).order_by("-created_at")[
+                    :50
+                ],
+            ),
+            (
+                "conversation_page",
+                Conversation.objects.filter(user_id=user_id).order_by(
+                    F("created_at").desc(nulls_last=True), "-id"
+                )[:50],
+            ),
+            (
+                "file_conversations",
+                Conversation.objects.filter(user_id=user_id, source=SOURCE_FILE),
+            ),
+            (
+                "transcript",
+                ChatMessage.objects.filter(conversation_id=conversation_id).order_by(
+                    "created_at"
+                ),
+            ),
+            (
+                "qdrant_backlog",
+                ChatMessage.objects.filter(embedded_in_qdrant=False).order_by(
+                    "conversation__agent_id", "-created_at"
+                )[:500],
+            ),
+            (
+                "embedding_lookup",
+                ChatMessage.objects.filter(embedding_id__in=[embedding_id]),
+            ),
+            (
+                "grouped_messages",
+                ChatMessage.objects.filter(
+                    conversation__agent_id=agent_id,
+                    sender_type=ChatMessage.SENDER_TYPE_USER,
+                    embedded_in_qdrant=True,
+                ),
+            ),
+        ]
+
+    def explain(self, queries, analyze):
+        plans = {}
+        for name, queryset in queries:
+            plans[name] = queryset.explain(analyze=analyze)
+        return plans
+
+    def explain_without_indexes(self, queries, analyze):
+        index_names = [
+            index.name
+            for model in (Conversation, ChatMessage)
+            for index in model._meta.indexes
+        ]
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for index_name in index_names:
+                    cursor.execute(f'DROP INDEX IF EXISTS "{index_name}"')
+            plans = self.explain(queries, analyze)
+            # The indexes come back on rollback.
+            transaction.set_rollback(True)
+        return plans
+
+    @staticmethod
+    def summarize(plan):
+        scans = "seq scan" if "Seq Scan" in plan else "index"
+        timing = EXECUTION_TIME.search(plan)
+        return f"{scans}, {timing.group(1)} ms" if timing else scans
+
+    def process(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.logger.error("Query plans are only supported on PostgreSQL.")
+            return
+
+        agent = Agent.objects.filter(
+            **({"id": options["agent_id"]} if options["agent_id"] else {})
+        ).first()
+        if not agent:
+            self.logger.error("No agent found.")
+            return
+        conversation = (
+            Conversation.objects.filter(agent_id=agent.id)
+            .only("id", "user_id")
+            .first()
+        )
+        message = ChatMessage.objects.only("embedding_id").first()
+        queries = self.hot_queries(
+            agent.id,
+            conversation.user_id if conversation else agent.connection.user_id,
+            conversation.id if conversation else "",
+            message.embedding_id if message else "",
+        )
+
+        plans = self.explain(queries, options["analyze"])
+        before = (
+            self.explain_without_indexes(queries, options["analyze"])
+            if options["compare"]
+            else {}
+        )
+
+        for name, _ in queries:
+            if name in before:
+                self.logger.info(f"--- {name} without indexes ---\n{before[name]}")
+            self.logger.info(f"--- {name} ---\n{plans[name]}")
+
+        for name, _ in queries:
+            summary = self.summarize(plans[name])
+            if name in before:
+                summary = f"{self.summarize(before[name])} -> {summary}"
+            self.logger.info(f"{name}: {summary}")
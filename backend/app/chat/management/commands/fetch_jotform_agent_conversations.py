@@ -2,7 +2,9 @@ from common.base.base_command import CustomBaseCommand
 from common.utils.jotform_api import JotFormAPIService
 from common.models.connection import Agent
 from chat.models.conversation import ChatMessage, Conversation
-from chat.utils.jotform_conversation import get_chat_messages, get_conversations
+from chat.utils.jotform_conversation import fetch_chat_histories, get_conversations
+from chat.utils.last_message import refresh_last_messages
+from chat.utils.conversation_updates import conversations_updated
 
 
 class Command(CustomBaseCommand):
@@ -16,6 +18,12 @@ class Command(CustomBaseCommand):
             required=True,
             help="The ID of the JotForm agent to fetch conversations for.",
         )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=None,
+            help="Number of chat histories fetched in parallel.",
+        )
 
     def process(self, *args, **options):
         agent_id = options["agent_id"]
@@ -51,16 +59,27 @@ class Command(CustomBaseCommand):
         else:
             self.logger.warning("No new conversations found to save.")
 
-        chat_messages = []
-        for conv in conversations:
-            chat_messages.extend(
-                get_chat_messages(service, agent_id, conv.id, self.logger)
-            )
+        chat_messages, _ = fetch_chat_histories(
+            service,
+            [(agent_id, conv.id, None) for conv in conversations or []],
+            self.logger,
+            concurrency=options["concurrency"],
+        )
 
         if chat_messages:
-            ChatMessage.objects.bulk_create(chat_messages)
+            ChatMessage.objects.bulk_create(
+                chat_messages, batch_size=1000, ignore_conflicts=True
+            )
+            refresh_last_messages(
+                {message.conversation_id for message in chat_messages}
+            )
             self.logger.info(
                 f"Successfully fetched JotForm agent conversation history, and {len(chat_messages)} messages saved to the database."
             )
         else:
             self.logger.warning("No new messages found in the conversation history.")
+
+        conversations_updated(
+            [conv.id for conv in conversations or []]
+            + [message.conversation_id for message in chat_messages]
+        )
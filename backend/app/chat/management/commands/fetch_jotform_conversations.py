@@ -3,7 +3,8 @@ from common.utils.jotform_api import JotFormAPIService
 from common.models.connection import Connection, Agent
 from common.constants.sources import SOURCE_JOTFORM
 from chat.models.conversation import Conversation
-from chat.utils.jotform_conversation import get_conversations
+from chat.utils.jotform_conversation import iter_conversations
+from chat.utils.conversation_updates import conversations_updated
 
 
 class Command(CustomBaseCommand):
@@ -36,25 +37,31 @@ class Command(CustomBaseCommand):
             return
 
         service = JotFormAPIService(user=user)
-        conversation_ids = Conversation.objects.values_list("id", flat=True)
+        conversation_ids = set(
+            Conversation.objects.filter(agent_id__in=agent_ids).values_list(
+                "id", flat=True
+            )
+        )
 
-        conversations = []
+        # Pages are saved as they arrive, so memory stays at one page.
+        saved_count = 0
         for agent_id in agent_ids:
-            # request
-            convs = get_conversations(
+            for convs in iter_conversations(
                 service,
                 agent_id,
                 user.id,
                 self.logger,
                 conversation_ids=conversation_ids,
-            )
-            if convs:
-                conversations.extend(convs)
+            ):
+                if not convs:
+                    continue
+                Conversation.objects.bulk_create(convs, ignore_conflicts=True)
+                conversations_updated([conv.id for conv in convs])
+                saved_count += len(convs)
 
-        if conversations:
-            Conversation.objects.bulk_create(conversations)
+        if saved_count:
             self.logger.info(
-                f"Successfully fetched JotForm agent conversations, and {len(conversations)} conversations saved to the database."
+                f"Successfully fetched JotForm agent conversations, and {saved_count} conversations saved to the database."
             )
         else:
             self.logger.warning("No new conversations found to save.")
@@ -4,12 +4,16 @@ from common.models.connection import Connection, Agent
 from common.constants.sources import SOURCE_JOTFORM
 from chat.models.conversation import Conversation, ChatMessage
 from chat.utils.jotform_conversation import (
-    get_chat_messages,
-    get_conversations,
+    SYNC_CURSOR_OVERLAP,
+    fetch_chat_histories,
+    get_updated_conversations,
+    jotform_now,
+    shift_sync_cursor,
 )
+from chat.utils.last_message import refresh_last_messages
+from chat.utils.conversation_updates import conversations_updated
 
-from datetime import datetime, timedelta
-from zoneinfo import ZoneInfo
+from datetime import timedelta
 
 
 class Command(CustomBaseCommand):
@@ -23,6 +27,43 @@ class Command(CustomBaseCommand):
             required=True,
             help="The ID of the JotForm agent to fetch conversations for.",
         )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=None,
+            help="Number of chat histories fetched in parallel.",
+        )
+
+    def initial_cursor(self, agent, connection):
+        """
+        Agents synced before cursors existed start from the previous fixed
+        window instead of refetching their whole history.
+        """
+        if not Conversation.objects.filter(agent_id=agent.id).exists():
+            return None
+        return shift_sync_cursor(
+            jotform_now(),
+            -timedelta(minutes=max(connection.sync_interval, 30)) - timedelta(days=1),
+        )
+
+    def fetch_agent_conversations(self, service, agent, connection):
+        """
+        Fetch the conversations of agent updated since its sync cursor.
+        :return: Tuple of (list of Conversation, fetch start or None,
+            newest updated_at seen), the list is None if the request failed.
+        """
+        cursor = agent.sync_cursor or self.initial_cursor(agent, connection)
+        since = shift_sync_cursor(cursor, -SYNC_CURSOR_OVERLAP) if cursor else None
+        self.logger.info(f"Syncing agent {agent.id} since {since or 'the beginning'}.")
+
+        conversations, newest = get_updated_conversations(
+            service,
+            agent.id,
+            connection.user.id,
+            self.logger,
+            since=since,
+        )
+        return conversations, since, newest
 
     def process(self, *args, **options):
         connection_id = options["connection_id"]
@@ -33,90 +74,75 @@ class Command(CustomBaseCommand):
             self.logger.error("No JotForm connection found for user.")
             return
 
-        user = connection.user
-        agent_ids = Agent.objects.filter(
-            connection=connection,
-        ).values_list("id", flat=True)
-
-        if not agent_ids:
+        agents = list(Agent.objects.filter(connection=connection, is_active=True))
+        if not agents:
             self.logger.error("No agents found in JotForm connection configuration.")
             return
         else:
-            self.logger.info(f"Found {len(agent_ids)} agents in JotForm connection.")
-
-        service = JotFormAPIService(user=user)
+            self.logger.info(f"Found {len(agents)} agents in JotForm connection.")
 
-        # Get Conversations
-        conversation_ids = list(
-            Conversation.objects.filter(
-                source=SOURCE_JOTFORM,
-                user=user,
-            ).values_list("id", flat=True)
-        )
-
-        # Offset for JotForm timezone difference
-        time_filter = (
-            datetime.now(ZoneInfo("America/New_York"))
-            - timedelta(minutes=max(connection.sync_interval, 30))
-            - timedelta(days=1)
-        )
+        service = JotFormAPIService(user=connection.user)
 
-        last_conversations = Conversation.objects.filter(
-            source=SOURCE_JOTFORM, user=user, created_at__gte=time_filter
-        ).values("id", "agent_id")
-        last_conversations = {cov["id"]: cov["agent_id"] for cov in last_conversations}
-
-        time_filter_str = time_filter.strftime("%Y-%m-%d %H:%M:%S")
-
-        conversations = []
-        new_conversations_dict = {}
-        for agent_id in agent_ids:
-            # request
-            convs = get_conversations(
-                service,
-                agent_id,
-                user.id,
-                self.logger,
-                filter={"updated_at:gt": time_filter_str},
-                conversation_ids=conversation_ids,
+        conversations_bulk = []
+        chats = []
+        cursors = {}
+        for agent in agents:
+            conversations, since, newest = self.fetch_agent_conversations(
+                service, agent, connection
+            )
+            if conversations is None:
+                continue
+            conversations_bulk.extend(conversations)
+            chats.extend(
+                (
+                    agent.id,
+                    conversation.id,
+                    {"created_at:gt": since} if since else None,
+                )
+                for conversation in conversations
             )
-            if convs:
-                conversations.extend(convs)
-                for conv in convs:
-                    new_conversations_dict[conv.id] = agent_id
+            if newest and newest != agent.sync_cursor:
+                cursors[agent.id] = newest
 
-        if conversations:
-            Conversation.objects.bulk_create(conversations)
+        if conversations_bulk:
+            Conversation.objects.bulk_create(conversations_bulk, ignore_conflicts=True)
             self.logger.info(
-                f"Successfully fetched JotForm agent conversations, and {len(conversations)} conversations saved to the database."
+                f"Successfully fetched JotForm agent conversations, {len(conversations_bulk)} updated conversations saved to the database."
             )
         else:
             self.logger.warning("No new conversations found to save.")
 
-        # Get ChatMessages
-        chat_messages_bulk = []
-        chat_message_ids = ChatMessage.objects.filter(
-            conversation__source=SOURCE_JOTFORM,
-            conversation__user=user,
-        ).values_list("id", flat=True)
-
-        new_conversations_dict.update(last_conversations)
-        for new_chat_id, agent_id in new_conversations_dict.items():
-            chat_messages = get_chat_messages(
-                service,
-                agent_id,
-                new_chat_id,
-                self.logger,
-                filter={"created_at:gt": time_filter_str},
-                chat_message_ids=chat_message_ids,
+        chat_messages, failed = fetch_chat_histories(
+            service, chats, self.logger, concurrency=options["concurrency"]
+        )
+        if chat_messages:
+            ChatMessage.objects.bulk_create(
+                chat_messages, batch_size=1000, ignore_conflicts=True
+            )
+            refresh_last_messages(
+                {message.conversation_id for message in chat_messages}
             )
-            if chat_messages:
-                chat_messages_bulk.extend(chat_messages)
-
-        if chat_messages_bulk:
-            ChatMessage.objects.bulk_create(chat_messages_bulk)
             self.logger.info(
-                f"Successfully fetched JotForm agent conversation history, and {len(chat_messages_bulk)} messages saved to the database."
+                f"Successfully fetched JotForm agent conversation history, {len(chat_messages)} messages saved to the database."
             )
         else:
             self.logger.warning("No new messages found in the conversation history.")
+
+        conversations_updated(
+            [conversation.id for conversation in conversations_bulk]
+            + [message.conversation_id for message in chat_messages]
+        )
+
+        # The cursor only moves forward for agents whose histories all arrived.
+        failed_agents = {agent_id for agent_id, _ in failed}
+        synced = []
+        for agent in agents:
+            if agent.id in failed_agents:
+                self.logger.warning(
+                    f"Some histories of agent {agent.id} failed, sync cursor not moved."
+                )
+            elif agent.id in cursors:
+                agent.sync_cursor = cursors[agent.id]
+                synced.append(agent)
+        if synced:
+            Agent.objects.bulk_update(synced, ["sync_cursor"])
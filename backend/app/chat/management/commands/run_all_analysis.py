@@ -8,17 +8,28 @@ class Command(CustomBaseCommand):
 
     def add_arguments(self, parser):
         super().add_arguments(parser)
+        parser.add_argument(
+            "--combined",
+            action="store_true",
+            default=False,
+            help="Get title, sentiment, label and context change with a single AI request per conversation.",
+        )
 
     def process(self, *args, **options):
         self.logger.info("Running all analysis tasks...")
 
-        self.logger.info("Fetching titles...")
-        management.call_command("get_conversation_title")
-        self.logger.info("Fetched titles.")
+        if options["combined"]:
+            self.logger.info("Running combined analysis...")
+            management.call_command("get_combined_analysis")
+            self.logger.info("Combined analysis done.")
+        else:
+            self.logger.info("Fetching titles...")
+            management.call_command("get_conversation_title")
+            self.logger.info("Fetched titles.")
 
-        self.logger.info("Running sentimental analysis...")
-        management.call_command("get_sentimental_analysis")
-        self.logger.info("Sentimental analysis done.")
+            self.logger.info("Running sentimental analysis...")
+            management.call_command("get_sentimental_analysis")
+            self.logger.info("Sentimental analysis done.")
 
         self.logger.info("Conversations to Qdrant...")
         management.call_command("conversations_to_qdrant")
@@ -28,6 +39,7 @@ class Command(CustomBaseCommand):
         management.call_command("group_messages")
         self.logger.info("Group messages done.")
 
-        self.logger.info("Running context change analysis task...")
-        management.call_command("get_context_change_analysis")
-        self.logger.info("Context change analysis done.")
+        if not options["combined"]:
+            self.logger.info("Running context change analysis task...")
+            management.call_command("get_context_change_analysis")
+            self.logger.info("Context change analysis done.")
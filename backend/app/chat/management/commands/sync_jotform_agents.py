@@ -1,6 +1,6 @@
 from common.base.base_command import CustomBaseCommand
 from common.utils.jotform_api import JotFormAPIService
-from common.models.connection import Connection, Agent
+from common.models.connection import Connection
 from common.constants.sources import SOURCE_JOTFORM
 from chat.utils.jotform_conversation import sync_agents
 
@@ -16,6 +16,12 @@ class Command(CustomBaseCommand):
             required=True,
             help="The ID of the JotForm agent to fetch conversations for.",
         )
+        parser.add_argument(
+            "--create_missing",
+            action="store_true",
+            default=False,
+            help="Also save JotForm agents that are not in the database yet.",
+        )
 
     def process(self, *args, **options):
         connection_id = options["connection_id"]
@@ -26,12 +32,10 @@ class Command(CustomBaseCommand):
             self.logger.error("No JotForm connection found for user.")
             return
 
-        user = connection.user
-        agent_ids = Agent.objects.filter(
-            connection=connection,
-        ).values_list("id", flat=True)
-
-        self.logger.info(f"Found {len(agent_ids)} agents in JotForm connection.")
-
-        service = JotFormAPIService(user=user)
-        sync_agents(service, self.logger, agent_ids=agent_ids)
+        service = JotFormAPIService(user=connection.user, connection=connection)
+        sync_agents(
+            service,
+            connection,
+            self.logger,
+            create_missing=options["create_missing"],
+        )
@@ -30,6 +30,9 @@ class Conversation(models.Model):
     analysis_result = models.CharField(max_length=100, null=True, blank=True)
     analysis_details = models.TextField(null=True, blank=True)
     context_analysis_done = models.BooleanField(default=False)
+    # Denormalized from the newest ChatMessage, see chat.utils.last_message.
+    last_message = models.TextField(null=True, blank=True)
+    last_message_at = models.DateTimeField(null=True, blank=True)
 
     source = models.CharField(
         max_length=255,
@@ -63,6 +66,45 @@ class Conversation(models.Model):
         related_name="conversations",
     )
 
+    class Meta:
+        indexes = [
+            # Agent conversation lists and statistics.
+            models.Index(
+                fields=["agent_id", "-created_at"],
+                name="conv_agent_created_idx",
+            ),
+            # Keyset pagination of the user's conversation list, same ordering
+            # as KeysetPagination.
+            models.Index(
+                "user",
+                models.F("created_at").desc(nulls_last=True),
+                models.F("id").desc(),
+                name="conv_user_created_idx",
+            ),
+            models.Index(fields=["user", "source"], name="conv_user_source_idx"),
+            # Analysis backlogs, only the pending rows are indexed.
+            models.Index(
+                fields=["id"],
+                condition=models.Q(analysis_result__isnull=True),
+                name="conv_no_sentiment_idx",
+            ),
+            models.Index(
+                fields=["id"],
+                condition=models.Q(title__isnull=True),
+                name="conv_no_title_idx",
+            ),
+            models.Index(
+                fields=["agent_id"],
+                condition=models.Q(label__isnull=True),
+                name="conv_no_label_idx",
+            ),
+            models.Index(
+                fields=["id"],
+                condition=models.Q(context_analysis_done=False),
+                name="conv_no_context_idx",
+            ),
+        ]
+
 
 class ChatMessage(models.Model):
     SENDER_TYPE_USER = "user"
@@ -96,3 +138,30 @@ class ChatMessage(models.Model):
         on_delete=models.CASCADE,
         related_name="messages",
     )
+
+    class Meta:
+        indexes = [
+            # Transcripts and the newest message of a conversation.
+            models.Index(
+                fields=["conversation", "created_at"],
+                name="msg_conv_created_idx",
+            ),
+            models.Index(fields=["embedding_id"], name="msg_embedding_id_idx"),
+            # Qdrant backlog, only messages not embedded yet are indexed.
+            models.Index(
+                fields=["conversation"],
+                condition=models.Q(embedded_in_qdrant=False),
+                name="msg_not_embedded_idx",
+            ),
+            # Embedded messages of an agent used for grouping.
+            models.Index(
+                fields=["conversation", "sender_type"],
+                condition=models.Q(embedded_in_qdrant=True),
+                name="msg_embedded_sender_idx",
+            ),
+            # New message check of group_messages.
+            models.Index(
+                fields=["sender_type", "saved_at"],
+                name="msg_sender_saved_idx",
+            ),
+        ]
@@ -17,22 +17,32 @@ class ChatMessageSerializer(serializers.ModelSerializer):
 
 
 class ConversationSerializer(serializers.Serializer):
-    """Serializer for conversations."""
+    """
+    Serializer for conversations.
+    A "fields" list in the context limits the output to those keys.
+    """
+
+    FIELDS = (
+        "id",
+        "created_at",
+        "source",
+        "chat_type",
+        "status",
+        "agent_id",
+        "analysis_result",
+        "analysis_details",
+        "label",
+        "title",
+        "last_message",
+        "last_message_at",
+    )
 
     def to_representation(self, instance):
-        last_message = self.context.get("last_message")
-        return {
-            "id": instance.id,
-            "created_at": instance.created_at,
-            "source": instance.source,
-            "chat_type": instance.chat_type,
-            "status": instance.status,
-            "agent_id": instance.agent_id,
-            "analysis_result": instance.analysis_result,
-            "analysis_details": instance.analysis_details,
-            "label": instance.label,
-            "title": instance.title,
-            "last_message": instance.last_message
-            if hasattr(instance, "last_message")
-            else ChatMessageSerializer(last_message).data,
-        }
+        fields = self.context.get("fields") or self.FIELDS
+        data = {}
+        for field in fields:
+            if field == "last_message" and "last_message" in self.context:
+                data[field] = ChatMessageSerializer(self.context["last_message"]).data
+            else:
+                data[field] = getattr(instance, field)
+        return data
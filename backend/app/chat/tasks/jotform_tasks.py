@@ -61,6 +61,8 @@ def fetch_jotform_conversations_and_histories_task(connection_id):
     )
     log.save()
 
+    # Deactivated agents are skipped by the fetch.
+    management.call_command("sync_jotform_agents", connection_id=connection_id)
     management.call_command(
         "fetch_jotform_conversations_and_histories",
         connection_id=connection_id,
@@ -69,6 +71,21 @@ def fetch_jotform_conversations_and_histories_task(connection_id):
     return True
 
 
+@shared_task
+def sync_jotform_agents_task(connection_id):
+    """
+    Reconcile the agents of a JotForm connection with the JotForm listing.
+    """
+    log = Log(
+        task_name=f"Sync JotForm Agents - {connection_id}",
+        category=Log.Category.JOTFORM_FETCH,
+    )
+    log.save()
+    management.call_command("sync_jotform_agents", connection_id=connection_id)
+    log.complete_task("Jotform Agents Synced")
+    return True
+
+
 def fetch_jotform_connection_periodic_task(connection_id, sync_interval=None):
     """
     Sets up or updates a periodic task to fetch JotForm conversations and histories.
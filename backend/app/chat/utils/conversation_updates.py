@@ -0,0 +1,26 @@
+from analyze.utils.agent_statistics import refresh_conversation_statistics
+from common.utils.response_cache import invalidate_conversations
+
+
+def conversations_updated(conversation_ids):
+    """
+    Refresh what is derived from written conversations or their messages:
+    the agent daily statistics and the versions of cached API responses.
+    """
+    conversation_ids = list(dict.fromkeys(conversation_ids))
+    if not conversation_ids:
+        return
+    refresh_conversation_statistics(conversation_ids)
+    invalidate_conversations(conversation_ids)
+
+
+def conversations_analyzed(conversation_ids):
+    """
+    conversations_updated for analysis results, which only change
+    conversation fields, so messages are not recounted.
+    """
+    conversation_ids = list(dict.fromkeys(conversation_ids))
+    if not conversation_ids:
+        return
+    refresh_conversation_statistics(conversation_ids, include_messages=False)
+    invalidate_conversations(conversation_ids)
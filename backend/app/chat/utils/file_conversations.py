@@ -1,23 +1,255 @@
 import csv
-from io import StringIO
+import io
+import json
+
+from django.conf import settings
+from django.db import transaction
+
 from chat.models.conversation import ChatMessage, Conversation
+from chat.utils.last_message import refresh_last_messages
+from chat.utils.conversation_updates import conversations_updated
 from common.constants.sources import SOURCE_FILE
 
+CSV_REQUIRED_COLUMNS = {
+    "conversation_id",
+    "message_id",
+    "content",
+    "sender_type",
+    "created_at",
+}
+# Characters read from an uploaded JSON file per step.
+JSON_READ_CHUNK_SIZE = 64 * 1024
+
+
+def open_text(data, encoding="utf-8-sig"):
+    """
+    Return a text stream over data. Uploaded files are decoded while they are
+    read instead of being loaded into memory first.
+    :param data: str, bytes or a binary file-like object (e.g. UploadedFile)
+    """
+    if isinstance(data, str):
+        return io.StringIO(data)
+    if isinstance(data, bytes):
+        data = io.BytesIO(data)
+    return io.TextIOWrapper(data, encoding=encoding, newline="")
+
+
+def iter_csv_rows(data):
+    """
+    Yield the rows of a CSV file one at a time as dicts.
+    :param data: str, bytes or a binary file-like object
+    :raises ValueError: If a required column is missing
+    """
+    reader = csv.DictReader(open_text(data))
+    missing = CSV_REQUIRED_COLUMNS - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"CSV file is missing required columns: {missing}")
+    yield from reader
+
+
+def iter_json_array(data, chunk_size=JSON_READ_CHUNK_SIZE):
+    """
+    Yield the items of a top level JSON array one at a time.
+    The file is read in chunks and every item is decoded with raw_decode as
+    soon as it is complete, so only one item is held in memory.
+    :param data: str, bytes or a binary file-like object
+    :raises ValueError: If the file is not a JSON array, also when data
+        follows the array
+    """
+    stream = open_text(data)
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+
+    def read(size):
+        nonlocal buffer, position, eof
+        chunk = stream.read(size)
+        if not chunk:
+            eof = True
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    def peek():
+        # Next non whitespace character, "" at the end of the file.
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer) or eof:
+                return buffer[position : position + 1]
+            read(chunk_size)
+
+    def end_array():
+        # Only whitespace may follow the closing bracket.
+        nonlocal position
+        position += 1
+        if peek():
+            raise ValueError("JSON file is not a valid array.")
+
+    if peek() != "[":
+        raise ValueError("JSON file must contain an array of conversations.")
+    position += 1
+    if peek() == "]":
+        end_array()
+        return
+
+    while True:
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+            # An item ending at the buffer end may continue in the next chunk.
+            complete = end < len(buffer) or eof
+        except json.JSONDecodeError:
+            if eof:
+                raise ValueError("JSON file is not a valid array.")
+            complete = False
+        if not complete:
+            # Grow the read size with the item, so large items stay linear.
+            read(max(chunk_size, len(buffer) - position))
+            continue
+
+        position = end
+        yield item
+
+        separator = peek()
+        if separator == "]":
+            end_array()
+            return
+        if separator != ",":
+            raise ValueError("JSON file is not a valid array.")
+        position += 1
+        peek()
+
+
+class ConversationImporter:
+    """
+    Saves the conversations and messages of an uploaded file while it is
+    read. Rows are collected into batches of batch_size messages (or
+    conversations); each batch resolves its conversation and message IDs
+    against the database with a few id__in queries and is written with one
+    bulk_create for conversations and one for messages, so memory stays
+    bounded whatever the file size.
+    Conversations that already exist are skipped with their messages, and
+    messages that already exist are skipped.
+    """
+
+    def __init__(self, user, agent_id=None, chat_message_ids=None, batch_size=None):
+        self.user = user
+        self.agent_id = agent_id
+        # Optional caller provided IDs, otherwise each batch queries its own.
+        self.chat_message_ids = chat_message_ids
+        self.batch_size = max(batch_size or settings.FILE_IMPORT_BATCH_SIZE, 1)
+        # conversation_id -> True if created, False if it already existed
+        self.conversations = {}
+        self.pending_conversations = {}
+        self.pending_messages = {}
+        self.conversation_count = 0
+        self.skipped_conversation_count = 0
+        self.message_count = 0
+
+    def add_conversation(self, conversation_id, chat_type=None):
+        """
+        Queue the conversation on first sight.
+        :return: False if the conversation is known to exist already and its
+            messages should be skipped.
+        """
+        if conversation_id in self.conversations:
+            return self.conversations[conversation_id]
+        if conversation_id not in self.pending_conversations:
+            self.pending_conversations[conversation_id] = Conversation(
+                id=conversation_id,
+                source=SOURCE_FILE,
+                chat_type=chat_type or Conversation.TYPE_AI2U,
+                user_id=self.user.id,
+                agent_id=self.agent_id,
+            )
+            if len(self.pending_conversations) >= self.batch_size:
+                self.flush()
+        return True
+
+    def add_message(self, conversation_id, message_id, content, sender_type, created_at):
+        if self.chat_message_ids is not None and message_id in self.chat_message_ids:
+            return
+        self.pending_messages[message_id] = ChatMessage(
+            id=message_id,
+            conversation_id=conversation_id,
+            content=content,
+            sender_type=sender_type,
+            created_at=created_at,
+        )
+        if len(self.pending_messages) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Resolve the pending IDs against the database and write the batch.
+        """
+        if not self.pending_conversations and not self.pending_messages:
+            return
+
+        existing_conversations = set(
+            Conversation.objects.filter(
+                id__in=list(self.pending_conversations)
+            ).values_list("id", flat=True)
+        )
+        conversations = []
+        for conversation_id, conversation in self.pending_conversations.items():
+            created = conversation_id not in existing_conversations
+            self.conversations[conversation_id] = created
+            if created:
+                conversations.append(conversation)
+
+        messages = {
+            message_id: message
+            for message_id, message in self.pending_messages.items()
+            if self.conversations.get(message.conversation_id, True)
+        }
+        if self.chat_message_ids is None and messages:
+            existing_messages = ChatMessage.objects.filter(
+                id__in=list(messages)
+            ).values_list("id", flat=True)
+            for message_id in existing_messages:
+                messages.pop(message_id, None)
+
+        with transaction.atomic():
+            if conversations:
+                Conversation.objects.bulk_create(conversations)
+            if messages:
+                ChatMessage.objects.bulk_create(list(messages.values()))
+                refresh_last_messages(
+                    {message.conversation_id for message in messages.values()}
+                )
+            conversations_updated(
+                [conversation.id for conversation in conversations]
+                + [message.conversation_id for message in messages.values()]
+            )
+
+        self.conversation_count += len(conversations)
+        self.skipped_conversation_count += len(existing_conversations)
+        self.message_count += len(messages)
+        self.pending_conversations = {}
+        self.pending_messages = {}
+        if existing_conversations:
+            print(f"{len(existing_conversations)} conversations already exist. Skipping.")
+
 
 def get_conversation_messages_from_csv(
     user,
     csv_data,
     agent_id=None,
     chat_message_ids=None,
+    batch_size=None,
 ):
     """
     Fetch conversation messages from a CSV file and save them to the database.
+    Rows are read one at a time and may belong to any number of conversations.
     :param user: The user for whom the conversation is being fetched.
-    :param csv_file_path: The path to the CSV file containing conversation messages.
+    :param csv_data: CSV content as str or bytes, or a binary file-like object.
     :param agent_id: The ID of the JotForm agent (optional).
     :param chat_message_ids: A list of existing chat message IDs to avoid duplicates.
-    :return: None
-    :rtype: None
+    :param batch_size: Messages saved per bulk_create (FILE_IMPORT_BATCH_SIZE by default).
+    :return: Number of saved messages
+    :rtype: int
 
     Example CSV format:
     conversation_id,message_id,content,sender_type,created_at,chat_type
@@ -26,91 +258,54 @@ def get_conversation_messages_from_csv(
     123,301989e080d477b898e484ff51e209043bce8,How can I help you?,assistant,2025-08-19T12:02:00,ai2u
     124,01989e0819737b4bbdea350f40c3d01490aa,Good morning,user,2025-08-19T12:05:00,ai2u
     """
-    if chat_message_ids is None:
-        chat_message_ids = ChatMessage.objects.values_list("id", flat=True)
-
     try:
-        if isinstance(csv_data, bytes):
-            csv_data = csv_data.decode("utf-8")
-
-        with StringIO(csv_data) as csv_file:
-            reader = csv.DictReader(csv_file)
-
-            # Validate required columns
-            required_columns = {
-                "conversation_id",
-                "message_id",
-                "content",
-                "sender_type",
-                "created_at",
-            }
-            if not required_columns.issubset(reader.fieldnames):
-                print(
-                    f"CSV file is missing required columns: {required_columns - set(reader.fieldnames)}"
-                )
-                return
-
-            conversation_messages = []
-            conversation_id = None
-
-            conversation = None
-            for row in reader:
-                # Extract conversation ID from the first row
-                if conversation_id is None:
-                    if Conversation.objects.filter(id=row["conversation_id"]).exists():
-                        raise ValueError("Conversation record already exists.")
-                    else:
-                        conversation_id = row["conversation_id"]
-                        chat_type = row.get("chat_type", Conversation.TYPE_AI2U)
-
-                        # Create the conversation
-                        conversation = Conversation.objects.create(
-                            id=conversation_id,
-                            source=SOURCE_FILE,
-                            chat_type=chat_type,
-                            user_id=user.id,
-                            agent_id=agent_id,
-                        )
-
-                # Add chat messages
-                if row["message_id"] not in chat_message_ids:
-                    conversation_messages.append(
-                        ChatMessage(
-                            id=row["message_id"],
-                            conversation_id=conversation.id,
-                            content=row["content"],
-                            sender_type=row["sender_type"],
-                            created_at=row["created_at"],
-                        )
-                    )
-
-            # Bulk create chat messages
-            if conversation_messages:
-                ChatMessage.objects.bulk_create(conversation_messages)
-                print(
-                    f"Successfully fetched CSV conversation history, and {len(conversation_messages)} messages saved to the database."
-                )
-            else:
-                print("No new messages to save.")
-
+        importer = ConversationImporter(
+            user,
+            agent_id=agent_id,
+            chat_message_ids=chat_message_ids,
+            batch_size=batch_size,
+        )
+        for row in iter_csv_rows(csv_data):
+            conversation_id = row["conversation_id"]
+            if not importer.add_conversation(conversation_id, row.get("chat_type")):
+                continue
+            importer.add_message(
+                conversation_id,
+                row["message_id"],
+                row["content"],
+                row["sender_type"],
+                row["created_at"],
+            )
+        importer.flush()
     except Exception as e:
         raise Exception(f"Error processing CSV data: {str(e)}")
 
+    if importer.message_count:
+        print(
+            f"Successfully fetched CSV conversation history, and {importer.message_count} messages of {importer.conversation_count} conversations saved to the database."
+        )
+    else:
+        print("No new messages to save.")
+    return importer.message_count
+
 
 def get_conversation_messages_from_json(
     user,
     json_data,
     agent_id=None,
     chat_message_ids=None,
+    batch_size=None,
 ):
     """
     Fetch conversation messages from a JSON object and save them to the database.
     :param user: The user for whom the conversation is being fetched.
-    :param json_data: The JSON object containing conversation messages.
+    :param json_data: List of conversation objects, or an iterable of them
+        such as iter_json_array over an uploaded file.
     :param agent_id: The ID of the JotForm agent (optional).
     :param chat_message_ids: A list of existing chat message IDs to avoid duplicates.
-    :return: None
-    :rtype: None
+    :param batch_size: Messages saved per bulk_create (FILE_IMPORT_BATCH_SIZE by default).
+    :return: Number of saved messages
+    :rtype: int
 
     Example JSON format:
     [
@@ -143,68 +338,48 @@ def get_conversation_messages_from_json(
         }
     ]
     """
-    if chat_message_ids is None:
-        chat_message_ids = ChatMessage.objects.values_list("id", flat=True)
-
-    if not json_data or not isinstance(json_data, list):
+    if not json_data or isinstance(json_data, (dict, str, bytes)):
         print("No conversation messages found in the JSON file or wrong format.")
         return 0
 
-    from django.db import transaction
-
-    total_messages = 0
     try:
         with transaction.atomic():
+            importer = ConversationImporter(
+                user,
+                agent_id=agent_id,
+                chat_message_ids=chat_message_ids,
+                batch_size=batch_size,
+            )
             for conversation_obj in json_data:
                 if (
-                    "conversation_id" not in conversation_obj
+                    not isinstance(conversation_obj, dict)
+                    or "conversation_id" not in conversation_obj
                     or "content" not in conversation_obj
                 ):
                     print("Conversation object missing required fields.")
                     continue
 
                 conversation_id = conversation_obj["conversation_id"]
-                if Conversation.objects.filter(id=conversation_id).exists():
-                    print(f"Conversation {conversation_id} already exists. Skipping.")
+                if not importer.add_conversation(
+                    conversation_id, conversation_obj.get("chat_type")
+                ):
                     continue
 
-                chat_type = conversation_obj.get("chat_type", Conversation.TYPE_AI2U)
-                Conversation.objects.create(
-                    id=conversation_id,
-                    source=SOURCE_FILE,
-                    chat_type=chat_type,
-                    user_id=user.id,
-                    agent_id=agent_id,
-                )
-
-                conversation_messages = []
-                content = conversation_obj["content"]
-                for message in content:
-                    if message["id"] not in chat_message_ids:
-                        conversation_messages.append(
-                            ChatMessage(
-                                id=message["id"],
-                                conversation_id=conversation_id,
-                                content=message["content"],
-                                sender_type=message["sender_type"],
-                                created_at=message["created_at"],
-                            )
-                        )
-
-                if conversation_messages:
-                    ChatMessage.objects.bulk_create(conversation_messages)
-                    print(
-                        f"Successfully fetched JSON conversation {conversation_id}, and {len(conversation_messages)} messages saved to the database."
-                    )
-                    total_messages += len(conversation_messages)
-                else:
-                    print(
-                        f"No new messages to save for conversation {conversation_id}."
+                for message in conversation_obj["content"]:
+                    importer.add_message(
+                        conversation_id,
+                        message["id"],
+                        message["content"],
+                        message["sender_type"],
+                        message["created_at"],
                     )
+            importer.flush()
     except Exception as e:
         print(
             f"Error saving conversations/messages: {str(e)}. Transaction rolled back."
         )
         return 0
-    print(f"Total messages saved: {total_messages}")
-    return total_messages
+    print(
+        f"Total messages saved: {importer.message_count} in {importer.conversation_count} conversations"
+    )
+    return importer.message_count
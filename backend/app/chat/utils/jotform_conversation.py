@@ -1,6 +1,14 @@
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import connections, transaction
+
 from chat.models.conversation import ChatMessage, Conversation
 from common.utils.jotform_api import JotFormAPIService
+from common.utils.response_cache import invalidate_agents
 from common.models.connection import Agent
 
 
@@ -71,6 +79,128 @@ def get_chat_messages(
     return chat_messages
 
 
+def fetch_chat_histories(
+    service: JotFormAPIService,
+    chats,
+    logger,
+    concurrency=None,
+):
+    """
+    Fetch the messages of many chats in a bounded thread pool.
+        Requests share the pooled session and the per API key rate limit of
+        service, failed requests are retried with backoff by the session.
+    :param service: JotFormAPIService instance
+    :param chats: Iterable of (agent_id, chat_id, filter) tuples
+    :param logger: Logger instance
+    :param concurrency: Number of parallel requests, JOTFORM_CONCURRENCY by default
+    :return: Tuple of (list of ChatMessage instances of every chat,
+        set of (agent_id, chat_id) whose history could not be fetched)
+    """
+    concurrency = max(concurrency or settings.JOTFORM_CONCURRENCY, 1)
+
+    def fetch(agent_id, chat_id, filter):
+        try:
+            return get_chat_messages(
+                service,
+                agent_id,
+                chat_id,
+                logger,
+                filter=filter,
+                chat_message_ids=(),
+            )
+        finally:
+            # Worker threads open their own DB connection for service logs.
+            connections.close_all()
+
+    chat_messages = []
+    failed = set()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(fetch, agent_id, chat_id, filter): (agent_id, chat_id)
+            for agent_id, chat_id, filter in chats
+        }
+        for future in as_completed(futures):
+            agent_id, chat_id = futures[future]
+            try:
+                messages = future.result()
+            except Exception as e:
+                logger.error(f"Failed to fetch history of chat {chat_id}: {str(e)}")
+                messages = None
+            if messages is None:
+                failed.add((agent_id, chat_id))
+                continue
+            chat_messages.extend(messages)
+
+    logger.info(
+        f"Fetched {len(chat_messages)} messages from {len(futures)} chats, {len(failed)} failed."
+    )
+    return chat_messages, failed
+
+
+def build_conversations(content, user_id, conversation_ids):
+    """
+    Build Conversation instances from JotForm conversation items.
+    :param content: Conversation items returned by JotForm
+    :param user_id: ID of the user
+    :param conversation_ids: Existing conversation IDs to skip
+    :return: List of Conversation instances
+    """
+    conversations = []
+    for conversation in content:
+        chat_id = conversation.get("aiAgentChatID")
+        if chat_id in conversation_ids:
+            continue
+        conversations.append(
+            Conversation(
+                id=chat_id,
+                user_id=user_id,
+                agent_id=conversation["aiAgentID"],
+                created_at=conversation["created_at"],
+                chat_type=Conversation.TYPE_AI2U,
+            )
+        )
+    return conversations
+
+
+def iter_conversations(
+    service: JotFormAPIService,
+    agent_id,
+    user_id,
+    logger,
+    filter=None,
+    conversation_ids=None,
+):
+    """
+    Fetch conversations for a specific agent one page at a time.
+        Pages can be written to the database as they arrive instead of holding
+        every conversation of a busy agent in memory.
+        If conversation_ids is provided, only conversations not in that list will be fetched.
+        If conversation_ids is None, all conversations will be fetched.
+    :param service: JotFormAPIService instance
+    :param agent_id: ID of the agent
+    :param user_id: ID of the user
+    :param logger: Logger instance
+    :param filter: Optional filter for fetching conversations
+    :param conversation_ids: Optional list of existing conversation IDs to exclude
+    :return: Generator of lists of Conversation instances, stops after a failed page
+    """
+
+    if conversation_ids is None:
+        conversation_ids = Conversation.objects.values_list("id", flat=True)
+
+    for response_code, content in service.iter_agent_conversations(
+        agent_id=agent_id,
+        filter=filter,
+    ):
+        if response_code != 200:
+            logger.error(
+                f"Failed to fetch conversations for agent {agent_id}: {content.get('error', 'Unknown error')}"
+            )
+            return
+        logger.info(f"Fetched a page of {len(content)} conversations for agent {agent_id}.")
+        yield build_conversations(content, user_id, conversation_ids)
+
+
 def get_conversations(
     service: JotFormAPIService,
     agent_id,
@@ -99,27 +229,91 @@ def get_conversations(
         agent_id=agent_id,
         filter=filter,
     )
-    conversations = []
     if response_code != 200:
         logger.error(
             f"Failed to fetch conversations for agent {agent_id}: {content.get('error', 'Unknown error')}"
         )
         return
     logger.info(f"Fetched {len(content)} conversations for agent {agent_id}.")
+    return build_conversations(content, user_id, conversation_ids)
+
+
+# JotForm timestamps are "YYYY-MM-DD HH:MM:SS" strings in New York time.
+JOTFORM_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+JOTFORM_TIME_ZONE = ZoneInfo("America/New_York")
+# Fetch windows start this much before the cursor, duplicates are ignored on insert.
+SYNC_CURSOR_OVERLAP = timedelta(minutes=5)
+
+
+def shift_sync_cursor(cursor, delta):
+    """
+    Move a JotForm timestamp string by delta.
+    """
+    shifted = datetime.strptime(cursor, JOTFORM_TIME_FORMAT) + delta
+    return shifted.strftime(JOTFORM_TIME_FORMAT)
+
+
+def jotform_now():
+    return datetime.now(JOTFORM_TIME_ZONE).strftime(JOTFORM_TIME_FORMAT)
+
+
+def get_updated_conversations(
+    service: JotFormAPIService,
+    agent_id,
+    user_id,
+    logger,
+    since=None,
+):
+    """
+    Fetch the conversations of an agent updated after since, new or existing.
+    :param service: JotFormAPIService instance
+    :param agent_id: ID of the agent
+    :param user_id: ID of the user
+    :param logger: Logger instance
+    :param since: JotForm timestamp string, None fetches every conversation
+    :return: Tuple of (list of Conversation instances, newest updated_at seen),
+        the list is None if the request failed
+    """
+    response_code, content = service.get_agent_conversations(
+        agent_id=agent_id,
+        filter={"updated_at:gt": since} if since else None,
+    )
+    if response_code != 200:
+        logger.error(
+            f"Failed to fetch conversations for agent {agent_id}: {content.get('error', 'Unknown error')}"
+        )
+        return None, None
+    logger.info(f"Fetched {len(content)} updated conversations for agent {agent_id}.")
+
+    conversations = []
+    newest = None
     for conversation in content:
-        chat_id = conversation.get("aiAgentChatID")
-        if chat_id in conversation_ids:
-            continue
+        updated_at = conversation.get("updated_at") or conversation.get("created_at")
+        if updated_at and (newest is None or updated_at > newest):
+            newest = updated_at
         conversations.append(
             Conversation(
-                id=chat_id,
+                id=conversation.get("aiAgentChatID"),
                 user_id=user_id,
                 agent_id=conversation["aiAgentID"],
                 created_at=conversation["created_at"],
                 chat_type=Conversation.TYPE_AI2U,
             )
         )
-    return conversations
+    return conversations, newest
+
+
+def build_agent(connection, agent):
+    """
+    Build an Agent instance of connection from a JotForm agent listing item.
+    """
+    return Agent(
+        id=agent["uuid"],
+        connection_id=connection.id,
+        name=agent["title"],
+        avatar_url=agent.get("avatarIconLink"),
+        jotform_render_url=agent.get("renderURL", ""),
+    )
 
 
 def get_agents(
@@ -128,11 +322,12 @@ def get_agents(
 ):
     """
     Fetch JotForm agents and return a list of Agent objects.
-    If agent_ids is provided, only those agents will be fetched.
-    If agent_ids is None, all agents will be fetched.
+    If agent_ids is provided, only agents not in that list will be returned.
+    If agent_ids is None, agents already saved in the database are skipped.
     """
     if agent_ids is None:
         agent_ids = Agent.objects.values_list("id", flat=True)
+    agent_ids = set(agent_ids)
 
     response_code, content = service.get_agents()
     if response_code != 200:
@@ -140,70 +335,108 @@ def get_agents(
             f"Failed to fetch agents: {content.get('error', 'Unknown error')}"
         )
 
-    agents = []
-    for agent in content:
-        if agent["uuid"] in agent_ids:
-            continue
+    return [
+        build_agent(service.connection, agent)
+        for agent in content
+        if agent["uuid"] not in agent_ids
+    ]
 
-        agents.append(
-            Agent(
-                id=agent["uuid"],
-                connection_id=service.connection.id,
-                name=agent["title"],
-                avatar_url=agent.get("avatarIconLink"),
-                jotform_render_url=agent.get("renderURL", ""),
-            )
-        )
-    return agents
+
+# Agent fields kept equal to the JotForm listing by sync_agents.
+AGENT_SYNC_FIELDS = ("name", "avatar_url", "jotform_render_url")
 
 
 def sync_agents(
     service: JotFormAPIService,
+    connection,
     logger,
     agent_ids=None,
+    create_missing=False,
 ):
     """
-    Sync JotForm agents with the database.
-    If agent_ids is provided, only those agents will be synced.
-    If agent_ids is None, all agents will be synced.
+    Reconcile the agents of connection with its JotForm listing.
+        Local agents are loaded in one query and diffed against the remote
+        listing; changes are written with one bulk operation per kind.
+        Listed agents get their name, avatar and render URL updated and are
+        reactivated, local agents missing from the listing are deactivated.
+        If agent_ids is provided, only those agents will be synced.
+    :param service: JotFormAPIService instance of connection
+    :param connection: JotForm connection whose agents are reconciled
+    :param logger: Logger instance
+    :param agent_ids: Optional IDs of the local agents to sync
+    :param create_missing: Also save listed agents that are not in the database
+    :return: Dict of created, updated, deactivated and unchanged counts
     """
-    if agent_ids is None:
-        agent_ids = Agent.objects.values_list("id", flat=True)
+    if service.connection.id != connection.id:
+        raise ValueError("The service does not use the connection being synced.")
 
-    response_code, content = service.get_agents()
+    local_agents = Agent.objects.filter(connection_id=connection.id)
+    if agent_ids is not None:
+        local_agents = local_agents.filter(id__in=list(agent_ids))
+    local_agents = {agent.id: agent for agent in local_agents}
 
+    response_code, content = service.get_agents()
     if response_code != 200:
         raise ValueError(
             f"Failed to fetch agents: {content.get('error', 'Unknown error')}"
         )
 
-    # Prepare bulk update for agents
-    agents_to_update = []
-    for agent in content:
-        if agent["uuid"] not in agent_ids:
-            logger.info(f"Agent record not added: {agent['title']}")
+    to_create = []
+    to_update = []
+    unchanged = 0
+    remote_ids = set()
+    for remote in content:
+        remote_agent = build_agent(connection, remote)
+        remote_ids.add(remote_agent.id)
+        agent = local_agents.get(remote_agent.id)
+
+        if agent is None:
+            if create_missing and agent_ids is None:
+                to_create.append(remote_agent)
             continue
 
-        logger.info(f"Syncing agent: {agent['title']}")
-        agentRecord = Agent.objects.filter(id=agent["uuid"]).first()
+        changed = [
+            field
+            for field in AGENT_SYNC_FIELDS
+            if getattr(agent, field) != getattr(remote_agent, field)
+        ]
+        for field in changed:
+            setattr(agent, field, getattr(remote_agent, field))
+        if not agent.is_active:
+            agent.is_active = True
+            changed.append("is_active")
 
-        if not agentRecord:
-            logger.warning(f"Agent record not found: {agent['title']}")
-            continue
+        if changed:
+            logger.info(f"Agent {agent.id} changed: {', '.join(changed)}")
+            to_update.append(agent)
+        else:
+            unchanged += 1
+
+    to_deactivate = [
+        agent
+        for agent_id, agent in local_agents.items()
+        if agent_id not in remote_ids and agent.is_active
+    ]
+    for agent in to_deactivate:
+        logger.info(f"Agent {agent.id} is no longer listed, deactivating.")
+        agent.is_active = False
+
+    with transaction.atomic():
+        if to_create:
+            Agent.objects.bulk_create(to_create, ignore_conflicts=True)
+        if to_update:
+            Agent.objects.bulk_update(
+                to_update, list(AGENT_SYNC_FIELDS) + ["is_active"]
+            )
+        if to_deactivate:
+            Agent.objects.bulk_update(to_deactivate, ["is_active"])
+        invalidate_agents(agent.id for agent in to_update + to_deactivate)
 
-        updated = False
-        if agent["title"] != agentRecord.name:
-            logger.info(f"Updating agent name: {agent['title']}")
-            agentRecord.name = agent["title"]
-            updated = True
-        if agent.get("avatarIconLink") != agentRecord.avatar_url:
-            logger.info(f"Updating agent avatar: {agent['title']}")
-            agentRecord.avatar_url = agent.get("avatarIconLink")
-            updated = True
-        if updated:
-            agents_to_update.append(agentRecord)
-            logger.info(f"Agent {agent['title']} marked for bulk update.")
-
-    if agents_to_update:
-        Agent.objects.bulk_update(agents_to_update, ["name", "avatar_url"])
-        logger.info(f"{len(agents_to_update)} agents updated in bulk.")
+    result = {
+        "created": len(to_create),
+        "updated": len(to_update),
+        "deactivated": len(to_deactivate),
+        "unchanged": unchanged,
+    }
+    logger.info(f"Agents synced: {result}")
+    return result
@@ -0,0 +1,29 @@
+from django.db.models import OuterRef, Subquery
+
+from chat.models.conversation import ChatMessage, Conversation
+
+
+def refresh_last_messages(conversation_ids, batch_size=500):
+    """
+    Copy the newest message of the given conversations into their
+    last_message and last_message_at fields.
+    Called after messages are ingested, so listing conversations does not
+    need a subquery per row.
+    :param conversation_ids: Iterable of conversation IDs whose messages changed
+    :param batch_size: Conversations updated per UPDATE statement
+    :return: Number of updated conversations
+    """
+    newest_message = ChatMessage.objects.filter(
+        conversation_id=OuterRef("id")
+    ).order_by("-created_at", "-id")
+
+    conversation_ids = list(dict.fromkeys(conversation_ids))
+    updated_count = 0
+    for start in range(0, len(conversation_ids), batch_size):
+        updated_count += Conversation.objects.filter(
+            id__in=conversation_ids[start : start + batch_size]
+        ).update(
+            last_message=Subquery(newest_message.values("content")[:1]),
+            last_message_at=Subquery(newest_message.values("created_at")[:1]),
+        )
+    return updated_count
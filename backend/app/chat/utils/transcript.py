@@ -0,0 +1,41 @@
+from itertools import islice
+
+from django.db.models import QuerySet
+
+from chat.models.conversation import ChatMessage
+
+TRANSCRIPT_BATCH_SIZE = 200
+
+
+def iter_conversation_transcripts(conversations, batch_size=TRANSCRIPT_BATCH_SIZE):
+    """
+    Build the "sender_type: content" transcripts of conversations.
+    Messages of batch_size conversations are fetched with a single query as
+    plain tuples, so no per conversation query or serializer is involved.
+    Conversations without messages are skipped.
+    :param conversations: Conversation queryset or iterable.
+    :param batch_size: Number of conversations whose messages are fetched at once.
+    :return: Generator of (conversation, transcript) tuples in input order.
+    """
+    if isinstance(conversations, QuerySet):
+        conversations = conversations.iterator(chunk_size=batch_size)
+    conversations = iter(conversations)
+
+    while True:
+        batch = list(islice(conversations, batch_size))
+        if not batch:
+            return
+
+        lines = {}
+        for conversation_id, sender_type, content in (
+            ChatMessage.objects.filter(
+                conversation_id__in=[conversation.id for conversation in batch],
+            )
+            .order_by("conversation_id", "created_at")
+            .values_list("conversation_id", "sender_type", "content")
+        ):
+            lines.setdefault(conversation_id, []).append(f"{sender_type}: {content}")
+
+        for conversation in batch:
+            if conversation.id in lines:
+                yield conversation, "\n".join(lines[conversation.id])
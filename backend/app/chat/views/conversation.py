@@ -1,6 +1,8 @@
-from django.db.models import Subquery, OuterRef
+from django.db.models import F
+from rest_framework.exceptions import ValidationError
 
 from common.base.base_api_view import BaseAPIView, BaseListAPIView, ResponseStatus
+from common.base.pagination import KeysetPagination
 from chat.serializers.conversation import ChatMessageSerializer, ConversationSerializer
 from chat.models.conversation import ChatMessage, Conversation
 
@@ -8,25 +10,41 @@ from chat.models.conversation import ChatMessage, Conversation
 class ConversationListView(BaseListAPIView):
     """
     API view to list conversations.
+    Supports keyset pagination (cursor, page_size) and field projection
+    (fields=id,title,last_message).
     """
 
     serializer_class = ConversationSerializer
+    pagination_class = KeysetPagination
 
-    def get_queryset(self):
-        last_message_subquery = (
-            ChatMessage.objects.filter(conversation_id=OuterRef("id"))
-            .order_by("-created_at")
-            .values("content")[:1]
-        )
+    def get_fields(self):
+        fields = self.request.query_params.get("fields")
+        if not fields:
+            return None
+        fields = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = set(fields) - set(ConversationSerializer.FIELDS)
+        if unknown:
+            raise ValidationError({"fields": f"Unknown fields: {sorted(unknown)}"})
+        return fields
 
-        queryset = Conversation.objects.filter(user=self.request.user).annotate(
-            last_message=Subquery(last_message_subquery)
-        )
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.get_fields()
+        return context
+
+    def get_queryset(self):
+        queryset = Conversation.objects.filter(user=self.request.user)
         if "agent_id" in self.kwargs:
             agent_id = self.kwargs.get("agent_id")
             queryset = queryset.filter(agent_id=agent_id)
 
-        return queryset.order_by("-created_at")
+        fields = self.get_fields()
+        if fields:
+            # The cursor needs id and created_at.
+            queryset = queryset.only("id", "created_at", *fields)
+
+        # Same order as KeysetPagination, served by conv_user_created_idx.
+        return queryset.order_by(F("created_at").desc(nulls_last=True), "-id")
 
 
 class ConversationDetailView(BaseAPIView):
@@ -12,4 +12,6 @@ include(
     "logging.py",
     "celery.py",
     "qdrant.py",
+    "jotform.py",
+    "cache.py",
 )
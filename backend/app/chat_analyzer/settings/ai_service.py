@@ -2,3 +2,33 @@ from os import environ
 
 AI_SERVICE_URL = environ.get("AI_SERVICE_URL")
 AI_SERVICE_TOKEN = environ.get("AI_SERVICE_TOKEN")
+
+# Embeddings
+EMBEDDING_BATCH_SIZE = int(environ.get("EMBEDDING_BATCH_SIZE", 128))
+EMBEDDING_BATCH_MAX_TOKENS = int(environ.get("EMBEDDING_BATCH_MAX_TOKENS", 250000))
+EMBEDDING_CACHE_ENABLED = environ.get("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+# Vectors kept in the in-process LRU tier (3072 float32 dimensions are 12 KB each).
+EMBEDDING_CACHE_MEMORY_SIZE = int(environ.get("EMBEDDING_CACHE_MEMORY_SIZE", 2000))
+
+# Concurrent analysis runner
+AI_SERVICE_CONCURRENCY = int(environ.get("AI_SERVICE_CONCURRENCY", 8))
+# Analysis results are saved with one bulk_update per this many conversations.
+ANALYSIS_SAVE_BATCH_SIZE = int(environ.get("ANALYSIS_SAVE_BATCH_SIZE", 100))
+AI_SERVICE_RATE_LIMITS = {
+    "openai": {
+        "requests_per_minute": int(environ.get("OPENAI_REQUESTS_PER_MINUTE", 500)),
+        "tokens_per_minute": int(environ.get("OPENAI_TOKENS_PER_MINUTE", 200000)),
+    },
+    "claude": {
+        "requests_per_minute": int(environ.get("CLAUDE_REQUESTS_PER_MINUTE", 50)),
+        "tokens_per_minute": int(environ.get("CLAUDE_TOKENS_PER_MINUTE", 40000)),
+    },
+    "replicate": {
+        "requests_per_minute": int(environ.get("REPLICATE_REQUESTS_PER_MINUTE", 60)),
+    },
+}
+
+# Response cache
+AI_RESPONSE_CACHE_ENABLED = environ.get("AI_RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+AI_RESPONSE_CACHE_TTL = int(environ.get("AI_RESPONSE_CACHE_TTL", 60 * 60 * 24 * 30))
+AI_RESPONSE_CACHE_MAX_ENTRIES = int(environ.get("AI_RESPONSE_CACHE_MAX_ENTRIES", 50000))
@@ -45,3 +45,7 @@ SIMPLE_JWT = {
     "JTI_CLAIM": "jti",
     "SLIDING_TOKEN_REFRESH_EXP_CLAIM": "refresh_exp",
 }
+
+# Keyset pagination of list endpoints (e.g. conversations)
+KEYSET_PAGE_SIZE = int(environ.get("KEYSET_PAGE_SIZE", 50))
+KEYSET_MAX_PAGE_SIZE = int(environ.get("KEYSET_MAX_PAGE_SIZE", 500))
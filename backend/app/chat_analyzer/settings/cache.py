@@ -0,0 +1,47 @@
+from os import environ
+
+# Caches shared by the web and Celery processes, used for API responses.
+# "default" holds the responses, "versions" the per agent and per user
+# version keys, apart so culling responses never drops a version.
+# Redis (the redis service of docker-compose) by default, so cached reads
+# do not touch Postgres. RESPONSE_CACHE_BACKEND=db switches to database
+# tables created with `python manage.py createcachetable`.
+RESPONSE_CACHE_BACKEND = environ.get("RESPONSE_CACHE_BACKEND", "redis")
+REDIS_URL = environ.get("REDIS_URL", "redis://redis:6379/1")
+RESPONSE_CACHE_MAX_ENTRIES = int(environ.get("RESPONSE_CACHE_MAX_ENTRIES", 50000))
+# 1 / CULL_FREQUENCY of the entries is removed when the table is full.
+RESPONSE_CACHE_CULL_FREQUENCY = int(environ.get("RESPONSE_CACHE_CULL_FREQUENCY", 10))
+
+if RESPONSE_CACHE_BACKEND == "redis":
+    # Memory is bounded by the maxmemory policy of the Redis server.
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        },
+        "versions": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "versions",
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "response_cache",
+            "OPTIONS": {
+                "MAX_ENTRIES": RESPONSE_CACHE_MAX_ENTRIES,
+                "CULL_FREQUENCY": RESPONSE_CACHE_CULL_FREQUENCY,
+            },
+        },
+        "versions": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "response_cache_version",
+            # One row per agent and user, never culled in practice.
+            "OPTIONS": {"MAX_ENTRIES": 10000000},
+        },
+    }
+
+# Seconds a cached API response is kept, versions are bumped on writes
+RESPONSE_CACHE_TIMEOUT = int(environ.get("RESPONSE_CACHE_TIMEOUT", 60 * 60))
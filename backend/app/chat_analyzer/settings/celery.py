@@ -37,4 +37,12 @@ CELERY_BEAT_SCHEDULE = {
         "task": "analyze.tasks.ai_tasks.get_context_change_analysis_task",
         "schedule": crontab(minute="*/30"),
     },
+    "rebuild_missing_agent_statistics": {
+        "task": "analyze.tasks.ai_tasks.rebuild_missing_agent_statistics_task",
+        "schedule": crontab(minute=45),  # runs every hour at minute 45
+    },
+    "prune_service_logs": {
+        "task": "common.tasks.log_tasks.prune_service_logs_task",
+        "schedule": crontab(hour=3, minute=0),  # runs every day at 03:00
+    },
 }
@@ -0,0 +1,16 @@
+from os import environ
+
+# HTTP connection pool shared by JotFormAPIService instances
+JOTFORM_POOL_SIZE = int(environ.get("JOTFORM_POOL_SIZE", 10))
+JOTFORM_CONNECT_TIMEOUT = float(environ.get("JOTFORM_CONNECT_TIMEOUT", 5))
+JOTFORM_READ_TIMEOUT = float(environ.get("JOTFORM_READ_TIMEOUT", 30))
+JOTFORM_MAX_RETRIES = int(environ.get("JOTFORM_MAX_RETRIES", 3))
+JOTFORM_BACKOFF_FACTOR = float(environ.get("JOTFORM_BACKOFF_FACTOR", 1))
+
+# Chat histories fetched in parallel, limited per API key
+JOTFORM_CONCURRENCY = int(environ.get("JOTFORM_CONCURRENCY", 8))
+JOTFORM_REQUESTS_PER_MINUTE = int(environ.get("JOTFORM_REQUESTS_PER_MINUTE", 120))
+
+# Items requested per page of the paginated list endpoints
+JOTFORM_PAGE_SIZE = int(environ.get("JOTFORM_PAGE_SIZE", 500))
+JOTFORM_AGENT_PAGE_SIZE = int(environ.get("JOTFORM_AGENT_PAGE_SIZE", 50))
@@ -13,6 +13,40 @@ if "django.log" not in os.listdir(os.path.join(MEDIA_ROOT, "logs")):
     with open(os.path.join(MEDIA_ROOT, "logs", "django.log"), "w") as f:
         f.write("Django log file created.\n")
 
+# Background writer of AI, Qdrant and JotForm service logs
+SERVICE_LOG_ASYNC = os.getenv("SERVICE_LOG_ASYNC", "true").lower() == "true"
+SERVICE_LOG_QUEUE_SIZE = int(os.getenv("SERVICE_LOG_QUEUE_SIZE", 10000))
+SERVICE_LOG_BATCH_SIZE = int(os.getenv("SERVICE_LOG_BATCH_SIZE", 500))
+SERVICE_LOG_FLUSH_INTERVAL = float(os.getenv("SERVICE_LOG_FLUSH_INTERVAL", 2))
+
+# Payload policy per service log, errors are always stored in full
+SERVICE_LOG_POLICIES = {
+    "default": {},
+    "ai": {
+        "success_sample_rate": float(os.getenv("AI_LOG_SAMPLE_RATE", 1)),
+        "max_string_length": 20000,
+        "max_payload_bytes": 200000,
+    },
+    "embedding": {
+        "success_sample_rate": float(os.getenv("EMBEDDING_LOG_SAMPLE_RATE", 0.1)),
+        "max_array_items": 20,
+        "max_string_length": 2000,
+        "max_payload_bytes": 50000,
+    },
+    "qdrant": {
+        "success_sample_rate": float(os.getenv("QDRANT_LOG_SAMPLE_RATE", 1)),
+        "max_array_items": 20,
+        "max_string_length": 2000,
+        "max_payload_bytes": 50000,
+    },
+    "jotform": {
+        "success_sample_rate": float(os.getenv("JOTFORM_LOG_SAMPLE_RATE", 1)),
+    },
+}
+
+# Retention of service and task logs, see prune_service_logs
+SERVICE_LOG_RETENTION_DAYS = int(os.getenv("SERVICE_LOG_RETENTION_DAYS", 30))
+SERVICE_LOG_ARCHIVE = os.getenv("SERVICE_LOG_ARCHIVE", "false").lower() == "true"
 
 LOGGING = {
     "version": 1,
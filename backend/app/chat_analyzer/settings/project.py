@@ -72,3 +72,6 @@ TEMPLATES = [
         },
     },
 ]
+
+# File import: messages saved per bulk_create while an upload is read
+FILE_IMPORT_BATCH_SIZE = int(getenv("FILE_IMPORT_BATCH_SIZE", 1000))
@@ -1,3 +1,19 @@
 from os import environ
 
 QDRANT_SERVICE_URL = environ.get("QDRANT_SERVICE_URL")
+
+# Number of messages read, embedded and marked per step of conversations_to_qdrant
+QDRANT_PIPELINE_CHUNK_SIZE = int(environ.get("QDRANT_PIPELINE_CHUNK_SIZE", 500))
+
+# HTTP connection pool shared by QDrantService instances
+QDRANT_POOL_SIZE = int(environ.get("QDRANT_POOL_SIZE", 10))
+QDRANT_CONNECT_TIMEOUT = float(environ.get("QDRANT_CONNECT_TIMEOUT", 5))
+QDRANT_READ_TIMEOUT = float(environ.get("QDRANT_READ_TIMEOUT", 60))
+QDRANT_MAX_RETRIES = int(environ.get("QDRANT_MAX_RETRIES", 3))
+QDRANT_BACKOFF_FACTOR = float(environ.get("QDRANT_BACKOFF_FACTOR", 0.5))
+
+# Number of searches sent per /points/query/batch request
+QDRANT_QUERY_BATCH_SIZE = int(environ.get("QDRANT_QUERY_BATCH_SIZE", 100))
+
+# Rows per similarity block in local clustering (memory ~ block * points * 4 bytes)
+QDRANT_CLUSTER_BLOCK_SIZE = int(environ.get("QDRANT_CLUSTER_BLOCK_SIZE", 512))
@@ -1,7 +1,10 @@
 from datetime import datetime
+from django.utils.http import parse_etags, quote_etag
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 
+from common.utils import response_cache
+
 from .custom_auth import CustomAuthentication
 
 from .response import ResponseStatus, get_status_to_response, code_to_status
@@ -39,12 +42,15 @@ class BaseAPIView(generics.GenericAPIView):
         """
         return ResponseStatus.BAD_REQUEST, {"error": "Put request not implemented"}
 
-    def get(self, request, *args, **kwargs):
-        start = datetime.now()
+    def get_content(self, request, *args, **kwargs):
         try:
-            response_status, content = self.get_request(request, *args, **kwargs)
+            return self.get_request(request, *args, **kwargs)
         except Exception as e:
-            response_status, content = ResponseStatus.BAD_REQUEST, {"error": str(e)}
+            return ResponseStatus.BAD_REQUEST, {"error": str(e)}
+
+    def get(self, request, *args, **kwargs):
+        start = datetime.now()
+        response_status, content = self.get_content(request, *args, **kwargs)
         duration = (datetime.now() - start).total_seconds() * 1000
         return get_status_to_response(response_status, content, duration)
 
@@ -95,15 +101,62 @@ class BaseListAPIView(generics.ListAPIView):
     def get_request(self, request) -> dict:
         return ResponseStatus.SUCCESS, {"message": "List retrieved successfully"}
 
+    def get_content(self, request, *args, **kwargs):
+        response = self.list(request, *args, **kwargs)
+        return code_to_status(response.status_code), response.data
+
     def get(self, request, *args, **kwargs):
         start = datetime.now()
-        response = self.list(request, *args, **kwargs)
+        response_status, content = self.get_content(request, *args, **kwargs)
         duration = (datetime.now() - start).total_seconds() * 1000
 
         status = get_status_to_response(
-            code_to_status(response.status_code),
-            response.data,
+            response_status,
+            content,
             duration,
         )
 
         return status
+
+
+class CachedResponseMixin:
+    """
+    Serves successful GET responses of BaseAPIView or BaseListAPIView from
+    the response cache. Entries are keyed by the user, the full path and
+    the versions of the scopes returned by get_cache_scopes, so writes that
+    bump a scope make its responses miss. Responses carry an ETag, and a
+    request whose If-None-Match matches it gets an empty 304.
+    Must be listed before the base view class.
+    """
+
+    def get_cache_scopes(self, request, *args, **kwargs):
+        return [response_cache.user_scope(request.user.id)]
+
+    def get(self, request, *args, **kwargs):
+        start = datetime.now()
+        key = response_cache.make_key(
+            type(self).__name__,
+            request.user.id,
+            request.get_full_path(),
+            self.get_cache_scopes(request, *args, **kwargs),
+        )
+        entry = response_cache.get_entry(key)
+        if entry is None:
+            response_status, content = self.get_content(request, *args, **kwargs)
+            if response_status != ResponseStatus.SUCCESS:
+                duration = (datetime.now() - start).total_seconds() * 1000
+                return get_status_to_response(response_status, content, duration)
+            entry = response_cache.set_entry(key, content)
+
+        etag, content = entry
+        etag = quote_etag(etag)
+        response_status = ResponseStatus.SUCCESS
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in if_none_match or "*" in if_none_match:
+            response_status = ResponseStatus.NOT_MODIFIED
+        duration = (datetime.now() - start).total_seconds() * 1000
+        response = get_status_to_response(response_status, content, duration)
+        response["ETag"] = etag
+        # Clients keep the response but revalidate it on every use.
+        response["Cache-Control"] = "private, no-cache"
+        return response
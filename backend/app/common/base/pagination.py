@@ -0,0 +1,96 @@
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on (created_at, id), newest first.
+    Each page continues strictly after the last row of the previous one, so
+    deep pages cost the same as the first and rows inserted meanwhile are
+    neither skipped nor repeated. Rows without created_at come last.
+    Pagination is used once the request has a cursor or page_size query
+    parameter; without them the full list is returned as before.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+
+    def __init__(self):
+        self.page_size = settings.KEYSET_PAGE_SIZE
+        self.max_page_size = settings.KEYSET_MAX_PAGE_SIZE
+        self.next_cursor = None
+
+    @staticmethod
+    def encode_cursor(instance):
+        position = {
+            "created_at": instance.created_at.isoformat()
+            if instance.created_at
+            else None,
+            "id": instance.id,
+        }
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            created_at = position["created_at"]
+            if created_at is not None:
+                created_at = parse_datetime(created_at)
+                if created_at is None:
+                    raise ValueError
+            return created_at, position["id"]
+        except (ValueError, KeyError, TypeError):
+            raise ValidationError({"cursor": "Invalid cursor."})
+
+    def get_page_size(self, request):
+        page_size = request.query_params.get(self.page_size_query_param)
+        if page_size is None:
+            return self.page_size
+        try:
+            return min(max(int(page_size), 1), self.max_page_size)
+        except ValueError:
+            raise ValidationError({"page_size": "Must be an integer."})
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor is None and self.page_size_query_param not in request.query_params:
+            return None
+
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(
+            F("created_at").desc(nulls_last=True),
+            "-id",
+        )
+        if cursor:
+            created_at, last_id = self.decode_cursor(cursor)
+            if created_at is None:
+                queryset = queryset.filter(created_at__isnull=True, id__lt=last_id)
+            else:
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at)
+                    | Q(created_at=created_at, id__lt=last_id)
+                    | Q(created_at__isnull=True)
+                )
+
+        rows = list(queryset[: page_size + 1])
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            self.next_cursor = self.encode_cursor(rows[-1])
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "results": data,
+                "next_cursor": self.next_cursor,
+                "has_more": self.next_cursor is not None,
+            }
+        )
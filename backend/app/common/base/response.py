@@ -1,5 +1,5 @@
 import enum
-from django.http import JsonResponse
+from django.http import HttpResponseNotModified, JsonResponse
 from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST
 from rest_framework import status
 
@@ -15,6 +15,7 @@ class ResponseStatus(enum.Enum):
     SUCCESS = 200
     CREATED = 201
     ACCEPTED = 202
+    NOT_MODIFIED = 304
     CONFLICT = 409
     UNAUTHORIZED = 401
 
@@ -27,6 +28,7 @@ def code_to_status(code):
     code_to_status_map = {
         200: ResponseStatus.SUCCESS,
         201: ResponseStatus.CREATED,
+        304: ResponseStatus.NOT_MODIFIED,
         400: ResponseStatus.BAD_REQUEST,
         404: ResponseStatus.NOT_FOUND,
         409: ResponseStatus.CONFLICT,
@@ -59,6 +61,9 @@ def get_status_to_response(response_status, content, duration, cookies=None):
             content=content,
             duration=duration,
         )
+    elif response_status == ResponseStatus.NOT_MODIFIED:
+        # 304 responses have no body, the client reuses its cached copy.
+        return HttpResponseNotModified()
     elif response_status == ResponseStatus.BAD_REQUEST:
         return ErrorResponse(
             error_message=content,
@@ -0,0 +1,143 @@
+from analyze.models.log import AIServiceLog, QDrantServiceLog
+from common.base.base_command import CustomBaseCommand
+from common.models.log import JotFormServiceLog, Log
+
+from django.conf import settings
+from django.utils import timezone
+
+from datetime import timedelta
+import gzip
+import json
+import os
+import time
+
+# Log model and the date field retention is based on, per --logs name.
+LOG_MODELS = {
+    "ai": (AIServiceLog, "created_at"),
+    "qdrant": (QDrantServiceLog, "created_at"),
+    "jotform": (JotFormServiceLog, "created_at"),
+    "task": (Log, "start_time"),
+}
+
+
+class Command(CustomBaseCommand):
+    help = "Delete service and task logs older than the retention period in batches"
+    command_name = "prune_service_logs"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.SERVICE_LOG_RETENTION_DAYS,
+            help="Delete logs older than this many days.",
+        )
+        parser.add_argument(
+            "--logs",
+            nargs="+",
+            choices=list(LOG_MODELS.keys()),
+            default=list(LOG_MODELS.keys()),
+            help="Log tables to prune (default: all).",
+        )
+        parser.add_argument(
+            "--batch_size",
+            type=int,
+            default=5000,
+            help="Number of rows deleted per statement.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.1,
+            help="Seconds to wait between batches to let other writers through.",
+        )
+        parser.add_argument(
+            "--archive",
+            action="store_true",
+            default=settings.SERVICE_LOG_ARCHIVE,
+            help="Export rows to gzip compressed JSONL before deleting them "
+            "(default: SERVICE_LOG_ARCHIVE).",
+        )
+        parser.add_argument(
+            "--no_archive",
+            action="store_false",
+            dest="archive",
+            help="Delete rows without archiving them, overrides SERVICE_LOG_ARCHIVE.",
+        )
+        parser.add_argument(
+            "--archive_dir",
+            type=str,
+            default=os.path.join(settings.MEDIA_ROOT, "log_archive"),
+            help="Directory of the JSONL archives.",
+        )
+        parser.add_argument(
+            "--dry_run",
+            action="store_true",
+            default=False,
+            help="Only count the rows that would be deleted.",
+        )
+
+    def prune(self, model, date_field, cutoff, options):
+        """
+        Deletes the rows of model older than cutoff, one short statement per
+        batch, so no long lock is held on the table.
+        :return: Number of deleted rows.
+        """
+        expired = model.objects.filter(**{f"{date_field}__lt": cutoff})
+        if options["dry_run"]:
+            count = expired.count()
+            self.logger.info(f"{model.__name__}: {count} rows would be deleted.")
+            return 0
+
+        archive = None
+        if options["archive"]:
+            os.makedirs(options["archive_dir"], exist_ok=True)
+            archive_path = os.path.join(
+                options["archive_dir"],
+                f"{model.__name__}_{cutoff.strftime('%Y%m%d')}_{self.now.strftime('%H%M%S')}.jsonl.gz",
+            )
+            archive = gzip.open(archive_path, "at", encoding="utf-8")
+            self.logger.info(f"Archiving {model.__name__} rows to {archive_path}")
+
+        deleted = 0
+        try:
+            while True:
+                ids = list(
+                    expired.order_by("pk").values_list("pk", flat=True)[
+                        : options["batch_size"]
+                    ]
+                )
+                if not ids:
+                    break
+
+                if archive:
+                    for row in model.objects.filter(pk__in=ids).order_by("pk").values():
+                        archive.write(json.dumps(row, default=str) + "\n")
+                    # Rows are only deleted once they are in the archive.
+                    archive.flush()
+
+                count, _ = model.objects.filter(pk__in=ids).delete()
+                deleted += count
+                self.logger.info(f"{model.__name__}: deleted {deleted} rows so far.")
+                if options["sleep"]:
+                    time.sleep(options["sleep"])
+        finally:
+            if archive:
+                archive.close()
+        return deleted
+
+    def process(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        self.logger.info(f"Pruning logs older than {cutoff.isoformat()}")
+
+        results = {}
+        for name in options["logs"]:
+            model, date_field = LOG_MODELS[name]
+            try:
+                results[name] = self.prune(model, date_field, cutoff, options)
+            except Exception as e:
+                self.logger.error(
+                    f"An error occurred while pruning {model.__name__}: {str(e)}"
+                )
+
+        self.logger.info(f"Pruned logs: {results}")
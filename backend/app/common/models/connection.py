@@ -61,6 +61,21 @@ class Agent(models.Model):
         blank=True,
         help_text="List of valid labels for conversations associated with this agent.",
     )
+    is_active = models.BooleanField(
+        default=True,
+        help_text="False once the agent is no longer listed as active on JotForm.",
+    )
+    sync_cursor = models.CharField(
+        max_length=32,
+        null=True,
+        blank=True,
+        help_text="JotForm updated_at of the newest conversation already synced.",
+    )
+    statistics_built_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Last full rebuild of the daily statistics rollups, None until then.",
+    )
 
     def __str__(self):
         return f"{self.connection.connection_type} - {self.id}"
@@ -18,6 +18,7 @@ class Log(models.Model):
         JOTFORM_FETCH = "JotForm Fetch"
         EMAIL = "Email Auth"
         ANALYTICS = "Analytics"
+        MAINTENANCE = "Maintenance"
 
     task_name = models.CharField(max_length=200)
     start_time = models.DateTimeField(auto_now_add=True)
@@ -121,7 +122,13 @@ class HTTPServiceLogModel(models.Model):
     def save(self, *args, **kwargs):
         # Call the parent class's save method
         super().save(*args, **kwargs)
+        self.write_file_log()
 
+    def write_file_log(self):
+        """
+        Appends the log entry to http_requests.log.
+        Called by save and by the background log sink after bulk inserts.
+        """
         # Log the model's fields to a log file
         if self.status_code:
             logger = logging.getLogger(__name__)
@@ -56,7 +56,9 @@ class AgentSerializer(serializers.ModelSerializer):
             "connection",
             "jotform_render_url",
             "label_choices",
+            "is_active",
         ]
+        read_only_fields = ["is_active"]
 
     def to_representation(self, instance):
         return {
@@ -65,6 +67,7 @@ class AgentSerializer(serializers.ModelSerializer):
             "name": instance.name,
             "jotform_render_url": instance.jotform_render_url,
             "label_choices": instance.label_choices,
+            "is_active": instance.is_active,
         }
 
     def validate_id(self, value):
@@ -115,6 +118,7 @@ class AgentDetailSerializer(serializers.ModelSerializer):
             "neutral_count": statistics.get("neutral_count"),
             "negative_count": statistics.get("negative_count"),
             "super_negative_count": statistics.get("super_negative_count"),
+            "label_counts": statistics.get("label_counts", {}),
         }
 
 
@@ -1 +1,2 @@
 from .email_tasks import *  # noqa: F401, F403
+from .log_tasks import *  # noqa: F401, F403
@@ -0,0 +1,38 @@
+from celery import shared_task
+from celery.signals import task_postrun, worker_process_shutdown
+from django.core import management
+from common.models.log import Log
+from common.utils.service_log_sink import service_log_sink
+
+
+@task_postrun.connect
+def flush_service_logs(**kwargs):
+    """
+    Write the service logs a task queued before its worker takes the next one.
+    """
+    service_log_sink.flush()
+
+
+@worker_process_shutdown.connect
+def close_service_log_sink(**kwargs):
+    """
+    Prefork children leave with os._exit, which skips the atexit flush of
+    the service log sink, so it is closed here.
+    """
+    service_log_sink.close()
+
+
+@shared_task
+def prune_service_logs_task():
+    """
+    Delete service and task logs older than SERVICE_LOG_RETENTION_DAYS.
+    """
+    log = Log(task_name="Prune Service Logs", category=Log.Category.MAINTENANCE)
+    log.save()
+    try:
+        management.call_command("prune_service_logs")
+    except Exception as e:
+        log.complete_task_error(f"Error pruning service logs: {e}")
+        return False
+    log.complete_task("Service logs pruned")
+    return True
@@ -4,6 +4,7 @@ from common.views.health import (
     JotFormApiChatCheckView,
     PingView,
     JotFormApiCheckView,
+    QDrantPoolStatsView,
 )
 
 health_urlpatterns = [
@@ -14,4 +15,5 @@ health_urlpatterns = [
         JotFormApiChatCheckView.as_view(),
         name="jotform_api_chat_check",
     ),
+    path("qdrant-pool/", QDrantPoolStatsView.as_view(), name="qdrant_pool_stats"),
 ]
@@ -0,0 +1,77 @@
+from django.utils import timezone
+
+
+class BulkUpdateBuffer:
+    """
+    Collects changed model instances and writes them with bulk_update, only
+    for the fields that changed, once batch_size instances are pending.
+    Use it as a context manager: pending instances are flushed on exit, also
+    when the block raises or is interrupted, so finished work is not lost.
+    auto_now fields (e.g. modified_at) are set on flush since bulk_update
+    does not call pre_save.
+    on_flush, if given, is called with the primary keys of every flushed
+    batch, e.g. to refresh data derived from the updated rows.
+    """
+
+    def __init__(self, model, batch_size=100, logger=None, on_flush=None):
+        self.model = model
+        self.batch_size = max(batch_size, 1)
+        self.logger = logger
+        self.on_flush = on_flush
+        self.pending = {}
+        self.updated_count = 0
+        self.auto_now_fields = [
+            field.name
+            for field in model._meta.concrete_fields
+            if getattr(field, "auto_now", False)
+        ]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+        return False
+
+    def add(self, instance, fields):
+        """
+        Queues instance to be saved with the given changed fields.
+        """
+        if not fields:
+            return
+        _, pending_fields = self.pending.get(instance.pk, (instance, set()))
+        self.pending[instance.pk] = (instance, pending_fields | set(fields))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the pending instances, one bulk_update per distinct field set.
+        :return: Number of updated rows.
+        """
+        if not self.pending:
+            return 0
+
+        now = timezone.now()
+        pks = list(self.pending)
+        groups = {}
+        for instance, fields in self.pending.values():
+            for field in self.auto_now_fields:
+                setattr(instance, field, now)
+            groups.setdefault(frozenset(fields), []).append(instance)
+        self.pending = {}
+
+        updated_count = 0
+        for fields, instances in groups.items():
+            updated_count += self.model.objects.bulk_update(
+                instances,
+                fields=sorted(fields) + self.auto_now_fields,
+            )
+        self.updated_count += updated_count
+        if self.on_flush:
+            self.on_flush(pks)
+        if self.logger:
+            self.logger.info(
+                f"Saved {updated_count} {self.model.__name__} rows in bulk."
+            )
+        return updated_count
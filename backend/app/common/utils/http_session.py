@@ -0,0 +1,97 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+def build_session(
+    pool_size=10,
+    max_retries=3,
+    backoff_factor=0.5,
+    status_forcelist=RETRY_STATUS_CODES,
+):
+    """
+    Create a requests session with a keep-alive connection pool and retry with
+    exponential backoff on connection errors and the given status codes.
+    :param pool_size: Maximum number of kept-alive connections per host.
+    :param max_retries: Number of retries before the last response is returned.
+    :param backoff_factor: Sleep between retries is backoff_factor * 2 ** (retry - 1).
+    :param status_forcelist: Status codes that are retried.
+    :return: requests.Session
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=status_forcelist,
+        allowed_methods=frozenset(["GET", "PUT", "POST", "DELETE"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_pool_stats(session):
+    """
+    Connection pool statistics of a session, one entry per host.
+    :return: List of dicts with host, port, maxsize, idle, connections_created
+        and requests.
+    """
+    stats = []
+    adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+    for adapter in adapters.values():
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            idle = [conn for conn in list(pool.pool.queue) if conn is not None]
+            stats.append(
+                {
+                    "host": pool.host,
+                    "port": pool.port,
+                    "maxsize": pool.pool.maxsize,
+                    "idle": len(idle),
+                    "connections_created": pool.num_connections,
+                    "requests": pool.num_requests,
+                }
+            )
+    return stats
+
+
+class SharedSession:
+    """
+    Lazily creates one pooled session per process and shares it between
+    threads. A forked worker (e.g. Celery prefork) gets its own session
+    instead of reusing the parent's sockets.
+    """
+
+    def __init__(self, **session_kwargs):
+        self.session_kwargs = session_kwargs
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    self._session = build_session(**self.session_kwargs)
+                    self._pid = os.getpid()
+        return self._session
+
+    def stats(self):
+        if self._session is None or self._pid != os.getpid():
+            return []
+        return get_pool_stats(self._session)
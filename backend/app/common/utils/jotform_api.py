@@ -1,10 +1,15 @@
 from common.models.connection import Connection
 from common.models.log import JotFormServiceLog
+from common.utils.http_session import SharedSession
+from common.utils.rate_limiter import get_rate_limiter
+from common.utils.service_log_sink import service_log_sink
 from common.constants.sources import (
     JOTFORM_API_BASE_URL,
     SOURCE_JOTFORM,
 )
 
+from django.conf import settings
+
 import requests
 import json
 
@@ -12,48 +17,66 @@ import json
 class JotFormAPIService:
     """
     Service class to interact with JotForm API.
+    All instances in a process share one keep-alive connection pool, and
+    requests made with the same API key share one rate limit, so the calls
+    can be made from several threads.
     """
 
     user = None
     api_key = None
     config = None
+    shared_session = SharedSession(
+        pool_size=settings.JOTFORM_POOL_SIZE,
+        max_retries=settings.JOTFORM_MAX_RETRIES,
+        backoff_factor=settings.JOTFORM_BACKOFF_FACTOR,
+    )
 
-    def __init__(self, user, *args, **kwargs):
+    def __init__(self, user, *args, connection=None, **kwargs):
+        """
+        :param connection: JotForm connection to use, the first JotForm
+            connection of user by default.
+        """
         super().__init__(*args, **kwargs)
         self.user = user
-        connection = Connection.objects.filter(
-            user=self.user,
-            connection_type=SOURCE_JOTFORM,
-        ).first()
+        if connection is None:
+            connection = Connection.objects.filter(
+                user=self.user,
+                connection_type=SOURCE_JOTFORM,
+            ).first()
         if not connection:
             raise ValueError("No JotForm connection found for user.")
         self.connection = connection
         self.config = connection.config
         self.api_key = connection.api_key
-
-    def get_request(self, endpoint, params):
-        log = JotFormServiceLog.objects.create(
-            endpoint=endpoint,
-            http_method="GET",
-            request_payload={"headers": params},
+        self.timeout = (settings.JOTFORM_CONNECT_TIMEOUT, settings.JOTFORM_READ_TIMEOUT)
+        self.rate_limiter = get_rate_limiter(
+            f"jotform:{self.api_key}",
+            requests_per_minute=settings.JOTFORM_REQUESTS_PER_MINUTE,
         )
 
-        response = requests.get(
+    def get_request(self, endpoint, params):
+        self.rate_limiter.acquire()
+        response = self.shared_session.get().get(
             endpoint,
             params=params,
+            timeout=self.timeout,
         )
         data = response.json()
         response_code = data.get("responseCode", response.status_code)
 
         # log
-        log.response_payload = data
-        log.status_code = response.status_code
-
+        log = JotFormServiceLog(
+            endpoint=endpoint,
+            http_method="GET",
+            request_payload={"headers": params},
+            response_payload=data,
+            status_code=response.status_code,
+        )
         if response_code == 200:
             log.status = JotFormServiceLog.SUCCESS
         else:
             log.status = JotFormServiceLog.ERROR
-        log.save()
+        service_log_sink.submit(log, policy="jotform")
         return response
 
     @staticmethod
@@ -91,10 +114,90 @@ class JotFormAPIService:
         response_code = data.get("responseCode", response.status_code)
         return response_code, data
 
+    def iter_pages(self, url, params, page_size):
+        """
+        Follow offset/limit pagination of a JotForm list endpoint.
+        Pages are requested until one returns fewer than page_size items.
+        :param url: Endpoint URL.
+        :param params: Query parameters without offset and limit.
+        :param page_size: Number of items requested per page.
+        :return: Generator of (response_code, content) tuples, one per page.
+            On an error the error tuple is the last one yielded.
+        """
+        if not self.api_key:
+            yield 100, {
+                "error": "No JotForm connection found for user.",
+            }
+            return
+
+        offset = 0
+        while True:
+            response = self.get_request(
+                url,
+                params={
+                    "apiKey": self.api_key,
+                    **params,
+                    "offset": offset,
+                    "limit": page_size,
+                },
+            )
+            try:
+                data = response.json()
+            except ValueError:
+                yield response.status_code, {
+                    "error": response.text,
+                }
+                return
+
+            response_code = data.get("responseCode", response.status_code)
+            if response_code != 200:
+                yield response_code, {
+                    "error": data.get("message", "Unknown error"),
+                }
+                return
+
+            content = data.get("content") or []
+            yield response_code, content
+            if len(content) < page_size:
+                return
+            offset += len(content)
+
+    @staticmethod
+    def collect_pages(pages):
+        """
+        Join every page of iter_pages into one list.
+        :return: A tuple containing the response code and content, the
+            first error if any page failed.
+        """
+        items = []
+        for response_code, content in pages:
+            if response_code != 200:
+                return response_code, content
+            items.extend(content)
+        return 200, items
+
+    def iter_agent_conversations(self, agent_id, filter=None, page_size=None):
+        """
+        Retrieve the conversations of an agent page by page.
+        :param agent_id: The ID of the JotForm agent.
+        :param filter: Optional JotForm filter, see get_agent_conversations.
+        :param page_size: Conversations per request, JOTFORM_PAGE_SIZE by default.
+        :return: Generator of (response_code, content) tuples.
+        """
+        url = f"{JOTFORM_API_BASE_URL}/ai-agent/agent/{agent_id}/conversations"
+        return self.iter_pages(
+            url,
+            params={
+                "orderby": "created_at,asc",
+                "filter": json.dumps(filter) if filter else None,
+            },
+            page_size=page_size or settings.JOTFORM_PAGE_SIZE,
+        )
+
     def get_agent_conversations(self, agent_id, filter=None):
         """
-        Retrieve chat history for a specific chat ID from JotForm API.
-        :param chat_id: The ID of the chat to fetch history for.
+        Retrieve every conversation of an agent from JotForm API.
+        :param agent_id: The ID of the JotForm agent.
         :return: A tuple containing the response code and content.
 
         Example of filter:
@@ -102,34 +205,26 @@ class JotFormAPIService:
             "updated_at:gt": "2025-08-12 09:52:40"
         }
         """
-        if not self.api_key:
-            return 100, {
-                "error": "No JotForm connection found for user.",
-            }
+        return self.collect_pages(self.iter_agent_conversations(agent_id, filter))
 
-        url = f"{JOTFORM_API_BASE_URL}/ai-agent/agent/{agent_id}/conversations"
-        response = self.get_request(
+    def iter_chat_history(self, agent_id="", chat_id="", filter=None, page_size=None):
+        """
+        Retrieve the messages of a chat page by page.
+        :param agent_id: The ID of the JotForm agent.
+        :param chat_id: The ID of the chat to fetch history for.
+        :param filter: Optional JotForm filter, see get_chat_history.
+        :param page_size: Messages per request, JOTFORM_PAGE_SIZE by default.
+        :return: Generator of (response_code, content) tuples.
+        """
+        url = f"{JOTFORM_API_BASE_URL}/ai-agent/{agent_id}/chat/{chat_id}/history"
+        return self.iter_pages(
             url,
             params={
-                "apiKey": self.api_key,
                 "orderby": "created_at,asc",
                 "filter": json.dumps(filter) if filter else None,
-                "limit": 500,
             },
+            page_size=page_size or settings.JOTFORM_PAGE_SIZE,
         )
-        try:
-            data = response.json()
-            response_code = data.get("responseCode", response.status_code)
-            if response_code != 200:
-                return response_code, {
-                    "error": data.get("message", "Unknown error"),
-                }
-
-            return response_code, data.get("content", [])
-        except ValueError:
-            return response.status_code, {
-                "error": response.text,
-            }
 
     def get_chat_history(
         self,
@@ -138,7 +233,7 @@ class JotFormAPIService:
         filter=None,
     ):
         """
-        Retrieve chats for a specific agent from JotForm API.
+        Retrieve the whole history of a chat from JotForm API.
         param agent_id: The ID of the JotForm agent.
         param chat_id: The ID of the chat to fetch history for.
         :return: A tuple containing the response code and content.
@@ -149,66 +244,29 @@ class JotFormAPIService:
             "created_at:gt": "2025-08-12 09:52:40"
         }
         """
-        if not self.api_key:
-            return 100, {
-                "error": "No JotForm connection found for user.",
-            }
-        url = f"{JOTFORM_API_BASE_URL}/ai-agent/{agent_id}/chat/{chat_id}/history"
-        response = self.get_request(
-            url,
-            params={
-                "apiKey": self.api_key,
-                "orderby": "created_at,asc",
-                "filter": json.dumps(filter) if filter else None,
-                "limit": 500,
-            },
-        )
-        try:
-            data = response.json()
-            response_code = data.get("responseCode", response.status_code)
-            if response_code != 200:
-                return response_code, {
-                    "error": data.get("message", "Unknown error"),
-                }
+        return self.collect_pages(self.iter_chat_history(agent_id, chat_id, filter))
 
-            return response_code, data.get("content", [])
-        except ValueError:
-            return response.status_code, {
-                "error": response.text,
-            }
-
-    def get_agents(self):
+    def iter_agents(self, page_size=None):
         """
-        Retrieve all JotForm agents for the user.
-        :return: A tuple containing the response code and content.
+        Retrieve the JotForm agents of the user page by page.
+        :param page_size: Agents per request, JOTFORM_AGENT_PAGE_SIZE by default.
+        :return: Generator of (response_code, content) tuples.
         """
-        if not self.api_key:
-            return 100, {
-                "error": "No JotForm connection found for user.",
-            }
-
         url = f"{JOTFORM_API_BASE_URL}/listings/mixed-listing/assets"
-        response = self.get_request(
+        return self.iter_pages(
             url,
             params={
-                "apiKey": self.api_key,
                 "status": "active",
                 "assetTypes[0]": "ai-agent",
-                "limit": 50,
                 "addAIAgents": 1,
                 "orderby": "created_at",
             },
+            page_size=page_size or settings.JOTFORM_AGENT_PAGE_SIZE,
         )
-        try:
-            data = response.json()
-            response_code = data.get("responseCode", response.status_code)
-            if response_code != 200:
-                return response_code, {
-                    "error": data.get("message", "Unknown error"),
-                }
 
-            return response_code, data.get("content", [])
-        except ValueError:
-            return response.status_code, {
-                "error": response.text,
-            }
+    def get_agents(self):
+        """
+        Retrieve all JotForm agents for the user.
+        :return: A tuple containing the response code and content.
+        """
+        return self.collect_pages(self.iter_agents())
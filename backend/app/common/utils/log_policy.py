@@ -0,0 +1,103 @@
+import json
+import random
+from numbers import Number
+
+from django.conf import settings
+
+
+class LogPayloadPolicy:
+    """
+    Decides whether a service log is stored and how much of its payloads.
+    Error logs are always stored in full. Success logs are sampled at
+    success_sample_rate and their payloads are summarized: numeric arrays
+    longer than max_array_items (e.g. embedding vectors) are replaced by
+    their shape, other lists are cut to max_array_items, strings to
+    max_string_length, and a payload still above max_payload_bytes is kept
+    only as a preview.
+    """
+
+    def __init__(
+        self,
+        success_sample_rate=1.0,
+        max_array_items=50,
+        max_string_length=10000,
+        max_payload_bytes=100000,
+    ):
+        self.success_sample_rate = success_sample_rate
+        self.max_array_items = max_array_items
+        self.max_string_length = max_string_length
+        self.max_payload_bytes = max_payload_bytes
+
+    @staticmethod
+    def is_number(value):
+        return isinstance(value, Number) and not isinstance(value, bool)
+
+    def summarize(self, value):
+        if isinstance(value, dict):
+            return {key: self.summarize(item) for key, item in value.items()}
+
+        if isinstance(value, list):
+            # Only the first item is inspected, arrays are assumed homogeneous.
+            if value and self.is_number(value[0]) and len(value) > self.max_array_items:
+                return {"_array": "numeric", "shape": [len(value)]}
+            if (
+                value
+                and isinstance(value[0], list)
+                and value[0]
+                and self.is_number(value[0][0])
+                and len(value[0]) > self.max_array_items
+            ):
+                return {"_array": "numeric", "shape": [len(value), len(value[0])]}
+
+            items = [self.summarize(item) for item in value[: self.max_array_items]]
+            if len(value) > self.max_array_items:
+                items.append({"_truncated_items": len(value) - self.max_array_items})
+            return items
+
+        if isinstance(value, str) and len(value) > self.max_string_length:
+            return (
+                value[: self.max_string_length]
+                + f"... [{len(value) - self.max_string_length} more characters]"
+            )
+        return value
+
+    def cap(self, value):
+        value = self.summarize(value)
+        serialized = json.dumps(value, default=str)
+        if len(serialized) <= self.max_payload_bytes:
+            return value
+        return {
+            "_truncated": True,
+            "size": len(serialized),
+            "preview": serialized[: self.max_payload_bytes],
+        }
+
+    def apply(self, log):
+        """
+        Replaces the payloads of log with summarized copies, the objects
+        they were set from are left untouched.
+        :return: False if the log is sampled out and should not be stored.
+        """
+        if log.status == log.ERROR:
+            return True
+        if random.random() >= self.success_sample_rate:
+            return False
+        log.request_payload = self.cap(log.request_payload)
+        log.response_payload = self.cap(log.response_payload)
+        return True
+
+
+_policies = {}
+
+
+def get_log_policy(name):
+    """
+    Returns the LogPayloadPolicy configured in SERVICE_LOG_POLICIES under
+    name, or the default policy.
+    """
+    if name not in _policies:
+        config = settings.SERVICE_LOG_POLICIES.get(
+            name, settings.SERVICE_LOG_POLICIES["default"]
+        )
+        _policies[name] = LogPayloadPolicy(**config)
+    return _policies[name]
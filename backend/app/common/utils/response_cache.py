@@ -0,0 +1,143 @@
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from chat.models.conversation import Conversation
+from common.models.connection import Agent
+
+VERSION_KEY_PREFIX = "response_cache:version"
+ENTRY_KEY_PREFIX = "response_cache:entry"
+
+# Versions live in their own cache, so culling entries never drops them.
+entry_cache = caches["default"]
+version_cache = caches["versions"]
+
+
+def agent_scope(agent_id):
+    return f"agent:{agent_id}"
+
+
+def user_scope(user_id):
+    return f"user:{user_id}"
+
+
+def get_versions(scopes):
+    """
+    Current version of each scope. Versions are random tokens, so a scope
+    whose version was evicted never gets an old version back.
+    :return: Dict of scope -> version
+    """
+    keys = {f"{VERSION_KEY_PREFIX}:{scope}": scope for scope in scopes}
+    versions = version_cache.get_many(list(keys))
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            # add keeps the version of a concurrent request that set it first
+            version_cache.add(key, uuid.uuid4().hex, timeout=None)
+        versions.update(version_cache.get_many(missing))
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def bump_versions(scopes):
+    """
+    Give the scopes new versions, so every response cached for them is
+    missed. Inside a transaction the bump waits for the commit, otherwise a
+    request could cache the data being replaced.
+    """
+    scopes = set(scopes)
+    if not scopes:
+        return
+    transaction.on_commit(
+        lambda: version_cache.set_many(
+            {f"{VERSION_KEY_PREFIX}:{scope}": uuid.uuid4().hex for scope in scopes},
+            timeout=None,
+        )
+    )
+
+
+def invalidate_agents(agent_ids, user_ids=()):
+    """
+    Bump the versions of agents and of the users owning them.
+    :param user_ids: Owners to bump as well, for agents that are deleted
+        before the lookup could find them.
+    """
+    agent_ids = set(agent_ids)
+    user_ids = set(user_ids)
+    if agent_ids:
+        user_ids.update(
+            Agent.objects.filter(id__in=agent_ids)
+            .values_list("connection__user_id", flat=True)
+            .distinct()
+        )
+    bump_versions(
+        [agent_scope(agent_id) for agent_id in agent_ids]
+        + [user_scope(user_id) for user_id in user_ids]
+    )
+
+
+def invalidate_conversations(conversation_ids, batch_size=1000):
+    """
+    Bump the versions of the agents and users of written conversations.
+    """
+    conversation_ids = list(dict.fromkeys(conversation_ids))
+    scopes = set()
+    for start in range(0, len(conversation_ids), batch_size):
+        batch = conversation_ids[start : start + batch_size]
+        for agent_id, user_id in (
+            Conversation.objects.filter(id__in=batch)
+            .values_list("agent_id", "user_id")
+            .distinct()
+        ):
+            if agent_id:
+                scopes.add(agent_scope(agent_id))
+            if user_id:
+                scopes.add(user_scope(user_id))
+    bump_versions(scopes)
+
+
+def make_key(name, user_id, path, scopes):
+    """
+    Key of a cached response. It changes whenever one of the scopes the
+    response depends on is bumped.
+    """
+    raw = json.dumps(
+        {
+            "name": name,
+            "user": user_id,
+            "path": path,
+            "versions": get_versions(scopes),
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return f"{ENTRY_KEY_PREFIX}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+
+def get_entry(key):
+    """
+    :return: Tuple of (etag, content), or None on a miss.
+    """
+    entry = entry_cache.get(key)
+    if entry is None:
+        return None
+    return entry["etag"], json.loads(entry["content"])
+
+
+def set_entry(key, content):
+    """
+    Cache the content of a response, its ETag is the hash of the content.
+    :return: Tuple of (etag, content)
+    """
+    raw = json.dumps(content, sort_keys=True, cls=DjangoJSONEncoder)
+    etag = hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+    entry_cache.set(
+        key,
+        {"etag": etag, "content": raw},
+        timeout=settings.RESPONSE_CACHE_TIMEOUT,
+    )
+    return etag, json.loads(raw)
@@ -0,0 +1,190 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .log_policy import get_log_policy
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceLogSink:
+    """
+    Writes HTTP service log entries (AIServiceLog, QDrantServiceLog,
+    JotFormServiceLog) from a background thread, so an external call costs
+    no DB round trip in the calling thread.
+    Entries wait in a bounded queue and are bulk inserted per model every
+    flush_interval seconds or once batch_size entries are collected.
+    Payloads are summarized and success entries sampled by the named
+    LogPayloadPolicy before queueing. When the queue is full, success entries
+    are dropped and counted while error entries wait up to error_put_timeout
+    seconds for room.
+    Pending entries are flushed at interpreter exit, Celery workers flush
+    them after each task and close the sink on process shutdown (see
+    common.tasks.log_tasks).
+    """
+
+    def __init__(
+        self,
+        max_queue_size=10000,
+        batch_size=500,
+        flush_interval=2.0,
+        error_put_timeout=1.0,
+        enabled=True,
+    ):
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.error_put_timeout = error_put_timeout
+        self.enabled = enabled
+        self.queue = None
+        self.thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.dropped = 0
+        self.sampled_out = 0
+        self.written = 0
+
+    def ensure_started(self):
+        # A forked worker (e.g. Celery prefork) starts its own thread and queue.
+        if self.thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self.thread is not None and self._pid == os.getpid():
+                return
+            self.queue = queue.Queue(maxsize=self.max_queue_size)
+            self._stop = threading.Event()
+            self.thread = threading.Thread(
+                target=self.run,
+                name="service-log-sink",
+                daemon=True,
+            )
+            self._pid = os.getpid()
+            self.thread.start()
+            atexit.register(self.close)
+
+    def submit(self, log, policy="default"):
+        """
+        Queues an unsaved log model instance.
+        :param policy: Name of the LogPayloadPolicy in SERVICE_LOG_POLICIES.
+        :return: False if the entry was sampled out or dropped.
+        """
+        if not get_log_policy(policy).apply(log):
+            with self._lock:
+                self.sampled_out += 1
+            return False
+
+        if not self.enabled:
+            log.save()
+            return True
+
+        self.ensure_started()
+        try:
+            if log.status == log.ERROR:
+                self.queue.put(log, timeout=self.error_put_timeout)
+            else:
+                self.queue.put_nowait(log)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        return True
+
+    def run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            timeout = max(deadline - time.monotonic(), 0)
+            try:
+                entry = self.queue.get(timeout=timeout)
+                if entry is not None:
+                    batch.append(entry)
+            except queue.Empty:
+                pass
+
+            stopping = self._stop.is_set()
+            if stopping:
+                batch.extend(entry for entry in self.drain() if entry is not None)
+            if stopping or len(batch) >= self.batch_size or (
+                time.monotonic() >= deadline
+            ):
+                self.write(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+            if stopping:
+                return
+
+    def close(self, timeout=10):
+        """
+        Stops the background thread after it wrote every queued entry.
+        """
+        if self.thread is None or self._pid != os.getpid():
+            return
+        self._stop.set()
+        try:
+            # Wake the thread up instead of waiting for the flush interval.
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self.thread.join(timeout=timeout)
+
+    def drain(self):
+        entries = []
+        while True:
+            try:
+                entries.append(self.queue.get_nowait())
+            except queue.Empty:
+                return entries
+
+    def flush(self):
+        """
+        Writes every queued entry from the calling thread.
+        Entries already taken by the background thread are written by it.
+        """
+        if self.queue is None or self._pid != os.getpid():
+            return
+        self.write([entry for entry in self.drain() if entry is not None])
+
+    def write(self, entries):
+        if not entries:
+            return
+        groups = {}
+        for entry in entries:
+            groups.setdefault(type(entry), []).append(entry)
+
+        with self._flush_lock:
+            close_old_connections()
+            for model, instances in groups.items():
+                try:
+                    model.objects.bulk_create(instances)
+                except Exception:
+                    logger.exception(
+                        f"Failed to write {len(instances)} {model.__name__} entries."
+                    )
+                    continue
+                self.written += len(instances)
+                for instance in instances:
+                    instance.write_file_log()
+
+    def stats(self):
+        return {
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "written": self.written,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+        }
+
+
+service_log_sink = ServiceLogSink(
+    max_queue_size=settings.SERVICE_LOG_QUEUE_SIZE,
+    batch_size=settings.SERVICE_LOG_BATCH_SIZE,
+    flush_interval=settings.SERVICE_LOG_FLUSH_INTERVAL,
+    enabled=settings.SERVICE_LOG_ASYNC,
+)
@@ -1,10 +1,10 @@
 import json
+import logging
 from rest_framework.parsers import JSONParser
 from django.db import transaction
-from django.db.models import Q, Count
 from django.core import management
 
-from common.base.base_api_view import BaseAPIView, ResponseStatus
+from common.base.base_api_view import BaseAPIView, CachedResponseMixin, ResponseStatus
 from common.serializers.connection import (
     ConnectionSerializer,
     AgentSerializer,
@@ -15,10 +15,12 @@ from common.models.connection import Connection, Agent
 from chat.utils.file_conversations import (
     get_conversation_messages_from_csv,
     get_conversation_messages_from_json,
+    iter_json_array,
 )
-from chat.utils.jotform_conversation import get_agents
+from chat.utils.jotform_conversation import get_agents, sync_agents
 from common.constants.sources import SOURCE_FILE, SOURCE_JOTFORM
 from common.utils.jotform_api import JotFormAPIService
+from common.utils.response_cache import agent_scope, invalidate_agents
 from chat.tasks.jotform_tasks import (
     fetch_agent_conversations_and_run_analysis_task,
     run_all_analysis_task,
@@ -28,6 +30,15 @@ from common.utils.filter_mapper import filter_mapper
 from chat.models.conversation import Conversation, ChatMessage
 from analyze.tasks.ai_tasks import label_agent_conversations_task
 from analyze.tasks.qdrant_tasks import delete_collection_task
+from analyze.models.statistics import AgentDailyStatistics
+from analyze.utils.agent_statistics import (
+    live_agent_statistics,
+    rebuild_agent_statistics,
+    statistics_date_range,
+    sum_agent_statistics,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class ConnectionView(BaseAPIView):
@@ -82,6 +93,8 @@ class ConnectionView(BaseAPIView):
                     conversation__agent_id__in=agent_ids
                 ).delete()
                 Conversation.objects.filter(agent_id__in=agent_ids).delete()
+                AgentDailyStatistics.objects.filter(agent_id__in=agent_ids).delete()
+                invalidate_agents(agent_ids, user_ids=[request.user.id])
                 Agent.objects.filter(id__in=agent_ids).delete()
                 for agent_id in agent_ids:
                     delete_collection_task.delay_on_commit(agent_id=agent_id)
@@ -158,18 +171,19 @@ class FileSourceView(BaseAPIView):
                         connection=conn,
                     )
 
+                    # The upload is parsed while it is read, not loaded first.
                     if file.name.endswith(".csv"):
-                        file_content = file.read()
-                        get_conversation_messages_from_csv(
+                        total_messages = get_conversation_messages_from_csv(
                             user=request.user,
-                            csv_data=file_content,
+                            csv_data=file,
                             agent_id=agent.id,
                         )
+                        if total_messages == 0:
+                            raise ValueError("No valid messages found in the CSV file.")
                     else:
-                        json_data = file.read().decode("utf-8")
                         total_messages = get_conversation_messages_from_json(
                             user=request.user,
-                            json_data=json.loads(json_data),
+                            json_data=iter_json_array(file),
                             agent_id=agent.id,
                         )
                         if total_messages == 0:
@@ -253,7 +267,9 @@ class AgentView(BaseAPIView):
                     conversation_id__in=conversation_ids
                 ).delete()
                 Conversation.objects.filter(id__in=conversation_ids).delete()
+                AgentDailyStatistics.objects.filter(agent_id=agent.id).delete()
                 delete_collection_task.delay_on_commit(agent_id=agent.id)
+                invalidate_agents([agent.id])
                 agent.delete()
             return ResponseStatus.SUCCESS, {"message": "Agent deleted successfully."}
         except Exception as e:
@@ -290,13 +306,18 @@ class AgentView(BaseAPIView):
                 and serializer.validated_data.get("label_choices") == []
             ):
                 Conversation.objects.filter(agent_id=agent.id).update(label=None)
+                rebuild_agent_statistics(agent.id)
 
             serializer.save()
+            invalidate_agents([agent.id])
             return ResponseStatus.ACCEPTED, serializer.data
         return ResponseStatus.BAD_REQUEST, {"errors": serializer.errors}
 
 
-class AgentDetailView(BaseAPIView):
+class AgentDetailView(CachedResponseMixin, BaseAPIView):
+    def get_cache_scopes(self, request, *args, **kwargs):
+        return [agent_scope(kwargs.get("agent_id"))]
+
     def get_request(self, request, *args, **kwargs):
         """
         Fetches a specific agent by ID for the authenticated user.
@@ -317,44 +338,15 @@ class AgentDetailView(BaseAPIView):
         agent = agent_qs.first()
         if not agent:
             return ResponseStatus.NOT_FOUND, {"error": "Agent not found."}
-        conversations = Conversation.objects.filter(
-            agent_id=agent.id,
-            **filter_queries,
-        )
-        chat_messages = ChatMessage.objects.filter(
-            conversation__in=conversations,
-            **filter_queries,
-        )
-        sentiment_counts = conversations.aggregate(
-            super_positive_count=Count(
-                "id", filter=Q(analysis_result="SUPER_POSITIVE")
-            ),
-            positive_count=Count("id", filter=Q(analysis_result="POSITIVE")),
-            neutral_count=Count("id", filter=Q(analysis_result="NEUTRAL")),
-            negative_count=Count("id", filter=Q(analysis_result="NEGATIVE")),
-            super_negative_count=Count(
-                "id", filter=Q(analysis_result="SUPER_NEGATIVE")
-            ),
-            total_sentiment_count=Count("id", filter=Q(analysis_result__isnull=False)),
-        )
-        if sentiment_counts["total_sentiment_count"] > 0:
-            sentiment_counts["sentiment_score"] = (
-                (5 * sentiment_counts["super_positive_count"])
-                + (4 * sentiment_counts["positive_count"])
-                + (3 * sentiment_counts["neutral_count"])
-                + (2 * sentiment_counts["negative_count"])
-                + (1 * sentiment_counts["super_negative_count"])
-            ) / sentiment_counts["total_sentiment_count"]
+        # Whole day ranges are summed from the daily rollups, once they were
+        # built for the agent (rebuild_agent_statistics).
+        date_range = statistics_date_range(filter_queries)
+        if agent.statistics_built_at and date_range is not None:
+            statistics = sum_agent_statistics(agent.id, *date_range)
         else:
-            sentiment_counts["sentiment_score"] = 0.0
-
-        statistics = {
-            "total_conversations": conversations.count(),
-            "total_messages": chat_messages.count(),
-            **sentiment_counts,
-        }
+            statistics = live_agent_statistics(agent.id, filter_queries)
         serializer = AgentDetailSerializer(
-            agent_qs.first(), context={"statistics": statistics}
+            agent, context={"statistics": statistics}
         )
         return ResponseStatus.SUCCESS, serializer.data
 
@@ -379,3 +371,18 @@ class JotFormAgentView(BaseAPIView):
             return ResponseStatus.SUCCESS, content
         except Exception as e:
             return ResponseStatus.BAD_REQUEST, {"error": str(e)}
+
+    def post_request(self, request, *args, **kwargs):
+        """
+        Reconciles the synced JotForm agents of the authenticated user with
+        JotForm: names and avatars are updated and agents no longer listed
+        are deactivated.
+        """
+        try:
+            jotform_service = JotFormAPIService(user=request.user)
+            result = sync_agents(
+                jotform_service, jotform_service.connection, logger
+            )
+            return ResponseStatus.SUCCESS, result
+        except Exception as e:
+            return ResponseStatus.BAD_REQUEST, {"error": str(e)}
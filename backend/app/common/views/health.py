@@ -2,6 +2,7 @@ from common.base.base_api_view import BaseAPIView
 from common.base.response import ResponseStatus
 
 from common.utils.jotform_api import JotFormAPIService
+from analyze.utils.qdrant_service import QDrantService
 
 
 class PingView(BaseAPIView):
@@ -76,3 +77,12 @@ class JotFormApiChatCheckView(BaseAPIView):
             else "JotForm API is not reachable",
             "content": content,
         }
+
+
+class QDrantPoolStatsView(BaseAPIView):
+    """
+    Connection pool statistics of the QDrant service in this process.
+    """
+
+    def get_request(self, request):
+        return ResponseStatus.SUCCESS, {"pools": QDrantService.pool_stats()}